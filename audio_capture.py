@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 14:00
+@File: audio_capture.py
+@Description:
+"""
+"""
+上行音频采集管线
+后台线程从麦克风或WAV文件读取PCM，经XiaozhiClient.encode_capture_pcm编码为Opus数据包，
+通过有界队列交给事件循环以二进制帧发送，统计从PCM读出到发送完成的上行延迟；
+可选在编码器前加VAD，静音不编码不发送，并按语音起止自动发送listen start/stop
+"""
+import asyncio
+import logging
+import threading
+import time
+import wave
+
+import pyaudio
+from typing import Any, Dict, Optional
+
+from IdeaFactory.audio_output import acquire_pyaudio, release_pyaudio
+from IdeaFactory.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class WavFileSource:
+    """WAV文件音频源，无硬件时用于调试和性能测试"""
+
+    def __init__(self, path: str, chunk_ms: int = 60, realtime: bool = True, loop: bool = False):
+        """
+        初始化WAV音频源
+
+        Args:
+            path: 16位PCM WAV文件路径
+            chunk_ms: 每次读取的时长 (毫秒)
+            realtime: True按真实时钟节奏读取，False尽快读取
+            loop: 读到文件末尾后是否从头循环
+        """
+        self._wav = wave.open(path, "rb")
+        if self._wav.getsampwidth() != 2:
+            self._wav.close()
+            raise ValueError(f"仅支持16位PCM WAV文件: {path}")
+        self.sample_rate = self._wav.getframerate()
+        self.channels = self._wav.getnchannels()
+        self.chunk_frames = self.sample_rate * chunk_ms // 1000
+        self.chunk_seconds = chunk_ms / 1000
+        self.realtime = realtime
+        self.loop = loop
+        self._next_read: Optional[float] = None
+
+    def read(self) -> Optional[bytes]:
+        """读取一块PCM，文件结束时返回None"""
+        data = self._wav.readframes(self.chunk_frames)
+        if not data and self.loop:
+            self._wav.rewind()
+            data = self._wav.readframes(self.chunk_frames)
+        if not data:
+            return None
+
+        if self.realtime:
+            # 模拟声卡：每块数据在其时长过去后才可读
+            now = time.perf_counter()
+            if self._next_read is None:
+                self._next_read = now
+            self._next_read += self.chunk_seconds
+            if self._next_read > now:
+                time.sleep(self._next_read - now)
+        return data
+
+    def close(self):
+        self._wav.close()
+
+
+class MicrophoneSource:
+    """麦克风音频源（pyaudio阻塞读取）"""
+
+    realtime = True
+
+    def __init__(self, sample_rate: int = 16000, channels: int = 1, chunk_ms: int = 60,
+                 device_index: Optional[int] = None):
+        """
+        初始化麦克风音频源
+
+        Args:
+            sample_rate: 采集采样率 (Hz)
+            channels: 采集声道数
+            chunk_ms: 每次读取的时长 (毫秒)
+            device_index: 输入设备序号，None使用默认设备
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunk_frames = sample_rate * chunk_ms // 1000
+        self._pyaudio = acquire_pyaudio()
+        self._stream = self._pyaudio.open(
+            format=pyaudio.paInt16,
+            channels=channels,
+            rate=sample_rate,
+            input=True,
+            input_device_index=device_index,
+            frames_per_buffer=self.chunk_frames
+        )
+
+    def read(self) -> Optional[bytes]:
+        """读取一块PCM"""
+        # 发送端偶尔跟不上时丢掉溢出的采样，而不是让采集线程抛异常退出
+        return self._stream.read(self.chunk_frames, exception_on_overflow=False)
+
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        release_pyaudio()
+
+
+class UplinkPipeline:
+    """采集 -> 编码 -> 发送 管线"""
+
+    def __init__(self, client, source, max_queue_packets: int = 50, vad=None):
+        """
+        初始化上行管线
+
+        Args:
+            client: XiaozhiClient（提供encode_capture_pcm、send_audio和listen消息）
+            source: 音频源（WavFileSource或MicrophoneSource）
+            max_queue_packets: 待发送数据包上限
+            vad: 可选的VoiceActivityDetector，设置后由它驱动listen start/stop
+        """
+        self.client = client
+        self.source = source
+        self.max_queue_packets = max_queue_packets
+        self.vad = vad
+        # 待发送音频包的额度，控制消息不占额度，保证不会因队列满而丢失
+        self._slots = threading.BoundedSemaphore(max_queue_packets)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._sender_task: Optional[asyncio.Task] = None
+        self._running = False
+
+        # 统计信息
+        self.chunks_captured = 0
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.packets_dropped = 0
+        self.latency = LatencyHistogram("上行延迟")
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    async def start(self):
+        """启动采集线程和发送任务"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self.client.set_capture_format(self.source.sample_rate, self.source.channels)
+        self._running = True
+        self.started_at = time.perf_counter()
+        self._sender_task = asyncio.create_task(self._sender())
+        self._thread = threading.Thread(target=self._capture_worker, daemon=True)
+        self._thread.start()
+        logger.info(f"上行采集已启动: {self.source.sample_rate}Hz, {self.source.channels}声道")
+
+    async def wait(self):
+        """等待音频源读完且所有数据包发送完成（文件音频源）"""
+        await asyncio.shield(self._sender_task)
+
+    async def stop(self):
+        """停止采集，剩余数据补零编码后发送完再返回"""
+        self._running = False
+        if self._thread:
+            await self._loop.run_in_executor(None, self._thread.join)
+        try:
+            if self._sender_task:
+                await self._sender_task
+        except Exception as e:
+            logger.error(f"上行发送错误: {e}")
+        finally:
+            self.source.close()
+        logger.info("上行采集已停止")
+
+    def _capture_worker(self):
+        """采集线程：读取PCM（经VAD）并编码，编码结果送入发送队列"""
+        try:
+            while self._running:
+                pcm = self.source.read()
+                if pcm is None:
+                    break
+                captured_at = time.perf_counter()
+                self.chunks_captured += 1
+
+                if self.vad:
+                    chunks, event = self.vad.process(pcm, captured_at)
+                else:
+                    chunks, event = [(pcm, captured_at)], None
+
+                if event == "start":
+                    self._enqueue(("listen", "start"))
+                for chunk, chunk_time in chunks:
+                    for packet in self.client.encode_capture_pcm(chunk):
+                        self._enqueue_audio(packet, chunk_time)
+                if event == "stop":
+                    self._flush_encoder()
+                    self._enqueue(("listen", "stop"))
+
+            self._flush_encoder()
+            if self.vad and self.vad.active:
+                self.vad.active = False
+                self._enqueue(("listen", "stop"))
+        except Exception as e:
+            logger.error(f"上行采集错误: {e}")
+        finally:
+            self._enqueue(None)
+
+    def _flush_encoder(self):
+        """编码器中不足一帧的残留补零输出"""
+        for packet in self.client.encode_capture_pcm(b"", end_of_stream=True):
+            self._enqueue_audio(packet, time.perf_counter())
+
+    def _enqueue_audio(self, packet: bytes, captured_at: float):
+        """投递一个音频包，占用一个发送额度"""
+        if self.source.realtime:
+            # 实时音频源不能阻塞（否则声卡溢出），额度用完时丢弃新数据包
+            if not self._slots.acquire(blocking=False):
+                self.packets_dropped += 1
+                return
+        else:
+            # 文件音频源阻塞等待，由发送速度反压读取速度；定期检查是否已停止，避免stop()卡住
+            while not self._slots.acquire(timeout=0.1):
+                if not self._running:
+                    self.packets_dropped += 1
+                    return
+        self._enqueue(("audio", packet, captured_at))
+
+    def _enqueue(self, item):
+        """从采集线程投递到事件循环"""
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    async def _sender(self):
+        """发送任务：按顺序发送数据包和listen消息，记录延迟"""
+        try:
+            while True:
+                item = await self._queue.get()
+                if item is None:
+                    break
+                if item[0] == "listen":
+                    if item[1] == "start":
+                        await self.client.start_listening()
+                    else:
+                        await self.client.stop_listening()
+                    continue
+
+                _, packet, captured_at = item
+                try:
+                    sent = await self.client.send_audio(packet)
+                finally:
+                    self._slots.release()
+                if sent:
+                    self.latency.record((time.perf_counter() - captured_at) * 1000)
+                    self.packets_sent += 1
+                    self.bytes_sent += len(packet)
+                else:
+                    self.packets_dropped += 1
+        finally:
+            # 发送任务退出（正常结束、出错或被取消）后采集线程不能再等待额度
+            self._running = False
+            self._release_pending()
+            self.finished_at = time.perf_counter()
+
+    def _release_pending(self):
+        """归还队列中尚未发送的音频包占用的额度"""
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None and item[0] == "audio":
+                self._slots.release()
+                self.packets_dropped += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取上行统计"""
+        elapsed = (self.finished_at or time.perf_counter()) - (self.started_at or time.perf_counter())
+        stats = {
+            "chunks_captured": self.chunks_captured,
+            "packets_sent": self.packets_sent,
+            "bytes_sent": self.bytes_sent,
+            "packets_dropped": self.packets_dropped,
+            "packets_per_sec": round(self.packets_sent / elapsed, 1) if elapsed > 0 else 0.0,
+            "latency_ms": self.latency.summary(),
+        }
+        if self.vad:
+            stats["vad"] = self.vad.get_stats()
+        return stats
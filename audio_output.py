@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/17 14:10
+@File: audio_output.py
+@Description:
+"""
+"""
+回调式音频输出
+预分配的int16环形缓冲区 + 输出后端（pyaudio回调 / 无声卡的空输出）
+解码线程直接写入环形缓冲区，音频回调按切片读取，稳态下不产生逐帧内存分配
+"""
+import logging
+import threading
+import time
+
+import numpy as np
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_pyaudio = None
+_pyaudio_refs = 0
+_pyaudio_lock = threading.Lock()
+
+
+def acquire_pyaudio():
+    """
+    获取进程内共享的PyAudio实例（引用计数+1）
+
+    第一次获取时才初始化PortAudio；播放器、麦克风等各自的启停只开关音频流，
+    不再反复初始化/销毁PortAudio
+    """
+    global _pyaudio, _pyaudio_refs
+    with _pyaudio_lock:
+        if _pyaudio is None:
+            import pyaudio
+            _pyaudio = pyaudio.PyAudio()
+            logger.info("PyAudio已初始化")
+        _pyaudio_refs += 1
+        return _pyaudio
+
+
+def release_pyaudio():
+    """释放一次引用，最后一个使用者释放时销毁PyAudio实例"""
+    global _pyaudio, _pyaudio_refs
+    with _pyaudio_lock:
+        if _pyaudio_refs == 0:
+            return
+        _pyaudio_refs -= 1
+        if _pyaudio_refs == 0 and _pyaudio is not None:
+            _pyaudio.terminate()
+            _pyaudio = None
+            logger.info("PyAudio已释放")
+
+
+class PcmRingBuffer:
+    """单生产者单消费者的int16 PCM环形缓冲区"""
+
+    def __init__(self, capacity: int):
+        """
+        初始化环形缓冲区
+
+        Args:
+            capacity: 容量（int16样本数，多通道时为交错样本总数）
+        """
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=np.int16)
+        self._read_pos = 0
+        self._write_pos = 0
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # 统计信息
+        self.written_samples = 0
+        self.read_samples = 0
+        self.underflows = 0
+
+    @property
+    def available(self) -> int:
+        """可读样本数"""
+        return self._size
+
+    @property
+    def free(self) -> int:
+        """可写样本数"""
+        return self.capacity - self._size
+
+    def wait_writable(self, count: int, timeout: Optional[float] = None) -> bool:
+        """
+        等待至少count个样本的可写空间（为解码线程提供背压）
+
+        Returns:
+            空间足够返回True，超时或缓冲区关闭返回False
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._closed or self.capacity - self._size >= count, timeout
+            ) and not self._closed
+
+    def contiguous_region(self, count: int) -> Optional[np.ndarray]:
+        """
+        获取写指针处长度为count的连续可写视图
+
+        Returns:
+            不跨越缓冲区末尾时返回视图，否则返回None（调用方改用write）
+        """
+        if self._write_pos + count > self.capacity:
+            return None
+        return self._buf[self._write_pos:self._write_pos + count]
+
+    def commit(self, count: int):
+        """提交已直接写入contiguous_region的样本"""
+        with self._cond:
+            self._write_pos = (self._write_pos + count) % self.capacity
+            self._size += count
+            self.written_samples += count
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        复制写入样本（处理跨越末尾的情况），超出可写空间的部分被丢弃
+
+        Returns:
+            实际写入的样本数
+        """
+        with self._cond:
+            count = min(len(samples), self.capacity - self._size)
+            first = min(count, self.capacity - self._write_pos)
+            self._buf[self._write_pos:self._write_pos + first] = samples[:first]
+            if count > first:
+                self._buf[:count - first] = samples[first:count]
+            self._write_pos = (self._write_pos + count) % self.capacity
+            self._size += count
+            self.written_samples += count
+            return count
+
+    def read_into(self, out: np.ndarray) -> int:
+        """
+        读取样本到out，数据不足时剩余部分填充静音
+
+        Returns:
+            实际读取的样本数
+        """
+        with self._cond:
+            count = min(len(out), self._size)
+            first = min(count, self.capacity - self._read_pos)
+            out[:first] = self._buf[self._read_pos:self._read_pos + first]
+            if count > first:
+                out[first:count] = self._buf[:count - first]
+            if count < len(out):
+                out[count:] = 0
+                if count:
+                    # 读到一半数据耗尽才算欠载，完全空闲时输出静音不计
+                    self.underflows += 1
+            self._read_pos = (self._read_pos + count) % self.capacity
+            self._size -= count
+            self.read_samples += count
+            self._cond.notify_all()
+            return count
+
+    def clear(self):
+        """丢弃所有未播放的样本"""
+        with self._cond:
+            self._read_pos = self._write_pos
+            self._size = 0
+            self._cond.notify_all()
+
+    def close(self):
+        """关闭缓冲区，唤醒等待中的写入方"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class PyAudioCallbackSink:
+    """pyaudio回调模式输出（输出流只打开一次，stop后再start复用同一个流）"""
+
+    def __init__(self, pyaudio_instance, sample_rate: int, channels: int, frames_per_buffer: int):
+        self.pyaudio_instance = pyaudio_instance
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.stream = None
+        self.callbacks = 0
+        self._fill: Optional[Callable[[np.ndarray], int]] = None
+
+        # 回调输出缓冲区预分配一次，以只读视图交给pyaudio
+        self._out = np.zeros(frames_per_buffer * channels, dtype=np.int16)
+        self._out_view = memoryview(self._out).cast('B').toreadonly()
+
+    def start(self, fill: Callable[[np.ndarray], int]):
+        """启动输出，回调中调用fill填充数据；第一次启动时打开输出流"""
+        self._fill = fill
+        if self.stream is None:
+            self.stream = self._open_stream()
+        self.stream.start_stream()
+
+    def _open_stream(self):
+        import pyaudio
+
+        def _callback(in_data, frame_count, time_info, status):
+            samples = frame_count * self.channels
+            out = self._out if samples == len(self._out) else self._out[:samples]
+            fill = self._fill
+            if fill is None:
+                out.fill(0)
+            else:
+                fill(out)
+            self.callbacks += 1
+            return (self._out_view if out is self._out else self._out_view[:samples * 2]), pyaudio.paContinue
+
+        return self.pyaudio_instance.open(
+            format=pyaudio.paInt16,
+            channels=self.channels,
+            rate=self.sample_rate,
+            output=True,
+            frames_per_buffer=self.frames_per_buffer,
+            stream_callback=_callback,
+            start=False
+        )
+
+    def stop(self):
+        """暂停输出，保留输出流供下次start复用"""
+        if self.stream and self.stream.is_active():
+            self.stream.stop_stream()
+        self._fill = None
+
+    def close(self):
+        """关闭输出流"""
+        self.stop()
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+
+class NullSink:
+    """无声卡的空输出，按回调方式消费数据，用于无头运行和性能测试"""
+
+    def __init__(self, sample_rate: int, channels: int, frames_per_buffer: int, realtime: bool = True):
+        """
+        Args:
+            realtime: True按真实时钟节奏回调；False尽可能快地回调
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.realtime = realtime
+        self.callbacks = 0
+        self.frames_rendered = 0
+
+        self._out = np.zeros(frames_per_buffer * channels, dtype=np.int16)
+        self._running = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, fill: Callable[[np.ndarray], int]):
+        """启动回调线程"""
+        self._running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(fill,), daemon=True)
+        self._thread.start()
+
+    def _run(self, fill: Callable[[np.ndarray], int]):
+        period = self.frames_per_buffer / self.sample_rate
+        next_time = time.perf_counter()
+        while self._running:
+            read = fill(self._out)
+            self.callbacks += 1
+            self.frames_rendered += read // self.channels
+            if self.realtime:
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    # 用事件等待代替sleep，stop()时立即唤醒
+                    self._stop_event.wait(delay)
+            elif not read:
+                # 非实时模式下没有数据时让出CPU
+                time.sleep(0.0005)
+
+    def stop(self):
+        """停止回调线程"""
+        self._running = False
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def close(self):
+        self.stop()
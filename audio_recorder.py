@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 20:30
+@File: audio_recorder.py
+@Description:
+"""
+"""
+会话音频录制（save_only模式）
+每个会话一个只追加的文件，帧格式为 4字节小端长度 + Opus数据包；
+旁路索引文件记录每帧的偏移、到达时间和长度，便于按时间定位和回放。
+接收线程只把数据追加到内存缓冲区，由后台线程定期批量写盘
+"""
+import logging
+import os
+import struct
+import threading
+import time
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"XZOPUS1\n"
+# 文件头: 采样率, 声道数, 帧时长(毫秒)
+FILE_HEADER = struct.Struct("<IHH")
+FRAME_PREFIX = struct.Struct("<I")
+# 索引记录: 帧数据在录音文件中的偏移, 到达时间(Unix秒), 帧长度
+INDEX_RECORD = struct.Struct("<QdI")
+
+
+class SessionRecorder:
+    """单个会话的录音写入器"""
+
+    def __init__(self, directory: str, session_id: str, sample_rate: int = 16000, channels: int = 1,
+                 frame_duration: int = 60, flush_interval: float = 1.0, flush_bytes: int = 256 * 1024):
+        """
+        初始化录音写入器（同一会话重连后继续追加到原文件）
+
+        Args:
+            directory: 录音目录
+            session_id: 会话ID，决定文件名
+            sample_rate: 采样率（写入文件头）
+            channels: 声道数（写入文件头）
+            frame_duration: 帧时长 (毫秒)（写入文件头）
+            flush_interval: 后台写盘间隔 (秒)
+            flush_bytes: 缓冲数据超过该大小时提前写盘
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.session_id = session_id
+        self.path = os.path.join(directory, f"{session_id}.xzopus")
+        self.index_path = f"{self.path}.idx"
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+
+        self._data_file = open(self.path, "ab")
+        self._index_file = open(self.index_path, "ab")
+        if self._data_file.tell() == 0:
+            self._data_file.write(MAGIC + FILE_HEADER.pack(sample_rate, channels, frame_duration))
+            self._data_file.flush()
+        # 下一帧数据在文件中的偏移（含尚未写盘的缓冲）
+        self._offset = self._data_file.tell()
+
+        self._data_buffer = bytearray()
+        self._index_buffer = bytearray()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        # 写盘失败后偏移与文件内容不再一致，停止录音
+        self.failed = False
+
+        # 统计信息
+        self.frames = 0
+        self.frames_lost = 0
+        self.bytes_written = 0
+        self.flushes = 0
+        self.max_flush_ms = 0.0
+
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def write_frame(self, opus_data: bytes, timestamp: Optional[float] = None):
+        """追加一帧（只写内存缓冲区，不做磁盘IO）"""
+        if timestamp is None:
+            timestamp = time.time()
+        size = len(opus_data)
+        with self._lock:
+            if self._closed or self.failed:
+                return
+            data_offset = self._offset + FRAME_PREFIX.size
+            self._data_buffer += FRAME_PREFIX.pack(size)
+            self._data_buffer += opus_data
+            self._index_buffer += INDEX_RECORD.pack(data_offset, timestamp, size)
+            self._offset = data_offset + size
+            self.frames += 1
+            pending = len(self._data_buffer)
+        if pending >= self.flush_bytes:
+            self._wakeup.set()
+
+    def _flush_loop(self):
+        """后台写盘线程"""
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._flush()
+
+    def _flush(self):
+        """交换缓冲区后在锁外写盘，先写数据再写索引，保证索引只指向已落盘的数据"""
+        with self._lock:
+            if self.failed or not self._data_buffer:
+                return
+            data, self._data_buffer = self._data_buffer, bytearray()
+            index, self._index_buffer = self._index_buffer, bytearray()
+
+        start = time.perf_counter()
+        try:
+            self._data_file.write(data)
+            self._data_file.flush()
+            self._index_file.write(index)
+            self._index_file.flush()
+        except OSError as e:
+            with self._lock:
+                # 换出的缓冲区和之后追加的帧都按旧偏移编址，无法再写入：回退偏移并停止录音
+                self.failed = True
+                self.frames_lost += (len(index) + len(self._index_buffer)) // INDEX_RECORD.size
+                self._data_buffer.clear()
+                self._index_buffer.clear()
+                self._offset = self._data_file.tell()
+            logger.error(f"录音写盘失败，停止录音: {e}")
+            return
+        self.bytes_written += len(data)
+        self.flushes += 1
+        self.max_flush_ms = max(self.max_flush_ms, (time.perf_counter() - start) * 1000)
+
+    def close(self):
+        """停止后台线程，写出剩余数据并关闭文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self._flush()
+        for f in (self._data_file, self._index_file):
+            try:
+                f.close()
+            except OSError as e:
+                logger.error(f"关闭录音文件失败: {e}")
+        logger.info(f"录音已保存: {self.path} ({self.frames}帧)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "frames": self.frames,
+            "bytes_written": self.bytes_written,
+            "flushes": self.flushes,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "failed": self.failed,
+            "frames_lost": self.frames_lost,
+        }
+
+
+def read_header(path: str) -> Tuple[int, int, int]:
+    """读取录音文件头，返回 (采样率, 声道数, 帧时长毫秒)"""
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC) + FILE_HEADER.size)
+    if not head.startswith(MAGIC):
+        raise ValueError(f"不是录音文件: {path}")
+    return FILE_HEADER.unpack_from(head, len(MAGIC))
+
+
+def iter_frames(path: str) -> Iterator[bytes]:
+    """按顺序读取录音文件中的所有帧（末尾不完整的帧忽略）"""
+    with open(path, "rb") as f:
+        f.seek(len(MAGIC) + FILE_HEADER.size)
+        while True:
+            prefix = f.read(FRAME_PREFIX.size)
+            if len(prefix) < FRAME_PREFIX.size:
+                return
+            (size,) = FRAME_PREFIX.unpack(prefix)
+            frame = f.read(size)
+            if len(frame) < size:
+                return
+            yield frame
+
+
+def load_index(index_path: str) -> List[Tuple[int, float, int]]:
+    """读取索引文件，返回 [(偏移, 到达时间, 长度), ...]"""
+    with open(index_path, "rb") as f:
+        data = f.read()
+    usable = len(data) - len(data) % INDEX_RECORD.size
+    return list(INDEX_RECORD.iter_unpack(data[:usable]))
+
+
+def read_frame_at(path: str, offset: int, size: int) -> bytes:
+    """按索引中的偏移读取单帧"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(size)
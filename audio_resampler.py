@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/17 18:30
+@File: audio_resampler.py
+@Description:
+"""
+"""
+流式重采样器
+多相FIR滤波（Kaiser窗sinc原型），用numpy向量化计算，跨分块保留滤波器历史和相位，
+可以放在解码器与音频输出之间，或采集与OpusEncoderUtils之间
+"""
+import math
+
+import numpy as np
+from typing import Union
+
+
+class StreamingResampler:
+    """有状态的int16 PCM重采样器"""
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1,
+                 taps_per_phase: int = 32, rolloff: float = 0.94, beta: float = 8.0):
+        """
+        初始化重采样器
+
+        Args:
+            in_rate: 输入采样率 (Hz)
+            out_rate: 输出采样率 (Hz)
+            channels: 通道数（输入输出均为交错排列）
+            taps_per_phase: 每个相位的滤波器抽头数，越大过渡带越窄、CPU越高
+            rolloff: 截止频率相对于较低奈奎斯特频率的比例
+            beta: Kaiser窗参数
+        """
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        self.taps_per_phase = taps_per_phase
+
+        g = math.gcd(in_rate, out_rate)
+        # 输出第n个样本对应上采样域中的位置 n*down，对应输入样本 (n*down)//up
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.passthrough = self.up == self.down
+
+        self._filters = self._design_filters(rolloff, beta)
+        self._taps = np.arange(taps_per_phase)
+        self.reset()
+
+    def _design_filters(self, rolloff: float, beta: float) -> np.ndarray:
+        """设计原型低通滤波器并拆分为多相形式，返回形状 (up, taps_per_phase)"""
+        length = self.up * self.taps_per_phase
+        # 上采样域中的截止频率（周期/样本）
+        cutoff = 0.5 * rolloff / max(self.up, self.down)
+        m = np.arange(length) - (length - 1) / 2
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * m) * np.kaiser(length, beta)
+        # 插零上采样会把能量摊薄到1/up，乘回增益
+        prototype *= self.up / prototype.sum()
+        # h[phase, k] = prototype[k*up + phase]
+        return prototype.reshape(self.taps_per_phase, self.up).T.astype(np.float32).copy()
+
+    def reset(self):
+        """清空滤波器历史与相位"""
+        self._history = np.zeros((self.taps_per_phase - 1, self.channels), dtype=np.float32)
+        # 下一个输出样本相对当前分块起点的位置（上采样域）
+        self._pos = 0
+
+    def process(self, pcm: Union[bytes, np.ndarray]) -> np.ndarray:
+        """
+        重采样一个分块
+
+        Args:
+            pcm: int16 PCM（字节或numpy数组，多通道交错）
+
+        Returns:
+            重采样后的int16数组（多通道交错）
+        """
+        samples = np.frombuffer(pcm, dtype=np.int16) if isinstance(pcm, (bytes, bytearray, memoryview)) else pcm
+        if self.passthrough:
+            return samples.reshape(-1)
+
+        frames = samples.reshape(-1, self.channels)
+        count = len(frames)
+        extended = np.concatenate((self._history, frames.astype(np.float32)))
+
+        # 本分块内可以计算的所有输出位置
+        end = count * self.up
+        positions = np.arange(self._pos, end, self.down)
+        if len(positions):
+            self._pos = int(positions[-1]) + self.down - end
+        else:
+            self._pos -= end
+
+        base = positions // self.up + (self.taps_per_phase - 1)
+        phase = positions % self.up
+        # 每个输出需要的输入窗口: extended[base - k], k=0..taps-1
+        windows = extended[base[:, None] - self._taps[None, :]]
+        output = np.einsum("nk,nkc->nc", self._filters[phase], windows)
+
+        self._history = extended[len(extended) - (self.taps_per_phase - 1):]
+        np.rint(output, out=output)
+        np.clip(output, -32768, 32767, out=output)
+        return output.astype(np.int16).reshape(-1)
+
+    def process_bytes(self, pcm: bytes) -> bytes:
+        """重采样字节数据"""
+        return self.process(pcm).tobytes()
+
+    def flush(self) -> np.ndarray:
+        """输入结束时补零，输出滤波器中剩余的样本"""
+        if self.passthrough:
+            return np.zeros(0, dtype=np.int16)
+        tail = np.zeros((self.taps_per_phase // 2) * self.channels, dtype=np.int16)
+        output = self.process(tail)
+        self.reset()
+        return output
+
+    @property
+    def delay_ms(self) -> float:
+        """滤波器群延迟 (毫秒)"""
+        return (self.taps_per_phase / 2) / self.in_rate * 1000
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/17 15:00
+@File: bench_audio_output.py
+@Description:
+"""
+"""
+回调式输出路径性能测试（无需声卡）
+1. 使用空输出后端跑完整的 抖动缓冲 -> 解码 -> 环形缓冲区 -> 回调 链路，统计帧/秒
+2. 用tracemalloc统计环形缓冲区读写稳态下的内存分配次数
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from IdeaFactory.audio_output import PcmRingBuffer
+from IdeaFactory.client_ws import StreamingAudioPlayer
+from IdeaFactory.opus_encoder_tulis import OpusEncoderUtils
+
+
+def make_packets(sample_rate: int, frame_size_ms: int, frames: int):
+    """生成测试用的Opus数据包（440Hz正弦波）"""
+    encoder = OpusEncoderUtils(sample_rate=sample_rate, channels=1, frame_size_ms=frame_size_ms)
+    t = np.arange(encoder.frame_size * frames) / sample_rate
+    pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    return encoder.encode_pcm_to_opus(pcm.tobytes(), True)
+
+
+def bench_pipeline(packets, sample_rate: int, frame_size_ms: int):
+    """完整播放链路吞吐"""
+    player = StreamingAudioPlayer(
+        sample_rate=sample_rate, channels=1, frame_duration=frame_size_ms,
+        jitter_max_depth=len(packets) + 1, output_backend="null", realtime_output=False
+    )
+    expected = len(packets) * player.decoder.frame_size
+
+    start = time.perf_counter()
+    for packet in packets:
+        player.add_audio_frame(packet)
+    player.end_of_stream()
+    while player.sink.frames_rendered < expected:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    stats = player.get_stats()
+    player.stop_streaming()
+    return len(packets) / elapsed, stats
+
+
+def bench_ring_allocations(frame_samples: int, callback_samples: int, iterations: int):
+    """环形缓冲区写入/回调读取的稳态内存分配"""
+    ring = PcmRingBuffer(frame_samples * 5)
+    frame = np.ones(frame_samples, dtype=np.int16)
+    out = np.zeros(callback_samples, dtype=np.int16)
+
+    def step():
+        region = ring.contiguous_region(frame_samples)
+        if region is not None:
+            region[:] = frame
+            ring.commit(frame_samples)
+        else:
+            ring.write(frame)
+        while ring.available >= callback_samples:
+            ring.read_into(out)
+
+    # 预热
+    for _ in range(100):
+        step()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        step()
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    retained = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+    return iterations / elapsed, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回调式输出路径性能测试")
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--frame-ms", type=int, default=60)
+    args = parser.parse_args()
+
+    packets = make_packets(args.sample_rate, args.frame_ms, args.frames)
+    fps, stats = bench_pipeline(packets, args.sample_rate, args.frame_ms)
+    print(f"完整链路(空输出): {fps:,.0f} 帧/秒 (实时倍数 {fps * args.frame_ms / 1000:,.1f}x)")
+    print(f"播放统计: {stats}")
+
+    frame_samples = args.sample_rate * args.frame_ms // 1000
+    callback_samples = args.sample_rate * 20 // 1000
+    ops, retained = bench_ring_allocations(frame_samples, callback_samples, args.frames * 10)
+    print(f"环形缓冲区: {ops:,.0f} 帧/秒, 稳态新增内存 {retained} 字节")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 23:00
+@File: bench_barge_in.py
+@Description:
+"""
+"""
+打断（barge-in）测试
+对本地模拟服务器发起多轮对话，收到若干音频帧后调用abort_speaking，
+统计 打断到本地静音 的时间、打断到服务器确认(tts stop) 的时间，以及丢弃的迟到帧
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from IdeaFactory.load_generator import VirtualDevice
+from IdeaFactory.metrics import LatencyHistogram
+from IdeaFactory.mock_xiaozhi_server import MockXiaozhiServer
+
+
+async def run(args):
+    server = MockXiaozhiServer(ws_port=0, ota_port=0, frames_per_sentence=args.frames * 3)
+    await server.start()
+    device = VirtualDevice(ota_url=server.ota_url)
+    ack_latency = LatencyHistogram("打断到服务器确认")
+    try:
+        if not await device.connect():
+            print("连接模拟服务器失败")
+            return
+        listen_task = asyncio.create_task(device.listen_for_messages())
+        await device.hello_received.wait()
+
+        for _ in range(args.turns):
+            device.reset_turn()
+            await device.send_text_message("讲个故事")
+            while device.frames < args.frames:
+                await asyncio.sleep(0.005)
+            # 等播放真正开始
+            await asyncio.sleep(args.play_ms / 1000)
+
+            start = time.perf_counter()
+            await device.abort_speaking()
+            await asyncio.wait_for(device.tts_stopped.wait(), 5)
+            ack_latency.record((time.perf_counter() - start) * 1000)
+            # 等输出回调报告静音
+            await asyncio.sleep(0.1)
+
+        stats = device.audio_player.get_stats()
+        print(f"\n=== 打断测试 ({args.turns}轮) ===")
+        print(device.audio_player.time_to_silence.format())
+        print(ack_latency.format())
+        print(f"丢弃的迟到帧: {device.late_frames_dropped}, 服务器收到abort: {server.aborts}, "
+              f"本地打断次数: {stats['aborts']}")
+        listen_task.cancel()
+    finally:
+        await device.disconnect()
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="打断（barge-in）测试")
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--frames", type=int, default=5, help="收到多少帧后打断")
+    parser.add_argument("--play-ms", type=int, default=200, help="收到帧后再播放多久才打断")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("IdeaFactory.client_ws").setLevel(logging.WARNING)
+    main()
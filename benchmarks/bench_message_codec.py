@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 17:00
+@File: bench_message_codec.py
+@Description:
+"""
+"""
+消息编解码性能测试
+1. 各编解码器对 hello/tts/stt/llm/mcp 文本消息的解析+分发吞吐（XiaozhiClient.handle_message）
+2. MCP回复：每次构建字典并序列化 vs 预序列化模板填字段
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from IdeaFactory.client_ws import XiaozhiClient
+from IdeaFactory.message_codec import CODECS, get_codec
+
+SESSION_ID = "9a0c5a3e-1f2b-4c8d-9e7f-0123456789ab"
+
+TRAFFIC = [
+    {"type": "hello", "transport": "websocket", "session_id": SESSION_ID,
+     "audio_params": {"format": "opus", "sample_rate": 16000, "channels": 1, "frame_duration": 60}},
+    {"type": "stt", "text": "今天天气怎么样", "session_id": SESSION_ID},
+    {"type": "llm", "text": "😊", "emotion": "happy", "session_id": SESSION_ID},
+    {"type": "tts", "state": "start", "session_id": SESSION_ID},
+    {"type": "tts", "state": "sentence_start", "text": "今天是晴天，气温二十五度，适合出门散步。",
+     "session_id": SESSION_ID},
+    {"type": "tts", "state": "sentence_end", "text": "今天是晴天，气温二十五度，适合出门散步。",
+     "session_id": SESSION_ID},
+    {"type": "tts", "state": "stop", "session_id": SESSION_ID},
+    {"type": "mcp", "session_id": SESSION_ID, "payload": {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}},
+    {"type": "mcp", "session_id": SESSION_ID,
+     "payload": {"jsonrpc": "2.0", "id": 3, "method": "tools/call",
+                 "params": {"name": "self.audio_speaker.set_volume", "arguments": {"volume": 50}}}},
+]
+
+
+class CountingClient(XiaozhiClient):
+    """不连接服务器，只统计要发送的消息"""
+
+    async def send_text(self, message_str: str):
+        self.sent_bytes += len(message_str)
+
+
+async def bench_dispatch(codec_name: str, rounds: int) -> float:
+    client = CountingClient(output_backend="null", codec=codec_name)
+    client.sent_bytes = 0
+    frames = [json.dumps(m, ensure_ascii=False) for m in TRAFFIC]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            await client.handle_message(frame)
+    elapsed = time.perf_counter() - start
+    return rounds * len(frames) / elapsed
+
+
+def bench_mcp_encode(codec_name: str, rounds: int):
+    codec = get_codec(codec_name)
+    client = CountingClient(output_backend="null", codec=codec_name)
+
+    start = time.perf_counter()
+    for i in range(rounds):
+        codec.dumps({
+            "session_id": SESSION_ID,
+            "type": "mcp",
+            "payload": {"jsonrpc": "2.0", "id": i, "result": {"tools": client.mcp_tools.list_tools()}}
+        })
+    rebuild = rounds / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(rounds):
+        client._mcp_tools_list.render(session_id=SESSION_ID, id=i)
+    template = rounds / (time.perf_counter() - start)
+    return rebuild, template
+
+
+def main():
+    parser = argparse.ArgumentParser(description="消息编解码性能测试")
+    parser.add_argument("--rounds", type=int, default=5000)
+    args = parser.parse_args()
+
+    available = []
+    for name in CODECS:
+        try:
+            get_codec(name)
+            available.append(name)
+        except ImportError:
+            print(f"{name}: 未安装，跳过")
+
+    print(f"\n{'编解码器':>8} | {'解析+分发 消息/秒':>16} | {'MCP重建 次/秒':>14} | {'MCP模板 次/秒':>14}")
+    for name in available:
+        rate = asyncio.run(bench_dispatch(name, args.rounds))
+        rebuild, template = bench_mcp_encode(name, args.rounds * 4)
+        print(f"{name:>8} | {rate:>16,.0f} | {rebuild:>14,.0f} | {template:>14,.0f}")
+
+
+if __name__ == "__main__":
+    # 处理器的逐条日志会主导耗时，测试时关闭
+    logging.getLogger().setLevel(logging.WARNING)
+    main()
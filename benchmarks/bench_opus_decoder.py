@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/17 10:40
+@File: bench_opus_decoder.py
+@Description:
+"""
+"""
+Opus解码性能测试
+对比常驻libopus解码器与每帧启动一次ffmpeg子进程的解码吞吐(帧/秒)
+"""
+import argparse
+import shutil
+import subprocess
+import time
+
+import numpy as np
+
+from IdeaFactory.opus_decoder_utils import OpusDecoderUtils
+from IdeaFactory.opus_encoder_tulis import OpusEncoderUtils
+
+
+def make_packets(sample_rate: int, frame_size_ms: int, frames: int):
+    """生成测试用的Opus数据包（440Hz正弦波）"""
+    encoder = OpusEncoderUtils(sample_rate=sample_rate, channels=1, frame_size_ms=frame_size_ms)
+    samples = encoder.frame_size * frames
+    t = np.arange(samples) / sample_rate
+    pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    return encoder.encode_pcm_to_opus(pcm.tobytes(), True)
+
+
+def bench_in_process(packets, sample_rate: int, frame_size_ms: int) -> float:
+    """常驻解码器，返回帧/秒"""
+    decoder = OpusDecoderUtils(sample_rate, 1, frame_size_ms)
+    start = time.perf_counter()
+    for packet in packets:
+        decoder.decode(packet)
+    elapsed = time.perf_counter() - start
+    return len(packets) / elapsed
+
+
+def bench_subprocess(packets, sample_rate: int) -> float:
+    """原有路径：每帧启动一次ffmpeg，返回帧/秒"""
+    start = time.perf_counter()
+    for packet in packets:
+        ffmpeg = subprocess.Popen(
+            ["ffmpeg", "-i", "pipe:0", "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        ffmpeg.communicate(input=packet, timeout=5)
+    elapsed = time.perf_counter() - start
+    return len(packets) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opus解码性能测试")
+    parser.add_argument("--frames", type=int, default=1000, help="常驻解码器测试帧数")
+    parser.add_argument("--subprocess-frames", type=int, default=50, help="ffmpeg子进程测试帧数")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--frame-ms", type=int, default=60)
+    args = parser.parse_args()
+
+    packets = make_packets(args.sample_rate, args.frame_ms, args.frames)
+    print(f"测试数据: {len(packets)} 帧, {args.sample_rate}Hz, {args.frame_ms}ms")
+
+    fps = bench_in_process(packets, args.sample_rate, args.frame_ms)
+    print(f"常驻libopus解码器: {fps:,.0f} 帧/秒 (实时倍数 {fps * args.frame_ms / 1000:,.1f}x)")
+
+    if shutil.which("ffmpeg"):
+        sub_fps = bench_subprocess(packets[:args.subprocess_frames], args.sample_rate)
+        print(f"ffmpeg子进程解码: {sub_fps:,.1f} 帧/秒 (实时倍数 {sub_fps * args.frame_ms / 1000:,.2f}x)")
+        print(f"加速比: {fps / sub_fps:,.0f}x")
+    else:
+        print("ffmpeg不可用，跳过子进程路径测试")
+
+
+if __name__ == "__main__":
+    main()
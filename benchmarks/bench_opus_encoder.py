@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/17 16:10
+@File: bench_opus_encoder.py
+@Description:
+"""
+"""
+Opus编码缓冲性能测试
+按10ms/20ms/60ms分块送入PCM，对比固定容量缓冲与原有np.append缓冲的编码吞吐
+"""
+import argparse
+import time
+
+import numpy as np
+
+from IdeaFactory.opus_encoder_tulis import OpusEncoderUtils
+
+
+class LegacyOpusEncoderUtils(OpusEncoderUtils):
+    """原有实现：每次调用np.append整个缓冲区再重新切片"""
+
+    def __init__(self, sample_rate: int, channels: int, frame_size_ms: int):
+        super().__init__(sample_rate, channels, frame_size_ms)
+        self.legacy_buffer = np.array([], dtype=np.int16)
+
+    def encode_pcm_to_opus(self, pcm_data: bytes, end_of_stream: bool):
+        new_samples = self._convert_bytes_to_shorts(pcm_data)
+        self.legacy_buffer = np.append(self.legacy_buffer, new_samples)
+
+        opus_packets = []
+        offset = 0
+        while offset <= len(self.legacy_buffer) - self.total_frame_size:
+            frame = self.legacy_buffer[offset : offset + self.total_frame_size]
+            output = self.encoder.encode(frame.tobytes(), self.frame_size)
+            if output:
+                opus_packets.append(output)
+            offset += self.total_frame_size
+        self.legacy_buffer = self.legacy_buffer[offset:]
+
+        if end_of_stream and len(self.legacy_buffer) > 0:
+            last_frame = np.zeros(self.total_frame_size, dtype=np.int16)
+            last_frame[: len(self.legacy_buffer)] = self.legacy_buffer
+            opus_packets.append(self.encoder.encode(last_frame.tobytes(), self.frame_size))
+            self.legacy_buffer = np.array([], dtype=np.int16)
+        return opus_packets
+
+
+def run(encoder_cls, pcm: np.ndarray, sample_rate: int, chunk_ms: int):
+    """按chunk_ms分块编码整段音频，返回(耗时秒, 数据包数)"""
+    encoder = encoder_cls(sample_rate=sample_rate, channels=1, frame_size_ms=60)
+    chunk = sample_rate * chunk_ms // 1000
+    chunks = [pcm[i:i + chunk].tobytes() for i in range(0, len(pcm), chunk)]
+
+    packets = 0
+    start = time.perf_counter()
+    for i, data in enumerate(chunks):
+        packets += len(encoder.encode_pcm_to_opus(data, i == len(chunks) - 1))
+    return time.perf_counter() - start, packets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opus编码缓冲性能测试")
+    parser.add_argument("--seconds", type=int, default=30, help="测试音频时长(秒)")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    args = parser.parse_args()
+
+    t = np.arange(args.sample_rate * args.seconds) / args.sample_rate
+    pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+
+    print(f"测试音频: {args.seconds}秒, {args.sample_rate}Hz, 60ms帧")
+    print(f"{'分块':>6} | {'实现':<10} | {'帧/秒':>10} | {'实时倍数':>8}")
+    for chunk_ms in (10, 20, 60):
+        for name, cls in (("ring", OpusEncoderUtils), ("np.append", LegacyOpusEncoderUtils)):
+            elapsed, packets = run(cls, pcm, args.sample_rate, chunk_ms)
+            print(f"{chunk_ms:>4}ms | {name:<10} | {packets / elapsed:>10,.0f} | {args.seconds / elapsed:>7,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
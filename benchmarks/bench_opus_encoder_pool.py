@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/17 17:20
+@File: bench_opus_encoder_pool.py
+@Description:
+"""
+"""
+多路Opus编码池性能测试
+N个流同时编码，按线程数统计总帧率与各流平均延迟
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from IdeaFactory.opus_encoder_pool import OpusEncoderPool
+
+
+def run(streams: int, workers: int, pcm: np.ndarray, chunk: int, sample_rate: int):
+    """所有流按相同分块节奏提交，返回(帧/秒, 平均每流延迟ms)"""
+    pool = OpusEncoderPool(sample_rate=sample_rate, channels=1, frame_size_ms=60, max_workers=workers)
+    chunks = [pcm[i:i + chunk].tobytes() for i in range(0, len(pcm), chunk)]
+
+    start = time.perf_counter()
+    futures = []
+    for i, data in enumerate(chunks):
+        end = i == len(chunks) - 1
+        for stream_id in range(streams):
+            futures.append(pool.submit(stream_id, data, end))
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+
+    stats = pool.get_stats()
+    pool.shutdown()
+    latencies = [s["avg_latency_ms"] for s in stats["per_stream"].values()]
+    return stats["total_frames"] / elapsed, sum(latencies) / len(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多路Opus编码池性能测试")
+    parser.add_argument("--streams", type=int, default=32)
+    parser.add_argument("--seconds", type=int, default=10, help="每个流的音频时长(秒)")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    args = parser.parse_args()
+
+    t = np.arange(args.sample_rate * args.seconds) / args.sample_rate
+    pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    chunk = args.sample_rate * 60 // 1000 * 5
+
+    print(f"{args.streams}路流, 每路{args.seconds}秒, {args.sample_rate}Hz/60ms")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        fps, latency = run(args.streams, workers, pcm, chunk, args.sample_rate)
+        print(f"线程数 {workers:>3}: {fps:>10,.0f} 帧/秒, 平均每流延迟 {latency:,.2f} ms")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
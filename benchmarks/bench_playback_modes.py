@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 19:40
+@File: bench_playback_modes.py
+@Description:
+"""
+"""
+流式 vs 缓冲 播放模式对比
+模拟服务器带抖动地按实时节奏下发TTS语音段，空输出后端按真实时钟消费，
+比较两种模式的起播延迟和欠载次数
+"""
+import argparse
+import random
+import time
+
+from IdeaFactory.benchmarks.bench_audio_output import make_packets
+from IdeaFactory.client_ws import StreamingAudioPlayer
+
+
+def run_mode(mode: str, packets, args) -> dict:
+    player = StreamingAudioPlayer(
+        sample_rate=args.rate, channels=1, frame_duration=args.frame_ms,
+        output_backend="null", mode=mode, prefetch_ms=args.prefetch
+    )
+    rng = random.Random(args.seed)
+    frame_seconds = args.frame_ms / 1000
+
+    for _ in range(args.turns):
+        for _ in range(args.sentences):
+            player.begin_sentence()
+            for packet in packets:
+                if mode == "buffered":
+                    player.add_buffered_frame(packet)
+                else:
+                    player.add_audio_frame(packet)
+                # 网络抖动：大部分帧准时，偶尔出现一次较长的停顿
+                delay = frame_seconds + rng.gauss(0, args.jitter_ms / 1000)
+                if rng.random() < args.stall_prob:
+                    delay += args.stall_ms / 1000
+                time.sleep(max(0.0, delay))
+            player.end_sentence()
+        player.end_of_stream()
+        # 等待本轮播放完
+        time.sleep(args.prefetch / 1000 + 0.5)
+
+    stats = player.get_stats()
+    player.stop_streaming()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式 vs 缓冲 播放模式对比")
+    parser.add_argument("--rate", type=int, default=16000)
+    parser.add_argument("--frame-ms", type=int, default=60)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--sentences", type=int, default=2)
+    parser.add_argument("--frames", type=int, default=15, help="每个语音段的帧数")
+    parser.add_argument("--jitter-ms", type=float, default=15.0, help="到达间隔抖动标准差")
+    parser.add_argument("--stall-prob", type=float, default=0.05, help="每帧后出现停顿的概率")
+    parser.add_argument("--stall-ms", type=float, default=200.0, help="停顿时长")
+    parser.add_argument("--prefetch", type=int, default=300, help="缓冲模式预取量(毫秒)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    packets = make_packets(args.rate, args.frame_ms, args.frames)
+    print(f"{'模式':>10} | {'起播延迟均值':>10} | {'起播延迟max':>10} | {'输出欠载':>6} | {'抖动缓冲欠载':>10}")
+    for mode in ("streaming", "buffered"):
+        stats = run_mode(mode, packets, args)
+        startup = stats["startup_delay_ms"]
+        print(f"{mode:>10} | {startup['mean']:>10.1f}ms | {startup['max']:>10.1f}ms | "
+              f"{stats['output_underflows']:>8} | {stats['underruns']:>10}")
+
+
+if __name__ == "__main__":
+    main()
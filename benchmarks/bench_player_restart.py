@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 23:20
+@File: bench_player_restart.py
+@Description:
+"""
+"""
+播放器启停测试
+反复 start_streaming / stop_streaming，统计每次启停的耗时；
+pyaudio后端下共享的PyAudio实例只初始化一次，输出流也只打开一次，每轮只启停输出流
+"""
+import argparse
+import logging
+import time
+
+from IdeaFactory import audio_output
+from IdeaFactory.client_ws import StreamingAudioPlayer
+from IdeaFactory.metrics import LatencyHistogram
+
+
+def run(args):
+    player = StreamingAudioPlayer(args.rate, 1, 60, output_backend=args.backend, mode=args.mode)
+    cycle = LatencyHistogram("启停一次")
+    try:
+        for _ in range(args.cycles):
+            start = time.perf_counter()
+            player.start_streaming()
+            player.stop_streaming()
+            cycle.record((time.perf_counter() - start) * 1000)
+        print(f"\n=== 播放器启停 ({args.backend}, {args.mode}, {args.cycles}次) ===")
+        print(cycle.format())
+        print(f"PyAudio引用计数: {audio_output._pyaudio_refs}")
+    finally:
+        player.close()
+    print(f"close后PyAudio引用计数: {audio_output._pyaudio_refs}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="播放器启停测试")
+    parser.add_argument("--backend", choices=["pyaudio", "null"], default="null")
+    parser.add_argument("--mode", choices=["streaming", "buffered"], default="streaming")
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--rate", type=int, default=24000)
+    args = parser.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("IdeaFactory.client_ws").setLevel(logging.WARNING)
+    main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 21:00
+@File: bench_recorder.py
+@Description:
+"""
+"""
+save_only录音性能测试
+对比 每帧一个文件（旧实现） 与 SessionRecorder（内存缓冲 + 后台写盘） 在接收线程上的耗时，
+并校验录音文件和索引可以完整读回
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from IdeaFactory.audio_recorder import SessionRecorder, iter_frames, load_index, read_frame_at
+from IdeaFactory.metrics import LatencyHistogram
+
+
+def main():
+    parser = argparse.ArgumentParser(description="save_only录音性能测试")
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--frame-bytes", type=int, default=120, help="单帧大小(字节)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_recorder_")
+    frame = os.urandom(args.frame_bytes)
+    try:
+        per_file = LatencyHistogram("每帧一个文件")
+        for i in range(args.frames):
+            start = time.perf_counter()
+            with open(os.path.join(directory, f"audio_frame_{i}.opus"), "wb") as f:
+                f.write(frame)
+            per_file.record((time.perf_counter() - start) * 1e6)
+
+        recorder = SessionRecorder(directory, "bench_session")
+        buffered = LatencyHistogram("SessionRecorder")
+        for _ in range(args.frames):
+            start = time.perf_counter()
+            recorder.write_frame(frame)
+            buffered.record((time.perf_counter() - start) * 1e6)
+        close_start = time.perf_counter()
+        recorder.close()
+        close_ms = (time.perf_counter() - close_start) * 1000
+
+        print(f"{args.frames}帧, 每帧{args.frame_bytes}字节（接收线程上的单帧耗时）")
+        print(per_file.format(unit="us"))
+        print(buffered.format(unit="us"))
+        print(f"后台写盘: {recorder.get_stats()}, close耗时 {close_ms:.1f}ms")
+
+        frames = list(iter_frames(recorder.path))
+        index = load_index(recorder.index_path)
+        offset, _, size = index[len(index) // 2]
+        ok = (len(frames) == len(index) == args.frames and all(f == frame for f in frames)
+              and read_frame_at(recorder.path, offset, size) == frame)
+        print(f"读回校验: {'通过' if ok else '失败'}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/17 19:10
+@File: bench_resampler.py
+@Description:
+"""
+"""
+流式重采样器性能测试
+按60ms分块处理，统计每秒音频消耗的CPU时间
+"""
+import argparse
+import time
+
+import numpy as np
+
+from IdeaFactory.audio_resampler import StreamingResampler
+
+RATE_PAIRS = [
+    (16000, 48000),
+    (24000, 16000),
+    (48000, 16000),
+    (44100, 16000),
+    (16000, 44100),
+    (24000, 44100),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式重采样器性能测试")
+    parser.add_argument("--seconds", type=int, default=20, help="测试音频时长(秒)")
+    parser.add_argument("--chunk-ms", type=int, default=60)
+    parser.add_argument("--taps", type=int, default=32, help="每相位抽头数")
+    args = parser.parse_args()
+
+    print(f"{'转换':>14} | {'CPU毫秒/音频秒':>14} | {'实时倍数':>8}")
+    for in_rate, out_rate in RATE_PAIRS:
+        t = np.arange(in_rate * args.seconds) / in_rate
+        pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+        chunk = in_rate * args.chunk_ms // 1000
+        resampler = StreamingResampler(in_rate, out_rate, taps_per_phase=args.taps)
+
+        start = time.process_time()
+        for i in range(0, len(pcm), chunk):
+            resampler.process(pcm[i:i + chunk])
+        resampler.flush()
+        cpu = time.process_time() - start
+
+        label = f"{in_rate}->{out_rate}"
+        print(f"{label:>14} | {cpu / args.seconds * 1000:>14.2f} | {args.seconds / cpu:>7,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
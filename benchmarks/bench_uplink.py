@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 14:40
+@File: bench_uplink.py
+@Description:
+"""
+"""
+上行采集管线性能测试
+生成WAV文件作为音频源，经 重采样 -> Opus编码 -> WebSocket 发送到本地模拟服务器，
+统计数据包速率和上行延迟（实时模式下延迟即真实设备上的编码+发送开销）
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import wave
+
+import numpy as np
+
+from IdeaFactory.audio_capture import UplinkPipeline, WavFileSource
+from IdeaFactory.client_ws import XiaozhiClient
+from IdeaFactory.mock_xiaozhi_server import MockXiaozhiServer
+
+
+def write_test_wav(path: str, sample_rate: int, seconds: int):
+    """写入一段带包络的正弦测试音"""
+    t = np.arange(sample_rate * seconds) / sample_rate
+    pcm = np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 0.5 * t)) * 10000
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.astype(np.int16).tobytes())
+
+
+async def run(args):
+    server = MockXiaozhiServer(ws_port=0, ota_port=0)
+    await server.start()
+    path = os.path.join(tempfile.gettempdir(), f"bench_uplink_{args.rate}.wav")
+    write_test_wav(path, args.rate, args.seconds)
+
+    client = XiaozhiClient(ota_url=server.ota_url, output_backend="null")
+    try:
+        if not await client.connect():
+            print("连接模拟服务器失败")
+            return
+        listen_task = asyncio.create_task(client.listen_for_messages())
+
+        source = WavFileSource(path, realtime=args.realtime)
+        pipeline = UplinkPipeline(client, source)
+        await pipeline.start()
+        await pipeline.wait()
+        await pipeline.stop()
+        # 等服务器处理完最后的数据帧
+        await asyncio.sleep(0.2)
+
+        stats = pipeline.get_stats()
+        mode = "实时" if args.realtime else "尽快"
+        print(f"\n=== 上行管线 ({mode}, 采集{args.rate}Hz -> 16000Hz, {args.seconds}秒音频) ===")
+        print(f"读取块数: {stats['chunks_captured']}, 发送数据包: {stats['packets_sent']}, "
+              f"丢弃: {stats['packets_dropped']}, 服务器收到: {server.uplink_frames}")
+        print(f"发送速率: {stats['packets_per_sec']:,.1f} 包/秒 "
+              f"({stats['packets_per_sec'] * 0.06:,.1f}x 实时)")
+        print(f"上行码率: {stats['bytes_sent'] * 8 / args.seconds / 1000:.1f} kbps")
+        print(pipeline.latency.format())
+
+        listen_task.cancel()
+    finally:
+        await client.disconnect()
+        await server.stop()
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="上行采集管线性能测试")
+    parser.add_argument("--seconds", type=int, default=30, help="测试音频时长(秒)")
+    parser.add_argument("--rate", type=int, default=16000, help="WAV采样率，不是16000时经过重采样")
+    parser.add_argument("--realtime", action="store_true", help="按真实时钟节奏读取音频")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 00:10
+@File: bench_ws_channels.py
+@Description:
+"""
+"""
+ws_demo多频道负载测试
+服务器运行在子进程中，本进程为每个频道启动1个发送端和R个接收端，
+所有发送端按实时节奏发送带时间戳和频道号的PCM块，统计 投递率、串频道的块数、
+转发延迟和服务器CPU，观察频道数增加时的伸缩情况
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import struct
+import time
+
+from IdeaFactory.benchmarks.bench_ws_relay import connect_client, server_process
+from IdeaFactory.metrics import LatencyHistogram
+
+# 块头: 发送时间(perf_counter), 频道序号
+CHUNK_HEADER = struct.Struct("<dI")
+
+
+async def _gather_in_batches(factories, batch=100):
+    """分批并发执行，避免一次发起上千个连接"""
+    results = []
+    for offset in range(0, len(factories), batch):
+        results.extend(await asyncio.gather(*(factory() for factory in factories[offset:offset + batch])))
+    return results
+
+
+async def _receive(websocket, channel_index, latency, counters):
+    try:
+        async for message in websocket:
+            if not isinstance(message, bytes):
+                continue
+            sent_at, index = CHUNK_HEADER.unpack_from(message)
+            latency.record((time.perf_counter() - sent_at) * 1000)
+            counters["received"] += 1
+            if index != channel_index:
+                counters["misrouted"] += 1
+    except Exception:
+        pass
+
+
+async def run_once(url, conn, channels, receivers_per_channel, args):
+    senders = await _gather_in_batches(
+        [lambda i=i: connect_client(url, "sender", i, channel=f"ch{i}") for i in range(channels)])
+    receivers = await _gather_in_batches(
+        [lambda i=i, r=r: connect_client(url, "receiver", f"{i}_{r}", channel=f"ch{i}")
+         for i in range(channels) for r in range(receivers_per_channel)])
+    await asyncio.sleep(0.5)
+
+    latency = LatencyHistogram("转发延迟")
+    counters = {"received": 0, "misrouted": 0}
+    receive_tasks = [asyncio.create_task(_receive(ws, index // receivers_per_channel, latency, counters))
+                     for index, ws in enumerate(receivers)]
+    padding = os.urandom(args.chunk_bytes - CHUNK_HEADER.size)
+    ticks = int(args.duration * 1000 / args.chunk_ms)
+
+    conn.send("cpu")
+    cpu_start = conn.recv()
+    start = time.perf_counter()
+    late_ticks = 0
+    for tick in range(ticks):
+        for index, sender in enumerate(senders):
+            await sender.send(CHUNK_HEADER.pack(time.perf_counter(), index) + padding)
+        delay = start + (tick + 1) * args.chunk_ms / 1000 - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            late_ticks += 1
+    # 等最后一批送达
+    await asyncio.sleep(0.5)
+    elapsed = time.perf_counter() - start
+    conn.send("cpu")
+    server_cpu = conn.recv() - cpu_start
+
+    for task in receive_tasks:
+        task.cancel()
+    await _gather_in_batches([lambda ws=ws: ws.close() for ws in senders + receivers])
+    await asyncio.sleep(0.2)
+
+    expected = ticks * channels * receivers_per_channel
+    return {
+        "expected": expected,
+        "received": counters["received"],
+        "misrouted": counters["misrouted"],
+        "late_ticks": late_ticks,
+        "server_cpu": server_cpu / elapsed * 100,
+        "cpu_per_chunk_us": server_cpu / (ticks * channels) * 1e6,
+        "latency": latency.summary(),
+    }
+
+
+async def run(args):
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=server_process, args=(child, args.queue_size, "drop_oldest"), daemon=True)
+    process.start()
+    url = f"ws://localhost:{parent.recv()}"
+
+    print(f"\n=== 多频道负载 (每频道1发送端+{args.receivers}接收端, 每{args.chunk_ms}ms一块, "
+          f"{args.chunk_bytes}字节, {args.duration}秒) ===")
+    print(f"{'频道':>6} {'投递率':>8} {'串频道':>6} {'发送超时':>8} {'服务器CPU':>10} {'CPU/块':>10} "
+          f"{'延迟p50':>9} {'延迟p95':>9}")
+    try:
+        for channels in args.channels:
+            result = await run_once(url, parent, channels, args.receivers, args)
+            latency = result["latency"]
+            print(f"{channels:>6} {result['received'] / result['expected'] * 100:>7.1f}% {result['misrouted']:>6} "
+                  f"{result['late_ticks']:>8} {result['server_cpu']:>9.0f}% {result['cpu_per_chunk_us']:>8.1f}µs "
+                  f"{latency['p50']:>7.1f}ms {latency['p95']:>7.1f}ms")
+    finally:
+        parent.send("stop")
+        process.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ws_demo多频道负载测试")
+    parser.add_argument("--channels", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--receivers", type=int, default=1, help="每个频道的接收端数量")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="每个发送端的发送间隔")
+    parser.add_argument("--chunk-bytes", type=int, default=2048)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--queue-size", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
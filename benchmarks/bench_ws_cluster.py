@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 00:40
+@File: bench_ws_cluster.py
+@Description:
+"""
+"""
+ws_demo多进程转发测试
+本进程运行总线并启动N个worker（共用端口），再启动若干个压测进程，
+每个压测进程负责一部分频道（每频道1发送端+R接收端），发送端尽快发送，
+统计测试时间内所有接收端收到的总字节数（MB/s）以及经总线跨进程转发的比例
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+
+from IdeaFactory.benchmarks.bench_ws_relay import connect_client
+from IdeaFactory.ws_demo.websocket_server import RelayCluster
+
+
+async def _load_main(url, first_channel, channels, receivers_per_channel, chunk_bytes, ready, go, results):
+    senders = [await connect_client(url, "sender", i, channel=f"ch{i}")
+               for i in range(first_channel, first_channel + channels)]
+    receivers = [await connect_client(url, "receiver", f"{i}_{r}", channel=f"ch{i}")
+                 for i in range(first_channel, first_channel + channels) for r in range(receivers_per_channel)]
+    received = [0]
+    running = [True]
+
+    async def send_loop(websocket):
+        payload = os.urandom(chunk_bytes)
+        while running[0]:
+            await websocket.send(payload)
+            # send在缓冲区未满时不会让出事件循环，主动让出避免饿死接收端
+            await asyncio.sleep(0)
+
+    async def receive_loop(websocket):
+        async for message in websocket:
+            if isinstance(message, bytes):
+                received[0] += len(message)
+
+    ready.put(True)
+    loop = asyncio.get_running_loop()
+    duration = await loop.run_in_executor(None, go.get)
+
+    receive_tasks = [asyncio.create_task(receive_loop(ws)) for ws in receivers]
+    send_tasks = [asyncio.create_task(send_loop(ws)) for ws in senders]
+    await asyncio.sleep(duration)
+    running[0] = False
+    results.put(received[0])
+
+    # 进程随即退出，连接由系统关闭
+    for task in send_tasks + receive_tasks:
+        task.cancel()
+
+
+def load_process(*args):
+    """压测进程入口"""
+    asyncio.run(_load_main(*args))
+
+
+async def run_once(workers, args):
+    cluster = RelayCluster("127.0.0.1", 0, workers, args.queue_size, "drop_oldest")
+    await cluster.start()
+    url = f"ws://127.0.0.1:{cluster.port}"
+
+    context = multiprocessing.get_context("spawn")
+    ready, go, results = context.Queue(), context.Queue(), context.Queue()
+    per_process = args.channels // args.load_processes
+    processes = []
+    for index in range(args.load_processes):
+        process = context.Process(target=load_process, daemon=True, args=(
+            url, index * per_process, per_process, args.receivers, args.chunk_bytes, ready, go, results))
+        process.start()
+        processes.append(process)
+
+    loop = asyncio.get_running_loop()
+    try:
+        for _ in processes:
+            await loop.run_in_executor(None, ready.get, True, 60)
+        # 等订阅消息到达总线
+        await asyncio.sleep(0.5)
+        forwarded_start = cluster.hub.bytes_forwarded
+        for _ in processes:
+            go.put(args.duration)
+        total = 0
+        for _ in processes:
+            total += await loop.run_in_executor(None, results.get, True, args.duration + 60)
+        forwarded = cluster.hub.bytes_forwarded - forwarded_start
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        await cluster.stop()
+    return total / args.duration / 1e6, forwarded / args.duration / 1e6, cluster.hub.frames_dropped
+
+
+async def run(args):
+    workers_list = args.workers or sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i < os.cpu_count()],
+                                           os.cpu_count()})
+    print(f"\n=== 多进程转发 ({args.channels}个频道, 每频道1发送端+{args.receivers}接收端, "
+          f"{args.load_processes}个压测进程, {args.duration}秒, CPU核数 {os.cpu_count()}) ===")
+    print(f"{'worker':>6} {'接收总量MB/s':>14} {'总线转发MB/s':>14} {'总线丢弃':>8}")
+    for workers in workers_list:
+        delivered, forwarded, dropped = await run_once(workers, args)
+        print(f"{workers:>6} {delivered:>14.1f} {forwarded:>14.1f} {dropped:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ws_demo多进程转发测试")
+    parser.add_argument("--workers", type=int, nargs="+", help="默认1到CPU核数按2的幂取值")
+    parser.add_argument("--channels", type=int, default=64)
+    parser.add_argument("--receivers", type=int, default=1, help="每个频道的接收端数量")
+    parser.add_argument("--load-processes", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--chunk-bytes", type=int, default=2048)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--queue-size", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 01:10
+@File: bench_ws_opus.py
+@Description:
+"""
+"""
+ws_demo Opus压缩测试
+按ws_demo发送端的方式逐帧编码一段类语音信号（每个Opus数据包一个二进制帧），接收端逐包解码，
+统计每秒音频在线上的字节数（含WebSocket帧头，发送端到服务器的帧另有4字节掩码）
+以及发送端编码、接收端解码的CPU耗时，对照44.1kHz PCM二进制帧和旧协议（base64 + JSON）
+"""
+import argparse
+import base64
+import json
+import time
+
+import numpy as np
+
+from IdeaFactory.opus_decoder_utils import OpusDecoderUtils
+from IdeaFactory.opus_encoder_tulis import OpusEncoderUtils
+
+PCM_RATE = 44100
+PCM_CHUNK = 1024
+OPUS_RATE = 48000
+
+
+def ws_frame_bytes(payload_len, masked):
+    """一个WebSocket帧在线上的字节数（未启用压缩扩展）"""
+    if payload_len < 126:
+        header = 2
+    elif payload_len < 65536:
+        header = 4
+    else:
+        header = 10
+    return header + (4 if masked else 0) + payload_len
+
+
+def speech_like(sample_rate, seconds, seed=0):
+    """类语音信号：基频缓慢变化的谐波 + 音节状的包络 + 少量噪声"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    f0 = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = np.clip(np.sin(2 * np.pi * 3 * t), 0, None) ** 0.5
+    signal = voice * envelope * 0.25 + rng.normal(0, 0.01, len(t))
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+
+
+def pcm_wire(seconds):
+    """44.1kHz PCM：每1024帧一个二进制帧，返回(上行字节, 下行字节)"""
+    chunks = int(PCM_RATE * seconds) // PCM_CHUNK
+    size = PCM_CHUNK * 2
+    return chunks * ws_frame_bytes(size, True), chunks * ws_frame_bytes(size, False)
+
+
+def legacy_wire(seconds):
+    """旧协议：base64文本上行，服务器包成JSON下行"""
+    chunks = int(PCM_RATE * seconds) // PCM_CHUNK
+    encoded = base64.b64encode(bytes(PCM_CHUNK * 2)).decode("utf-8")
+    forward = json.dumps({"type": "audio_data", "data": encoded})
+    return (chunks * ws_frame_bytes(len(encoded), True),
+            chunks * ws_frame_bytes(len(forward.encode("utf-8")), False))
+
+
+def run_opus(pcm, bitrate, frame_ms, complexity):
+    """逐帧编码、逐包解码，返回(上行字节, 下行字节, 编码CPU秒, 解码CPU秒)"""
+    encoder = OpusEncoderUtils(OPUS_RATE, 1, frame_ms, bitrate=bitrate, complexity=complexity)
+    decoder = OpusDecoderUtils(OPUS_RATE, 1, frame_ms)
+    frame = OPUS_RATE * frame_ms // 1000
+    frames = [pcm[i:i + frame].tobytes() for i in range(0, len(pcm) - frame + 1, frame)]
+
+    packets = []
+    start = time.process_time()
+    for data in frames:
+        packets.extend(encoder.encode_pcm_to_opus(data, False))
+    encode_cpu = time.process_time() - start
+
+    start = time.process_time()
+    for packet in packets:
+        decoder.decode(packet)
+    decode_cpu = time.process_time() - start
+
+    encoder.close()
+    decoder.close()
+    uplink = sum(ws_frame_bytes(len(packet), True) for packet in packets)
+    downlink = sum(ws_frame_bytes(len(packet), False) for packet in packets)
+    return uplink, downlink, encode_cpu, decode_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ws_demo Opus压缩测试")
+    parser.add_argument("--seconds", type=float, default=30, help="测试音频时长(秒)")
+    parser.add_argument("--bitrates", type=int, nargs="+", default=[16000, 24000, 32000, 64000])
+    parser.add_argument("--frame-ms", type=int, nargs="+", default=[20, 60], choices=[10, 20, 40, 60])
+    parser.add_argument("--complexities", type=int, nargs="+", default=[0, 5, 10])
+    args = parser.parse_args()
+
+    seconds = args.seconds
+    pcm = speech_like(OPUS_RATE, seconds)
+
+    print(f"\n=== ws_demo音频线上字节数与编解码CPU ({seconds}秒类语音信号, 单声道) ===")
+    print(f"{'编码':<24} {'上行KB/s':>10} {'下行KB/s':>10} {'压缩比':>8} {'编码CPU':>10} {'解码CPU':>10}")
+    pcm_up, pcm_down = pcm_wire(seconds)
+    legacy_up, legacy_down = legacy_wire(seconds)
+    print(f"{'pcm 44.1kHz':<24} {pcm_up / seconds / 1000:>10.1f} {pcm_down / seconds / 1000:>10.1f} "
+          f"{1:>7.1f}x {'-':>10} {'-':>10}")
+    print(f"{'旧协议 base64+JSON':<24} {legacy_up / seconds / 1000:>10.1f} {legacy_down / seconds / 1000:>10.1f} "
+          f"{pcm_down / legacy_down:>7.2f}x {'-':>10} {'-':>10}")
+
+    # CPU按每秒音频的毫秒数给出，即占一个核的千分比
+    for frame_ms in args.frame_ms:
+        for bitrate in args.bitrates:
+            for complexity in args.complexities:
+                uplink, downlink, encode_cpu, decode_cpu = run_opus(pcm, bitrate, frame_ms, complexity)
+                name = f"opus {bitrate // 1000}k/{frame_ms}ms/c{complexity}"
+                print(f"{name:<24} {uplink / seconds / 1000:>10.1f} {downlink / seconds / 1000:>10.1f} "
+                      f"{pcm_down / downlink:>7.1f}x {encode_cpu / seconds * 1000:>7.2f}ms/s "
+                      f"{decode_cpu / seconds * 1000:>7.2f}ms/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 23:40
+@File: bench_ws_relay.py
+@Description:
+"""
+"""
+ws_demo转发服务器测试
+服务器运行在子进程中，本进程启动1个发送端和N个接收端，
+发送端尽快发送固定数量的PCM块，统计全部接收端收齐的吞吐和服务器进程的CPU占用；
+同时给出旧协议（base64 + 每个接收端一次json.dumps）的序列化开销作为对照。
+--slow-receivers 额外接入处理很慢的接收端，检验它们不会拖慢其他接收端，并统计服务器端的丢弃
+"""
+import argparse
+import asyncio
+import base64
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+import websockets
+
+from IdeaFactory.ws_demo.websocket_server import AudioWebSocketServer, FULL_POLICIES
+
+
+def server_process(conn, queue_size, full_policy):
+    """子进程：运行转发服务器，按命令返回CPU时间和丢弃统计"""
+    sys.stdout = open(os.devnull, "w")
+    logging.disable(logging.WARNING)
+
+    async def main():
+        server = AudioWebSocketServer(port=0, queue_size=queue_size, full_policy=full_policy)
+        ws_server = await server.serve()
+        conn.send(server.port)
+        loop = asyncio.get_running_loop()
+        while True:
+            command = await loop.run_in_executor(None, conn.recv)
+            if command == "cpu":
+                conn.send(time.process_time())
+            elif command == "drops":
+                conn.send((sum(q.dropped for receivers in server.channels.values() for q in receivers.values()),
+                           server.slow_disconnects))
+            else:
+                break
+        ws_server.close()
+        await ws_server.wait_closed()
+
+    asyncio.run(main())
+
+
+async def connect_client(url, client_type, index, slow=False, channel=None):
+    """连接服务器并完成身份确认"""
+    if slow:
+        # 慢接收端的客户端队列和socket接收缓冲区都很小，积压会经TCP反压到服务器
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("localhost", int(url.rsplit(":", 1)[1])))
+        websocket = await websockets.connect(url, sock=sock, ping_interval=None, max_queue=1, close_timeout=0.5)
+    else:
+        websocket = await websockets.connect(url, ping_interval=None, max_queue=None)
+    identity = {"type": client_type, "id": f"{client_type}_{index}"}
+    if channel is not None:
+        identity["channel"] = channel
+    await websocket.send(json.dumps(identity))
+    await websocket.recv()
+    return websocket
+
+
+async def _receive(websocket, chunks):
+    received = 0
+    while received < chunks:
+        message = await websocket.recv()
+        if isinstance(message, bytes):
+            received += 1
+
+
+async def _receive_slowly(websocket, delay):
+    """慢接收端：每收到一块都停顿一段时间"""
+    try:
+        async for _ in websocket:
+            await asyncio.sleep(delay)
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
+async def run_once(url, conn, receivers, chunks, chunk_bytes, slow_receivers=0, slow_delay=0.05):
+    receiver_sockets = [await connect_client(url, "receiver", i) for i in range(receivers)]
+    slow_sockets = [await connect_client(url, "receiver", f"slow_{i}", slow=True) for i in range(slow_receivers)]
+    sender = await connect_client(url, "sender", 0)
+    # 等服务器处理完注册
+    await asyncio.sleep(0.2)
+    payload = os.urandom(chunk_bytes)
+    slow_tasks = [asyncio.create_task(_receive_slowly(ws, slow_delay)) for ws in slow_sockets]
+
+    conn.send("cpu")
+    cpu_start = conn.recv()
+    start = time.perf_counter()
+    receive_tasks = [asyncio.create_task(_receive(ws, chunks)) for ws in receiver_sockets]
+    for _ in range(chunks):
+        await sender.send(payload)
+    # 只等正常接收端收齐，慢接收端不参与计时
+    await asyncio.gather(*receive_tasks)
+    elapsed = time.perf_counter() - start
+    conn.send("cpu")
+    server_cpu = conn.recv() - cpu_start
+    conn.send("drops")
+    drops, disconnects = conn.recv()
+
+    for task in slow_tasks:
+        task.cancel()
+    for websocket in receiver_sockets + slow_sockets + [sender]:
+        await websocket.close()
+    await asyncio.sleep(0.1)
+    return elapsed, server_cpu, drops, disconnects
+
+
+def legacy_serialize_us(receivers, chunk_bytes, repeat=200):
+    """旧协议每块的序列化开销 (微秒)：发送端base64一次，服务器对每个接收端json.dumps一次"""
+    payload = os.urandom(chunk_bytes)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        message = base64.b64encode(payload).decode("utf-8")
+        forward = {"type": "audio_data", "data": message}
+        for _ in range(receivers):
+            json.dumps(forward)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+async def run(args):
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=server_process, args=(child, args.queue_size, args.full_policy),
+                                      daemon=True)
+    process.start()
+    url = f"ws://localhost:{parent.recv()}"
+
+    print(f"\n=== 二进制转发 ({args.chunks}块 x {args.chunk_bytes}字节, "
+          f"慢接收端 {args.slow_receivers}个, 队列 {args.queue_size}/{args.full_policy}) ===")
+    print(f"{'接收端':>6} {'块/秒':>10} {'投递/秒':>10} {'MB/s':>8} {'服务器CPU':>10} {'CPU/块':>10} "
+          f"{'旧协议序列化/块':>16} {'丢弃':>8} {'断开':>6}")
+    try:
+        for receivers in args.receivers:
+            elapsed, server_cpu, drops, disconnects = await run_once(url, parent, receivers, args.chunks, args.chunk_bytes,
+                                                        args.slow_receivers, args.slow_delay_ms / 1000)
+            deliveries = args.chunks * receivers
+            legacy_us = legacy_serialize_us(receivers, args.chunk_bytes)
+            print(f"{receivers:>6} {args.chunks / elapsed:>10.0f} {deliveries / elapsed:>10.0f} "
+                  f"{deliveries * args.chunk_bytes / elapsed / 1e6:>8.1f} {server_cpu / elapsed * 100:>9.0f}% "
+                  f"{server_cpu / args.chunks * 1e6:>8.1f}µs {legacy_us:>14.1f}µs {drops:>8} {disconnects:>6}")
+    finally:
+        with contextlib.suppress(Exception):
+            parent.send("stop")
+        process.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ws_demo转发服务器测试")
+    parser.add_argument("--receivers", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-bytes", type=int, default=2048, help="1024帧16位单声道PCM")
+    parser.add_argument("--slow-receivers", type=int, default=0)
+    parser.add_argument("--slow-delay-ms", type=float, default=50, help="慢接收端每块的处理时间")
+    parser.add_argument("--queue-size", type=int, default=50)
+    parser.add_argument("--full-policy", choices=FULL_POLICIES, default="drop_oldest")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
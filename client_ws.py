@@ -6,16 +6,32 @@
 """
 
 import asyncio
-import json
 import logging
 import random
-import string
+import subprocess
+import tempfile
+import threading
 import time
+import numpy as np
+import pyaudio
 import websockets
-import requests
+from collections import deque
 from typing import Optional, Dict, Any, List
 
 from IdeaFactory.opus_encoder_tulis import OpusEncoderUtils
+from IdeaFactory.opus_decoder_utils import OpusDecoderUtils
+from IdeaFactory.jitter_buffer import JitterBuffer
+from IdeaFactory.audio_output import PcmRingBuffer, PyAudioCallbackSink, NullSink, acquire_pyaudio, release_pyaudio
+from IdeaFactory.audio_resampler import StreamingResampler
+from IdeaFactory.ota_client import OtaClient
+from IdeaFactory.metrics import LatencyHistogram
+from IdeaFactory.audio_capture import UplinkPipeline, MicrophoneSource, WavFileSource
+from IdeaFactory.voice_activity import VoiceActivityDetector
+from IdeaFactory.message_codec import Field, MessageTemplate, get_codec
+from IdeaFactory.mcp_tools import McpToolError, McpToolRegistry
+from IdeaFactory.turn_tracer import TurnTracer
+from IdeaFactory.audio_recorder import SessionRecorder
+from IdeaFactory.traffic_capture import DIRECTION_IN, DIRECTION_OUT, TrafficCapture
 
 # 配置日志
 logging.basicConfig(
@@ -25,35 +41,117 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-import threading
-import queue
-import pyaudio
-import subprocess
-import os
-import tempfile
-import logging
+class _BufferedSentence:
+    """缓冲模式下一个TTS语音段的数据包"""
 
-logger = logging.getLogger(__name__)
+    def __init__(self):
+        self.packets: List[bytes] = []
+        self.consumed = 0
+        self.complete = False
+        self.started = False
 
 
-opus_encoder = OpusEncoderUtils(
-            sample_rate=16000, channels=1, frame_size_ms=60
-        )
 class StreamingAudioPlayer:
-    """实时流式音频播放器（使用 pyaudio 播放）"""
-
-    def __init__(self):
-        self.audio_queue = queue.Queue()
+    """实时流式音频播放器（回调模式输出，pyaudio 或无声卡的空输出）"""
+
+    def __init__(self, sample_rate: int = 16000, channels: int = 1, frame_duration: int = 60,
+                 jitter_target_depth: int = 3, jitter_max_depth: int = 50,
+                 output_backend: str = "pyaudio", ring_buffer_ms: int = 300, callback_ms: int = 20,
+                 realtime_output: bool = True, output_rate: Optional[int] = None,
+                 mode: str = "streaming", prefetch_ms: int = 300):
+        # 抖动缓冲替代无界队列，平滑网络突发并限制内存占用
+        self.jitter_buffer = JitterBuffer(
+            frame_duration_ms=frame_duration,
+            target_depth=jitter_target_depth,
+            max_depth=jitter_max_depth
+        )
         self.is_playing = False
-        self.stream = None
-        self.pyaudio_instance = pyaudio.PyAudio()
+        self.sink = None
+        self.ring_buffer: Optional[PcmRingBuffer] = None
+        self.player_thread = None
+        # output_backend: pyaudio（声卡）或 null（无头运行/性能测试）
+        self.output_backend = output_backend
+        # 共享的PyAudio实例在第一次打开输出时获取，close()时释放
+        self.pyaudio_instance = None
         self.temp_dir = tempfile.mkdtemp(prefix="streaming_audio_")
         self.frame_counter = 0
 
-        # 假设解码后为 mono/48000Hz/16bit
-        self.channels = 1
-        self.rate = 48000
+        # 输出参数与服务器hello中协商的audio_params一致
+        self.channels = channels
+        self.rate = sample_rate
+        self.frame_duration = frame_duration
         self.format = pyaudio.paInt16
+        self.ring_buffer_ms = ring_buffer_ms
+        self.callback_ms = callback_ms
+        # 仅对空输出有效：False时不按真实时钟节奏消费，用于性能测试
+        self.realtime_output = realtime_output
+
+        # 输出设备采样率，未指定时跟随协商的采样率；两者不同时经重采样器转换
+        self._fixed_output_rate = output_rate
+        self.output_rate = output_rate or sample_rate
+        self.resampler = self._create_resampler()
+
+        # 会话内常驻的Opus解码器
+        self.decoder = OpusDecoderUtils(sample_rate, channels, frame_duration)
+        self._scratch = np.zeros(self.decoder.max_frame_size * channels, dtype=np.int16)
+
+        # mode: streaming（经抖动缓冲逐帧解码）或 buffered（按语音段攒够预取量后批量解码）
+        self.mode = mode
+        self.prefetch_ms = prefetch_ms
+        self._sentences: deque = deque()
+        self._sentence_cond = threading.Condition()
+
+        # 起播延迟：一轮语音的首帧到达 -> 首批PCM写入输出缓冲
+        self.startup_delay = LatencyHistogram("起播延迟")
+        self._first_frame_time: Optional[float] = None
+        self._awaiting_output = False
+        self._turn_ended = True
+
+        # 打断：每次abort递增代号，解码线程发现代号变化时丢弃手上的数据并重置解码器
+        self._generation = 0
+        self._worker_generation = 0
+        self._abort_time: Optional[float] = None
+        self.aborts = 0
+        self.time_to_silence = LatencyHistogram("打断到静音")
+
+    def _create_resampler(self) -> Optional[StreamingResampler]:
+        """解码采样率与输出采样率不同时创建重采样器"""
+        if self.output_rate == self.rate:
+            return None
+        return StreamingResampler(self.rate, self.output_rate, self.channels)
+
+    def configure(self, sample_rate: int, channels: int, frame_duration: int):
+        """根据协商的音频参数重新配置播放器"""
+        if (sample_rate, channels, frame_duration) == (self.rate, self.channels, self.frame_duration):
+            return
+
+        was_playing = self.is_playing
+        if was_playing:
+            self._close_stream()
+        # 输出参数变了，复用的输出流作废
+        self._release_sink()
+
+        self.rate = sample_rate
+        self.channels = channels
+        self.frame_duration = frame_duration
+        self.output_rate = self._fixed_output_rate or sample_rate
+        self.resampler = self._create_resampler()
+        self.decoder = OpusDecoderUtils(sample_rate, channels, frame_duration)
+        self._scratch = np.zeros(self.decoder.max_frame_size * channels, dtype=np.int16)
+        self.jitter_buffer.frame_duration_ms = frame_duration
+        logger.info(f"播放器参数已更新: {sample_rate}Hz, {channels}声道, {frame_duration}ms")
+
+        if was_playing:
+            self.start_streaming()
+
+    def _create_sink(self):
+        """按输出后端创建回调输出"""
+        frames_per_buffer = self.output_rate * self.callback_ms // 1000
+        if self.output_backend == "null":
+            return NullSink(self.output_rate, self.channels, frames_per_buffer, realtime=self.realtime_output)
+        if self.pyaudio_instance is None:
+            self.pyaudio_instance = acquire_pyaudio()
+        return PyAudioCallbackSink(self.pyaudio_instance, self.output_rate, self.channels, frames_per_buffer)
 
     def start_streaming(self):
         """开始流式播放"""
@@ -61,63 +159,258 @@ class StreamingAudioPlayer:
             return
 
         self.is_playing = True
-        self.stream = self.pyaudio_instance.open(
-            format=self.format,
-            channels=self.channels,
-            rate=self.rate,
-            output=True
-        )
-        self.player_thread = threading.Thread(target=self._streaming_worker, daemon=True)
+        # 环形缓冲区容量取整帧，常规帧写入时不会跨越末尾
+        ring_frames = max(2, self.ring_buffer_ms // self.frame_duration)
+        output_frame_size = self.output_rate * self.frame_duration // 1000
+        self.ring_buffer = PcmRingBuffer(ring_frames * output_frame_size * self.channels)
+        # 输出流在启停之间保留，只有第一次启动或参数变化后才重新打开
+        if self.sink is None:
+            self.sink = self._create_sink()
+        self.sink.start(self._fill_output)
+        # 环形缓冲区只允许一个写入线程，按模式选择工作线程
+        worker = self._buffered_worker if self.mode == "buffered" else self._streaming_worker
+        self.player_thread = threading.Thread(target=worker, daemon=True)
         self.player_thread.start()
         logger.info("流式播放器已启动")
 
-    def stop_streaming(self):
-        """停止流式播放"""
+    def _fill_output(self, out: np.ndarray) -> int:
+        """输出回调：从环形缓冲区取数据，打断后第一次输出静音时记录打断到静音的时间"""
+        count = self.ring_buffer.read_into(out)
+        if self._abort_time is not None and count == 0:
+            self.time_to_silence.record((time.perf_counter() - self._abort_time) * 1000)
+            self._abort_time = None
+        return count
+
+    def abort(self):
+        """
+        打断当前播放：清空抖动缓冲、未播放的语音段和输出缓冲区
+
+        输出回调的下一个周期即输出静音；正在解码的那一帧由解码线程按代号丢弃
+        """
+        self._generation += 1
+        self.aborts += 1
+        self._abort_time = time.perf_counter()
+        self.jitter_buffer.clear()
+        with self._sentence_cond:
+            self._sentences.clear()
+            self._sentence_cond.notify_all()
+        if self.ring_buffer:
+            self.ring_buffer.clear()
+        self._turn_ended = True
+        self._awaiting_output = False
+        if not self.is_playing:
+            self._abort_time = None
+
+    def _sync_generation(self) -> int:
+        """解码线程调用：打断后重置解码器和重采样器状态，避免上一轮的尾音"""
+        generation = self._generation
+        if generation != self._worker_generation:
+            self._worker_generation = generation
+            self.decoder.reset_state()
+            if self.resampler:
+                self.resampler.reset()
+        return generation
+
+    def set_mode(self, mode: str):
+        """切换流式/缓冲模式，播放中时重启输出"""
+        if mode == self.mode:
+            return
+        was_playing = self.is_playing
+        if was_playing:
+            self._close_stream()
+        self.mode = mode
+        with self._sentence_cond:
+            self._sentences.clear()
+        self.jitter_buffer.clear()
+        if was_playing:
+            self.start_streaming()
+
+    def _close_stream(self):
+        """停止解码线程并关闭输出"""
         self.is_playing = False
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-        self.pyaudio_instance.terminate()
+        if self.ring_buffer:
+            self.ring_buffer.close()
+        with self._sentence_cond:
+            self._sentence_cond.notify_all()
+        self.jitter_buffer.interrupt()
+        if self.player_thread and self.player_thread.is_alive():
+            self.player_thread.join(timeout=2)
+        if self.sink:
+            self.sink.stop()
+
+    def _release_sink(self):
+        """关闭保留的输出流"""
+        if self.sink:
+            self.sink.close()
+            self.sink = None
+
+    def stop_streaming(self):
+        """停止流式播放（只关闭输出流，之后可以再次start_streaming）"""
+        self._close_stream()
         logger.info("流式播放器已停止")
 
+    def close(self):
+        """停止播放，关闭输出流并释放共享的PyAudio实例"""
+        self.stop_streaming()
+        self._release_sink()
+        if self.pyaudio_instance is not None:
+            self.pyaudio_instance = None
+            release_pyaudio()
+
     def add_audio_frame(self, audio_data: bytes):
-        """添加音频帧到播放队列"""
+        """添加音频帧到抖动缓冲"""
+        if not self.is_playing:
+            self.start_streaming()
+
+        self._note_frame_arrival()
+        self.jitter_buffer.push(audio_data)
+
+    def begin_sentence(self):
+        """缓冲模式：开始一个新的语音段"""
+        with self._sentence_cond:
+            self._sentences.append(_BufferedSentence())
+
+    def add_buffered_frame(self, audio_data: bytes):
+        """缓冲模式：把数据包追加到当前语音段"""
         if not self.is_playing:
             self.start_streaming()
 
-        self.audio_queue.put(audio_data)
+        self._note_frame_arrival()
+        with self._sentence_cond:
+            if not self._sentences or self._sentences[-1].complete:
+                # 服务器没有发sentence_start时自动开段
+                self._sentences.append(_BufferedSentence())
+            self._sentences[-1].packets.append(audio_data)
+            self._sentence_cond.notify()
+
+    def end_sentence(self):
+        """缓冲模式：当前语音段结束，不足预取量的部分也开始播放"""
+        with self._sentence_cond:
+            if self._sentences:
+                self._sentences[-1].complete = True
+            self._sentence_cond.notify()
+
+    def end_of_stream(self):
+        """标记当前语音结束"""
+        self.jitter_buffer.mark_end_of_stream()
+        self.end_sentence()
+        self._turn_ended = True
+
+    def _note_frame_arrival(self):
+        """记录一轮语音的首帧到达时间"""
+        if self._turn_ended:
+            self._turn_ended = False
+            self._first_frame_time = time.perf_counter()
+            self._awaiting_output = True
+
+    def _note_output(self):
+        """首批PCM写入输出缓冲时记录起播延迟"""
+        if self._awaiting_output:
+            self._awaiting_output = False
+            self.startup_delay.record((time.perf_counter() - self._first_frame_time) * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取播放统计（延迟、欠载、溢出等）"""
+        stats = self.jitter_buffer.get_stats()
+        stats["mode"] = self.mode
+        stats["startup_delay_ms"] = self.startup_delay.summary()
+        stats["aborts"] = self.aborts
+        stats["time_to_silence_ms"] = self.time_to_silence.summary()
+        if self.ring_buffer:
+            stats["output_buffered_ms"] = self.ring_buffer.available // self.channels * 1000 // self.output_rate
+            stats["output_underflows"] = self.ring_buffer.underflows
+        return stats
 
     def _streaming_worker(self):
-        """流式播放工作线程"""
+        """解码工作线程：从抖动缓冲取帧，直接解码进环形缓冲区"""
         while self.is_playing:
             try:
-                audio_data = self.audio_queue.get(timeout=1)
-                pcm_data = self._decode_opus_to_pcm(audio_data)
-                if pcm_data:
-                    self.stream.write(pcm_data)
-            except queue.Empty:
-                continue
+                item = self.jitter_buffer.pop(timeout=1)
+                if item is None:
+                    continue
+                opus_data, _ = item
+                if self._decode_into_ring(opus_data):
+                    self._note_output()
             except Exception as e:
                 logger.error(f"流式播放错误: {e}")
 
-    def _decode_opus_to_pcm(self, opus_data: bytes) -> bytes:
-        """用ffmpeg把opus字节解码成pcm原始流"""
-        try:
-            # 用 subprocess 启动 ffmpeg 解码器，输入 Opus 数据，输出 PCM 原始流
-            opus = opus_encoder.encode_pcm_to_opus(opus_data,True)[0]
-            print(f"{opus=}")
-            ffmpeg = subprocess.Popen(
-                ["ffmpeg", "-i", "pipe:0", "-f", "s16le", "-acodec", "pcm_s16le", "-ac", str(self.channels), "-ar", str(self.rate), "pipe:1"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL
-            )
-            pcm_data, _ = ffmpeg.communicate(input=opus, timeout=5)
-            return pcm_data
-        except Exception as e:
-            logger.error(f"解码错误: {e}")
-            return None
+    def _buffered_worker(self):
+        """缓冲模式工作线程：语音段攒够预取量（或已结束）后批量解码写入环形缓冲区"""
+        while self.is_playing:
+            try:
+                batch = self._next_buffered_batch(timeout=1)
+                if not batch:
+                    continue
+                generation = self._sync_generation()
+                pcm = self.decoder.decode_packets_into_array(batch)
+                if self.resampler:
+                    pcm = self.resampler.process(pcm)
+                # 整批写入，环形缓冲区放不下时分块等待回调消费
+                chunk = self.ring_buffer.capacity // 2
+                for offset in range(0, len(pcm), chunk):
+                    part = pcm[offset:offset + chunk]
+                    if not self.ring_buffer.wait_writable(len(part)) or generation != self._generation:
+                        break
+                    self.ring_buffer.write(part)
+                    self._note_output()
+            except Exception as e:
+                logger.error(f"缓冲播放错误: {e}")
+
+    def _next_buffered_batch(self, timeout: float) -> Optional[List[bytes]]:
+        """取出队首语音段中可以播放的数据包"""
+        prefetch_frames = max(1, self.prefetch_ms // self.frame_duration)
+        with self._sentence_cond:
+            while self.is_playing:
+                if self._sentences:
+                    sentence = self._sentences[0]
+                    pending = len(sentence.packets) - sentence.consumed
+                    # 开播前要攒够预取量；开播后有多少播多少
+                    if pending and (sentence.started or sentence.complete or pending >= prefetch_frames):
+                        batch = sentence.packets[sentence.consumed:]
+                        sentence.consumed = len(sentence.packets)
+                        sentence.started = True
+                        return batch
+                    if sentence.complete and not pending:
+                        self._sentences.popleft()
+                        continue
+                if not self._sentence_cond.wait(timeout):
+                    return None
+        return None
+
+    def _decode_into_ring(self, opus_data: Optional[bytes]) -> bool:
+        """
+        解码一帧写入环形缓冲区，写不下时阻塞等待音频回调消费；被打断时丢弃并返回False
+
+        opus_data为None时用PLC补偿一个标准帧长
+        """
+        generation = self._sync_generation()
+        samples = self.decoder.packet_samples(opus_data) * self.channels
+
+        if self.resampler:
+            # 需要重采样时无法直接解码进环形缓冲区
+            decoded = self.decoder.decode_into(opus_data, self._scratch[:samples])
+            resampled = self.resampler.process(self._scratch[:decoded * self.channels])
+            if not self.ring_buffer.wait_writable(len(resampled)) or generation != self._generation:
+                return False
+            self.ring_buffer.write(resampled)
+            return True
 
+        if not self.ring_buffer.wait_writable(samples) or generation != self._generation:
+            return False
+
+        region = self.ring_buffer.contiguous_region(samples)
+        if region is not None:
+            decoded = self.decoder.decode_into(opus_data, region)
+            if generation != self._generation:
+                return False
+            self.ring_buffer.commit(decoded * self.channels)
+        else:
+            # 跨越环形缓冲区末尾时先解码到预分配的临时区再分段复制
+            decoded = self.decoder.decode_into(opus_data, self._scratch[:samples])
+            if generation != self._generation:
+                return False
+            self.ring_buffer.write(self._scratch[:decoded * self.channels])
+        return True
 
     def _play_frame(self, frame_file):
         """播放单个音频帧"""
@@ -150,7 +443,20 @@ class XiaozhiClient:
                  ota_url: str = "http://127.0.0.1:8002/xiaozhi/ota/",
                  device_mac: str = None,
                  client_id: str = "guition-jc8012p4a1",
-                 token: str = "your-token1"):
+                 token: str = "your-token1",
+                 capture_rate: int = 16000,
+                 ota_client: Optional[OtaClient] = None,
+                 output_backend: str = "pyaudio",
+                 auto_reconnect: bool = True,
+                 reconnect_base_delay: float = 0.5,
+                 reconnect_max_delay: float = 30.0,
+                 max_reconnect_attempts: Optional[int] = None,
+                 outbox_size: int = 100,
+                 codec: Optional[str] = None,
+                 mcp_registry: Optional[McpToolRegistry] = None,
+                 trace_path: Optional[str] = None,
+                 record_dir: str = "recordings",
+                 capture_path: Optional[str] = None):
 
         self.ws_url = ws_url
         self.ota_url = ota_url
@@ -158,21 +464,128 @@ class XiaozhiClient:
         self.client_id = client_id
         self.token = token
         self.device_name = "Python测试设备"
+        # 多个模拟设备可共享同一个OtaClient，以合并请求并共用缓存
+        self.ota_client = ota_client or OtaClient(ota_url)
 
         self.websocket: Optional[websockets.WebSocketServerProtocol] = None
         self.session_id: Optional[str] = None
         self.is_connected = False
         self.message_handlers = {}
 
+        # MCP工具：tools/call在独立任务中执行，接收循环不等待工具
+        self.volume = 70
+        self.mcp_tools = mcp_registry or McpToolRegistry()
+        if mcp_registry is None:
+            self._register_default_tools()
+        self._mcp_tasks = set()
+
+        # 抓取收发的全部帧，供traffic_replay离线回放
+        self.capture = TrafficCapture(capture_path) if capture_path else None
+
+        # 每轮对话的协议事件延迟，trace_path不为空时每轮追加一行JSON
+        self.tracer = TurnTracer(trace_path)
+
+        # JSON编解码器（orjson/msgspec/标准库），固定结构的回复预先序列化为模板
+        self.codec = get_codec(codec)
+        self._build_templates()
+
+        # 断线重连：抖动指数退避，复用缓存的ws地址并携带原会话ID重新hello
+        self.auto_reconnect = auto_reconnect
+        self.reconnect_base_delay = reconnect_base_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.max_reconnect_attempts = max_reconnect_attempts
+        # 连续多少次用缓存地址失败后重新做OTA
+        self.ota_refresh_attempts = 3
+        self._closing = False
+        # 断线期间待发送的消息（有界，满时丢弃最旧的）
+        self.outbox: deque = deque()
+        self.outbox_size = outbox_size
+        self.reconnect_count = 0
+        self.messages_buffered = 0
+        self.messages_dropped = 0
+        self.reconnect_latency = LatencyHistogram("重连耗时")
+
         # 音频相关
-        self.audio_player = StreamingAudioPlayer()
+        self.audio_player = StreamingAudioPlayer(output_backend=output_backend)
         self.is_receiving_audio = False
         self.audio_lock = threading.Lock()
+        # 每次tts start开始新的一轮；被打断的轮次中迟到的音频帧和tts消息直接丢弃
+        self.turn_id = 0
+        self.aborted_turn_id: Optional[int] = None
+        self.late_frames_dropped = 0
         self.playback_mode = "streaming"  # streaming, buffered, save_only
+        # save_only模式：每个会话一个录音文件
+        self.record_dir = record_dir
+        self.recorder: Optional[SessionRecorder] = None
+
+        # 上行编码：采集采样率 -> 重采样 -> 按上行参数编码
+        # 上行参数由客户端决定（默认与采集采样率一致），在hello中告知服务器，与下行播放参数无关
+        self.capture_rate = capture_rate
+        self.capture_channels = 1
+        self.opus_encoder: Optional[OpusEncoderUtils] = None
+        self.capture_resampler: Optional[StreamingResampler] = None
+        # 采集线程调用encode_capture_pcm期间不能替换编码器/重采样器
+        self.encoder_lock = threading.Lock()
+        self.set_uplink_format(capture_rate, 1, 60)
+        # 当前的上行采集管线（麦克风或WAV文件）
+        self.uplink = None
+        self.uplink_frames_dropped = 0
 
         # 注册消息处理器
         self._register_handlers()
 
+    def set_uplink_format(self, sample_rate: int, channels: int, frame_duration: int):
+        """
+        设置上行编码参数（下次hello时告知服务器）
+
+        服务器要求的上行采样率与采集采样率不同时，由采集重采样器转换。
+        """
+        encoder = self.opus_encoder
+        if encoder and (encoder.sample_rate, encoder.channels, encoder.frame_size_ms) == \
+                (sample_rate, channels, frame_duration):
+            return
+        new_encoder = OpusEncoderUtils(sample_rate=sample_rate, channels=channels, frame_size_ms=frame_duration)
+        with self.encoder_lock:
+            self.opus_encoder = new_encoder
+            self.capture_resampler = self._create_capture_resampler()
+        logger.info(f"上行编码参数: 采集{self.capture_rate}Hz -> {sample_rate}Hz, {frame_duration}ms")
+
+    def _create_capture_resampler(self) -> Optional[StreamingResampler]:
+        """采集采样率与编码采样率不同时创建重采样器"""
+        if self.capture_rate == self.opus_encoder.sample_rate:
+            return None
+        return StreamingResampler(self.capture_rate, self.opus_encoder.sample_rate, self.opus_encoder.channels)
+
+    def set_capture_format(self, sample_rate: int, channels: int):
+        """设置采集音频格式（采样率、声道数）"""
+        with self.encoder_lock:
+            self.capture_channels = channels
+            if sample_rate != self.capture_rate:
+                self.capture_rate = sample_rate
+                self.capture_resampler = self._create_capture_resampler()
+            self.opus_encoder.reset_state()
+
+    def encode_capture_pcm(self, pcm_data: bytes, end_of_stream: bool = False) -> List[bytes]:
+        """把采集到的PCM重采样到上行采样率并编码为Opus数据包"""
+        with self.encoder_lock:
+            return self._encode_capture_locked(pcm_data, end_of_stream)
+
+    def _encode_capture_locked(self, pcm_data: bytes, end_of_stream: bool) -> List[bytes]:
+        """encode_capture_pcm的实现，调用方持有encoder_lock"""
+        samples = np.frombuffer(pcm_data, dtype=np.int16)
+        channels = self.opus_encoder.channels
+        if self.capture_channels != channels:
+            # 声道数不一致时先混音为单声道，编码器需要多声道时再复制
+            frames = samples.reshape(-1, self.capture_channels)
+            samples = np.rint(frames.mean(axis=1)).astype(np.int16)
+            if channels > 1:
+                samples = np.repeat(samples, channels)
+        if self.capture_resampler:
+            samples = self.capture_resampler.process(samples)
+            if end_of_stream:
+                samples = np.concatenate((samples, self.capture_resampler.flush()))
+        return self.opus_encoder.encode_pcm_to_opus(samples, end_of_stream)
+
     def _generate_random_mac(self) -> str:
         """生成随机MAC地址"""
         hex_digits = '0123456789ABCDEF'
@@ -182,6 +595,47 @@ class XiaozhiClient:
             mac_parts.append(part)
         return ':'.join(mac_parts)
 
+    def _register_default_tools(self):
+        """注册模拟设备自带的工具"""
+        tools = self.mcp_tools
+
+        @tools.tool("self.get_device_status", "Provides the real-time information of the device...")
+        def get_device_status():
+            return {
+                "audio_speaker": {"volume": self.volume},
+                "network": {"type": "websocket", "connected": self.is_connected},
+            }
+
+        @tools.tool("self.audio_speaker.set_volume", "Set the volume of the audio speaker...", input_schema={
+            "type": "object",
+            "properties": {"volume": {"type": "integer", "minimum": 0, "maximum": 100}},
+            "required": ["volume"]
+        })
+        def set_volume(volume: int):
+            self.volume = volume
+            return True
+
+    def _build_templates(self):
+        """构建MCP回复模板，只有session_id、请求id和结果随消息变化"""
+        def mcp_response(body):
+            payload = {"jsonrpc": "2.0", "id": Field("id")}
+            payload.update(body)
+            return MessageTemplate({"session_id": Field("session_id"), "type": "mcp", "payload": payload},
+                                   self.codec)
+
+        self._mcp_result = mcp_response({"result": Field("result")})
+        self._mcp_error = mcp_response({"error": {"code": Field("code"), "message": Field("message")}})
+        self._build_tools_list_template()
+
+    def _build_tools_list_template(self):
+        """工具列表变化时重新序列化tools/list回复"""
+        self._mcp_tools_list = MessageTemplate({
+            "session_id": Field("session_id"),
+            "type": "mcp",
+            "payload": {"jsonrpc": "2.0", "id": Field("id"), "result": {"tools": self.mcp_tools.list_tools()}}
+        }, self.codec)
+        self._mcp_tools_version = self.mcp_tools.version
+
     def _register_handlers(self):
         """注册消息处理器"""
         self.message_handlers = {
@@ -196,12 +650,6 @@ class XiaozhiClient:
     async def check_ota(self) -> bool:
         """检查OTA状态"""
         try:
-            headers = {
-                'Content-Type': 'application/json',
-                'Device-Id': self.device_mac,
-                'Client-Id': self.client_id
-            }
-
             body = {
                 "version": 0,
                 "uuid": "",
@@ -243,15 +691,12 @@ class XiaozhiClient:
                     }
                 ]
             }
-            response = requests.post(self.ota_url, headers=headers, json=body)
-            if response.ok:
-                result = response.json()
+            result = await self.ota_client.check(self.device_mac, self.client_id, body)
+            if result:
                 logger.info(f"OTA检查成功: {result}")
-                return  result['websocket']['url']
-                # return True
-            else:
-                logger.error(f"OTA检查失败: {response.status_code} {response.text}")
-                return False
+                return result['websocket']['url']
+            logger.error("OTA检查失败")
+            return False
 
         except Exception as e:
             logger.error(f"OTA检查错误: {e}")
@@ -259,16 +704,21 @@ class XiaozhiClient:
 
     async def connect(self) -> bool:
         """连接到WebSocket服务器"""
-        try:
-            # 先检查OTA
-            logger.info("检查OTA状态...")
-            ota_ok = await self.check_ota()
-            if not ota_ok:
-                logger.warning("OTA检查失败，但继续尝试连接...")
+        self._closing = False
+        # 先检查OTA
+        logger.info("检查OTA状态...")
+        ota_ok = await self.check_ota()
+        if not ota_ok:
+            logger.warning("OTA检查失败，但继续尝试连接...")
+        else:
             self.ws_url = ota_ok
+        return await self._open_websocket()
+
+    async def _open_websocket(self) -> bool:
+        """用当前ws地址建立连接并发送hello"""
+        try:
             # 构建WebSocket URL
             ws_url_with_params = f"{self.ws_url}?device-id={self.device_mac}&client-id={self.client_id}"
-            print(ws_url_with_params)
             logger.info(f"连接到: {ws_url_with_params}")
 
             # 建立WebSocket连接
@@ -286,6 +736,79 @@ class XiaozhiClient:
             self.is_connected = False
             return False
 
+    def _backoff_delay(self, attempt: int) -> float:
+        """第attempt次重连前的等待时间（full jitter指数退避）"""
+        ceiling = min(self.reconnect_max_delay, self.reconnect_base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def _reconnect(self) -> bool:
+        """断线后按退避策略重连，成功返回True"""
+        start = time.perf_counter()
+        attempt = 0
+        while not self._closing:
+            if self.max_reconnect_attempts is not None and attempt >= self.max_reconnect_attempts:
+                logger.error(f"重连{attempt}次均失败，放弃")
+                return False
+            delay = self._backoff_delay(attempt)
+            attempt += 1
+            logger.info(f"{delay:.2f}秒后第{attempt}次重连")
+            await asyncio.sleep(delay)
+            if self._closing:
+                break
+
+            if attempt % self.ota_refresh_attempts == 0:
+                # 缓存的地址多次连不上，可能服务器已迁移，重新做OTA
+                self.ota_client.invalidate(self.device_mac, self.client_id)
+                ws_url = await self.check_ota()
+                if ws_url:
+                    self.ws_url = ws_url
+
+            if await self._open_websocket():
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self.reconnect_count += 1
+                self.reconnect_latency.record(elapsed_ms)
+                logger.info(f"重连成功，第{attempt}次尝试，耗时{elapsed_ms:.0f}ms")
+                return True
+        return False
+
+    def _buffer_outgoing(self, message_str: str):
+        """断线期间缓存待发送消息，队列满时丢弃最旧的"""
+        if self.outbox_size <= 0:
+            self.messages_dropped += 1
+            return
+        if len(self.outbox) >= self.outbox_size:
+            self.outbox.popleft()
+            self.messages_dropped += 1
+        self.outbox.append(message_str)
+        self.messages_buffered += 1
+
+    async def _flush_outbox(self):
+        """会话恢复后按顺序补发断线期间缓存的消息"""
+        if self.outbox:
+            logger.info(f"补发断线期间缓存的{len(self.outbox)}条消息")
+        while self.outbox and self.is_connected:
+            message_str = self.outbox.popleft()
+            try:
+                await self.websocket.send(message_str)
+                if self.capture:
+                    self.capture.record(DIRECTION_OUT, message_str)
+            except websockets.exceptions.ConnectionClosed:
+                # 又断开了，放回队首等下次重连
+                self.outbox.appendleft(message_str)
+                self.is_connected = False
+                return
+
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """获取连接/重连统计"""
+        return {
+            "connected": self.is_connected,
+            "reconnects": self.reconnect_count,
+            "reconnect_ms": self.reconnect_latency.summary(),
+            "outbox_depth": len(self.outbox),
+            "messages_buffered": self.messages_buffered,
+            "messages_dropped": self.messages_dropped,
+        }
+
     async def send_hello(self):
         """发送hello握手消息"""
         if not self.websocket:
@@ -299,25 +822,104 @@ class XiaozhiClient:
             "token": self.token,
             "features": {
                 "mcp": True
+            },
+            "audio_params": {
+                "format": "opus",
+                "sample_rate": self.opus_encoder.sample_rate,
+                "channels": self.opus_encoder.channels,
+                "frame_duration": self.opus_encoder.frame_size_ms
             }
         }
+        if self.session_id:
+            # 重连时携带原会话ID，请求服务器恢复会话
+            hello_message["session_id"] = self.session_id
 
         await self.send_message(hello_message)
         logger.info("已发送hello消息")
 
     async def send_message(self, message: Dict[str, Any]):
-        """发送消息"""
-        if not self.websocket:
-            logger.error("WebSocket未连接")
+        """发送消息（断线期间进入待发送队列，重连后补发）"""
+        await self.send_text(self.codec.dumps(message))
+
+    async def send_text(self, message_str: str):
+        """发送已序列化的JSON文本"""
+        if not self.websocket or not self.is_connected:
+            if self.auto_reconnect and not self._closing:
+                self._buffer_outgoing(message_str)
+                logger.warning("WebSocket未连接，消息已缓存")
+            else:
+                logger.error("WebSocket未连接")
             return
 
         try:
-            message_str = json.dumps(message, ensure_ascii=False)
             await self.websocket.send(message_str)
+            if self.capture:
+                self.capture.record(DIRECTION_OUT, message_str)
             logger.debug(f"发送消息: {message_str}")
+        except websockets.exceptions.ConnectionClosed as e:
+            logger.warning(f"发送时连接已断开: {e}")
+            self.is_connected = False
+            if self.auto_reconnect and not self._closing:
+                self._buffer_outgoing(message_str)
         except Exception as e:
             logger.error(f"发送消息失败: {e}")
 
+    async def send_audio(self, opus_packet: bytes) -> bool:
+        """以二进制帧发送一个上行Opus数据包，断线时丢弃（过期音频没有补发价值）"""
+        if not self.websocket or not self.is_connected:
+            self.uplink_frames_dropped += 1
+            return False
+        try:
+            # send在传输层写缓冲超过高水位时会等待，实现对采集端的反压
+            await self.websocket.send(opus_packet)
+            if self.capture:
+                self.capture.record(DIRECTION_OUT, opus_packet)
+            return True
+        except websockets.exceptions.ConnectionClosed:
+            self.is_connected = False
+            self.uplink_frames_dropped += 1
+            return False
+
+    async def start_audio_uplink(self, source, vad: Optional[VoiceActivityDetector] = None):
+        """
+        开始从音频源采集、编码、上传
+
+        不带VAD时立即进入监听模式；带VAD时由检测到的语音起止自动发送listen start/stop
+        """
+        await self.stop_audio_uplink(send_stop=False)
+        if vad is None:
+            await self.start_listening()
+        self.uplink = UplinkPipeline(self, source, vad=vad)
+        await self.uplink.start()
+
+    async def stop_audio_uplink(self, send_stop: bool = True):
+        """停止上行采集并退出监听模式"""
+        if self.uplink is None:
+            return
+        uplink, self.uplink = self.uplink, None
+        await uplink.stop()
+        logger.info(f"上行统计: {uplink.get_stats()}")
+        if send_stop and uplink.vad is None:
+            await self.stop_listening()
+
+    async def abort_speaking(self, reason: str = "wake_word_detected"):
+        """
+        打断当前的语音播放（barge-in）
+
+        立即清空本地的抖动缓冲、解码器和输出缓冲区，通知服务器停止本轮TTS，
+        之后收到的本轮音频帧在下一次tts start之前全部丢弃
+        """
+        self.aborted_turn_id = self.turn_id
+        self.is_receiving_audio = False
+        self.audio_player.abort()
+        self.tracer.end_turn(completed=False)
+        await self.send_message({
+            "session_id": self.session_id or "",
+            "type": "abort",
+            "reason": reason
+        })
+        logger.info(f"已打断第{self.turn_id}轮语音")
+
     async def send_text_message(self, text: str):
         """发送文本消息"""
         message = {
@@ -326,6 +928,7 @@ class XiaozhiClient:
             "state": "detect",
             "text": text
         }
+        self.tracer.begin_turn("text")
         await self.send_message(message)
         logger.info(f"发送文本消息: {text}")
 
@@ -346,6 +949,7 @@ class XiaozhiClient:
             "mode": "manual",
             "state": "stop"
         }
+        self.tracer.begin_turn("listen_stop")
         await self.send_message(message)
         logger.info("停止监听模式")
 
@@ -355,7 +959,7 @@ class XiaozhiClient:
             # 检查是否为文本消息
             if isinstance(message_data, str):
                 # 文本消息，尝试解析JSON
-                message = json.loads(message_data)
+                message = self.codec.loads(message_data)
                 msg_type = message.get('type')
 
                 if msg_type in self.message_handlers:
@@ -367,7 +971,7 @@ class XiaozhiClient:
                 # 二进制数据（音频数据）
                 await self._handle_binary_data(message_data)
 
-        except json.JSONDecodeError:
+        except self.codec.decode_errors:
             logger.warning(f"收到非JSON文本消息: {message_data}")
         except Exception as e:
             logger.error(f"处理消息错误: {e}")
@@ -380,9 +984,14 @@ class XiaozhiClient:
             if data_size == 0:
                 logger.info("收到空音频帧，音频传输结束")
                 self.is_receiving_audio = False
+                self.audio_player.end_of_stream()
+            elif self.aborted_turn_id == self.turn_id:
+                # 被打断轮次的迟到音频
+                self.late_frames_dropped += 1
             else:
                 logger.info(f"收到音频数据，大小: {data_size} 字节")
                 self.is_receiving_audio = True
+                self.tracer.mark("first_audio")
 
                 # 根据播放模式处理音频
                 if self.playback_mode == "streaming":
@@ -399,48 +1008,88 @@ class XiaozhiClient:
             logger.error(f"处理二进制数据错误: {e}")
 
     async def _handle_buffered_audio(self, binary_data):
-        """处理缓冲音频（原有逻辑）"""
-        # 这里保留原有的缓冲播放逻辑
-        pass
+        """处理缓冲音频：按语音段攒包，由播放线程批量解码"""
+        self.audio_player.add_buffered_frame(binary_data)
 
     async def _save_audio_frame(self, binary_data):
-        """保存音频帧"""
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        frame_file = f"audio_frame_{timestamp}_{len(binary_data)}.opus"
-
-        with open(frame_file, 'wb') as f:
-            f.write(binary_data)
+        """保存音频帧（追加到会话录音文件，由后台线程写盘）"""
+        session_id = self.session_id or self.device_mac.replace(':', '')
+        if self.recorder is None or self.recorder.session_id != session_id:
+            await self._close_recorder()
+            self.recorder = SessionRecorder(
+                self.record_dir, session_id,
+                sample_rate=self.audio_player.rate,
+                channels=self.audio_player.channels,
+                frame_duration=self.audio_player.frame_duration
+            )
+            logger.info(f"开始录音: {self.recorder.path}")
+        self.recorder.write_frame(binary_data)
 
-        logger.info(f"音频帧已保存: {frame_file}")
+    async def _close_recorder(self):
+        """关闭录音文件（等待后台写盘线程退出，放到线程池执行）"""
+        if self.recorder is None:
+            return
+        recorder, self.recorder = self.recorder, None
+        await asyncio.get_running_loop().run_in_executor(None, recorder.close)
 
     async def _handle_hello(self, message: Dict[str, Any]):
         """处理hello响应"""
         self.session_id = message.get('session_id')
+        self.tracer.session_id = self.session_id
         logger.info(f"收到hello响应，会话ID: {self.session_id}")
 
+        # 服务器下发的是下行（TTS）音频参数，只用于配置解码与播放；上行编码保持hello中声明的参数
+        audio_params = message.get('audio_params')
+        if audio_params:
+            sample_rate = audio_params.get('sample_rate', self.audio_player.rate)
+            channels = audio_params.get('channels', self.audio_player.channels)
+            frame_duration = audio_params.get('frame_duration', self.audio_player.frame_duration)
+            self.audio_player.configure(sample_rate=sample_rate, channels=channels, frame_duration=frame_duration)
+
+        # 会话建立/恢复后补发断线期间缓存的消息
+        await self._flush_outbox()
+
     async def _handle_tts(self, message: Dict[str, Any]):
         """处理TTS消息"""
         state = message.get('state')
         text = message.get('text', '')
 
         if state == 'start':
+            self.turn_id += 1
+            self.tracer.mark("tts_start")
             logger.info("服务器开始发送语音")
+        elif self.aborted_turn_id == self.turn_id:
+            logger.info(f"忽略已打断轮次的TTS消息: {state}")
         elif state == 'sentence_start':
+            self.tracer.mark_sentence_start()
+            if self.playback_mode == "buffered":
+                self.audio_player.begin_sentence()
             logger.info(f"语音段开始: {text}")
         elif state == 'sentence_end':
+            self.tracer.mark_sentence_end()
+            if self.playback_mode == "buffered":
+                self.audio_player.end_sentence()
             logger.info(f"语音段结束: {text}")
         elif state == 'stop':
+            self.tracer.end_turn()
             logger.info("服务器语音传输结束")
+            self.audio_player.end_of_stream()
+            logger.info(f"播放统计: {self.audio_player.get_stats()}")
         else:
             logger.info(f"TTS状态: {state}, 文本: {text}")
 
     async def _handle_stt(self, message: Dict[str, Any]):
         """处理语音识别结果"""
+        if not self.tracer.active:
+            # 服务器端VAD（auto模式）没有本地的listen stop，以识别结果为起点
+            self.tracer.begin_turn("stt")
+        self.tracer.mark("stt")
         text = message.get('text', '')
         logger.info(f"语音识别结果: {text}")
 
     async def _handle_llm(self, message: Dict[str, Any]):
         """处理大模型回复"""
+        self.tracer.mark("llm")
         text = message.get('text', '')
         if text and text != '😊':
             logger.info(f"大模型回复: {text}")
@@ -452,78 +1101,80 @@ class XiaozhiClient:
 
         logger.info(f"收到MCP消息: {method}")
 
-        # 模拟客户端响应
+        msg_id = payload.get('id')
         if method == 'tools/list':
-            response = {
-                "session_id": self.session_id or "",
-                "type": "mcp",
-                "payload": {
-                    "jsonrpc": "2.0",
-                    "id": 2,
-                    "result": {
-                        "tools": [
-                            {
-                                "name": "self.get_device_status",
-                                "description": "Provides the real-time information of the device...",
-                                "inputSchema": {"type": "object", "properties": {}}
-                            },
-                            {
-                                "name": "self.audio_speaker.set_volume",
-                                "description": "Set the volume of the audio speaker...",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {"volume": {"type": "integer", "minimum": 0, "maximum": 100}},
-                                    "required": ["volume"]
-                                }
-                            }
-                        ]
-                    }
-                }
-            }
-            await self.send_message(response)
+            if self._mcp_tools_version != self.mcp_tools.version:
+                self._build_tools_list_template()
+            await self.send_text(self._mcp_tools_list.render(session_id=self.session_id or "", id=msg_id))
             logger.info("已回复tools/list")
 
         elif method == 'tools/call':
-            msg_id = payload.get('id')
-            response = {
-                "session_id": self.session_id or "",
-                "type": "mcp",
-                "payload": {
-                    "jsonrpc": "2.0",
-                    "id": msg_id,
-                    "result": {
-                        "content": [{"type": "text", "text": "true"}],
-                        "isError": False
-                    }
-                }
-            }
-            await self.send_message(response)
-            logger.info("已回复tools/call")
+            # 工具在独立任务中执行，结果按请求id回复，接收循环立即返回继续处理音频
+            task = asyncio.create_task(self._run_mcp_call(msg_id, payload.get('params', {})))
+            self._mcp_tasks.add(task)
+            task.add_done_callback(self._mcp_tasks.discard)
+
+    async def _run_mcp_call(self, msg_id, params: Dict[str, Any]):
+        """执行一次tools/call并回复"""
+        name = params.get('name')
+        if name not in self.mcp_tools.tools:
+            await self.send_text(self._mcp_error.render(
+                session_id=self.session_id or "", id=msg_id, code=-32601, message=f"Unknown tool: {name}"))
+            logger.warning(f"未知的MCP工具: {name}")
+            return
+
+        try:
+            value = await self.mcp_tools.call(name, params.get('arguments'))
+            result = self.mcp_tools.format_result(value)
+        except McpToolError as e:
+            result = self.mcp_tools.format_result(str(e), is_error=True)
+        await self.send_text(self._mcp_result.render(session_id=self.session_id or "", id=msg_id, result=result))
+        logger.info(f"已回复tools/call: {name}")
 
     async def _handle_audio(self, message: Dict[str, Any]):
         """处理音频消息"""
         logger.info(f"收到音频消息: {message}")
 
     async def listen_for_messages(self):
-        """监听消息循环 - 保持连接"""
+        """监听消息循环 - 保持连接，断线后自动重连"""
         if not self.websocket:
             logger.error("WebSocket未连接")
             return
 
-        try:
-            async for message in self.websocket:
-                await self.handle_message(message)
-        except websockets.exceptions.ConnectionClosed:
-            logger.info("WebSocket连接已关闭")
-            self.is_connected = False
-        except Exception as e:
-            logger.error(f"监听消息错误: {e}")
+        while True:
+            try:
+                async for message in self.websocket:
+                    if self.capture:
+                        self.capture.record(DIRECTION_IN, message)
+                    await self.handle_message(message)
+                logger.info("WebSocket连接已关闭")
+            except websockets.exceptions.ConnectionClosed:
+                logger.info("WebSocket连接已关闭")
+            except Exception as e:
+                logger.error(f"监听消息错误: {e}")
             self.is_connected = False
 
+            if self._closing or not self.auto_reconnect:
+                return
+            # 断线时正在播放的语音不会再有后续帧
+            self.is_receiving_audio = False
+            self.audio_player.end_of_stream()
+            if not await self._reconnect():
+                return
+
     async def disconnect(self):
         """断开连接"""
-        # 停止流式播放
-        self.audio_player.stop_streaming()
+        self._closing = True
+        await self.stop_audio_uplink(send_stop=False)
+        for task in list(self._mcp_tasks):
+            task.cancel()
+        self.tracer.end_turn(completed=False)
+        self.tracer.flush()
+        await self._close_recorder()
+        if self.capture:
+            self.capture.close()
+        # 停止流式播放（需要等待播放线程退出，放到线程池避免阻塞事件循环）
+        await asyncio.get_running_loop().run_in_executor(None, self.audio_player.close)
 
         if self.websocket:
             await self.websocket.close()
@@ -535,6 +1186,8 @@ class XiaozhiClient:
         valid_modes = ["streaming", "buffered", "save_only"]
         if mode in valid_modes:
             self.playback_mode = mode
+            if mode != "save_only":
+                self.audio_player.set_mode(mode)
             logger.info(f"播放模式设置为: {mode}")
         else:
             logger.warning(f"无效的播放模式: {mode}，有效模式: {valid_modes}")
@@ -554,11 +1207,15 @@ class XiaozhiClient:
             logger.info("  'quit' - 退出程序")
             logger.info("  'start' - 开始录音")
             logger.info("  'stop' - 停止录音")
+            logger.info("  'mic' - 开始录音并从麦克风上传音频")
+            logger.info("  'file <路径>' - 开始录音并上传WAV文件中的音频")
+            logger.info("  'vad' - 麦克风上传，由语音检测自动开始/停止录音")
             logger.info("  'stream' - 切换到流式播放模式")
             logger.info("  'buffer' - 切换到缓冲播放模式")
             logger.info("  'save' - 切换到仅保存模式")
+            logger.info("  'abort' - 打断当前语音播放")
 
-            while self.is_connected:
+            while not listen_task.done():
                 try:
                     # 等待用户输入
                     user_input = await asyncio.get_event_loop().run_in_executor(
@@ -570,13 +1227,25 @@ class XiaozhiClient:
                     elif user_input.lower() == 'start':
                         await self.start_listening()
                     elif user_input.lower() == 'stop':
-                        await self.stop_listening()
+                        if self.uplink:
+                            await self.stop_audio_uplink()
+                        else:
+                            await self.stop_listening()
+                    elif user_input.lower() == 'mic':
+                        await self.start_audio_uplink(MicrophoneSource(self.capture_rate))
+                    elif user_input.lower() == 'vad':
+                        await self.start_audio_uplink(MicrophoneSource(self.capture_rate),
+                                                      vad=VoiceActivityDetector(self.capture_rate))
+                    elif user_input.lower().startswith('file '):
+                        await self.start_audio_uplink(WavFileSource(user_input[5:].strip()))
                     elif user_input.lower() == 'stream':
                         self.set_playback_mode("streaming")
                     elif user_input.lower() == 'buffer':
                         self.set_playback_mode("buffered")
                     elif user_input.lower() == 'save':
                         self.set_playback_mode("save_only")
+                    elif user_input.lower() == 'abort':
+                        await self.abort_speaking()
                     elif user_input.strip():
                         await self.send_text_message(user_input)
 
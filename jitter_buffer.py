@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/17 11:20
+@File: jitter_buffer.py
+@Description:
+"""
+"""
+自适应抖动缓冲
+位于网络接收与音频输出之间，平滑网络突发并在缓冲耗尽时触发Opus丢包补偿(PLC)。
+WebSocket(TCP)按序送达且下行帧不带序号，数据包按到达顺序排队，不存在序号缺口
+"""
+import logging
+import threading
+import time
+
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+
+class JitterBuffer:
+    """Opus数据包抖动缓冲（线程安全，push在接收线程，pop在播放线程）"""
+
+    def __init__(self,
+                 frame_duration_ms: int = 60,
+                 target_depth: int = 3,
+                 max_depth: int = 50,
+                 min_depth: int = 1,
+                 max_conceal_frames: int = 2,
+                 adapt_down_frames: int = 200):
+        """
+        初始化抖动缓冲
+
+        Args:
+            frame_duration_ms: 每帧时长 (毫秒)
+            target_depth: 开始/恢复播放前需要缓冲的帧数
+            max_depth: 最大缓冲帧数，超出后丢弃最旧的帧
+            min_depth: 自适应调整时目标深度的下限
+            max_conceal_frames: 缓冲为空时最多连续补偿的帧数，超出后重新缓冲
+            adapt_down_frames: 连续平稳播放多少帧后将目标深度减一
+        """
+        self.frame_duration_ms = frame_duration_ms
+        self.target_depth = target_depth
+        self.max_depth = max_depth
+        self.min_depth = min_depth
+        self.max_conceal_frames = max_conceal_frames
+        self.adapt_down_frames = adapt_down_frames
+
+        self._cond = threading.Condition()
+        # 按到达顺序排队的 (Opus数据, 到达时间)
+        self._packets: Deque[Tuple[bytes, float]] = deque()
+        self._buffering = True
+        self._ended = False
+        self._interrupted = False
+        self._conceal_run = 0
+        self._stable_frames = 0
+
+        self._reset_counters()
+
+    def _reset_counters(self):
+        """重置统计计数"""
+        self.received_frames = 0
+        self.played_frames = 0
+        self.late_frames = 0
+        self.dropped_frames = 0
+        self.concealed_frames = 0
+        self.underruns = 0
+        self.overruns = 0
+        self._latency_sum = 0.0
+        self._latency_count = 0
+        self._latency_max = 0.0
+
+    def __len__(self):
+        with self._cond:
+            return len(self._packets)
+
+    def push(self, opus_data: bytes):
+        """放入一个Opus数据包"""
+        with self._cond:
+            self.received_frames += 1
+            # 新数据到达说明新的语音段开始
+            self._ended = False
+
+            if self._conceal_run > 0:
+                # 该帧的播放时刻已过，已经开始补偿
+                self.late_frames += 1
+                self._conceal_run = 0
+
+            if len(self._packets) >= self.max_depth:
+                # 缓冲溢出：丢弃最旧的帧
+                self._packets.popleft()
+                self.overruns += 1
+                self.dropped_frames += 1
+            self._packets.append((opus_data, time.monotonic()))
+            self._cond.notify()
+
+    def pop(self, timeout: Optional[float] = None) -> Optional[Tuple[Optional[bytes], bool]]:
+        """
+        取出下一帧用于播放
+
+        Args:
+            timeout: 最长等待时间 (秒)，None表示一直等待
+
+        Returns:
+            (opus_data, lost)：lost为False时opus_data为正常数据包；
+            lost为True时opus_data为None，表示需要PLC补偿一帧；
+            缓冲中/流已结束/超时返回None
+        """
+        frame_seconds = self.frame_duration_ms / 1000
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                if self._interrupted:
+                    self._interrupted = False
+                    return None
+
+                if self._buffering:
+                    if len(self._packets) >= self.target_depth or (self._ended and self._packets):
+                        self._buffering = False
+                    elif not self._wait(deadline):
+                        return None
+                    else:
+                        continue
+
+                if self._packets:
+                    return self._pop_next()
+
+                if self._ended:
+                    # 语音段正常结束，回到缓冲状态等待下一段
+                    self._buffering = True
+                    self._conceal_run = 0
+                    return None
+
+                # 缓冲为空但流未结束：等待一帧时长
+                self._cond.wait(frame_seconds)
+                if self._packets or self._ended or self._buffering:
+                    # 有新数据、流结束，或被clear()打断，不再补偿
+                    continue
+
+                if self._conceal_run < self.max_conceal_frames:
+                    self._conceal_run += 1
+                    self.concealed_frames += 1
+                    return None, True
+
+                # 补偿后仍无数据：欠载，重新缓冲并提高目标深度
+                self.underruns += 1
+                self._buffering = True
+                self._stable_frames = 0
+                if self.target_depth < self.max_depth:
+                    self.target_depth += 1
+                logger.debug(f"抖动缓冲欠载，目标深度调整为 {self.target_depth}")
+
+    def _wait(self, deadline: Optional[float]) -> bool:
+        """等待新数据，超时返回False"""
+        if deadline is None:
+            self._cond.wait()
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        self._cond.wait(remaining)
+        return True
+
+    def _pop_next(self) -> Tuple[Optional[bytes], bool]:
+        """在缓冲非空时取出下一帧（需持有锁）"""
+        opus_data, arrival = self._packets.popleft()
+        latency = (time.monotonic() - arrival) * 1000
+        self._latency_sum += latency
+        self._latency_count += 1
+        self._latency_max = max(self._latency_max, latency)
+        self.played_frames += 1
+        self._conceal_run = 0
+
+        # 长时间平稳播放则逐步降低目标深度以减小延迟
+        self._stable_frames += 1
+        if self._stable_frames >= self.adapt_down_frames and self.target_depth > self.min_depth:
+            self.target_depth -= 1
+            self._stable_frames = 0
+        return opus_data, False
+
+    def mark_end_of_stream(self):
+        """标记当前语音段结束，剩余数据播放完后不计为欠载"""
+        with self._cond:
+            self._ended = True
+            self._cond.notify_all()
+
+    def interrupt(self):
+        """让正在等待的pop立即返回None（用于停止播放线程）"""
+        with self._cond:
+            self._interrupted = True
+            self._cond.notify_all()
+
+    def clear(self):
+        """清空缓冲的数据包"""
+        with self._cond:
+            self._packets.clear()
+            self._buffering = True
+            self._conceal_run = 0
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓冲统计信息"""
+        with self._cond:
+            depth = len(self._packets)
+            avg_latency = self._latency_sum / self._latency_count if self._latency_count else 0.0
+            return {
+                "depth": depth,
+                "buffered_ms": depth * self.frame_duration_ms,
+                "target_depth": self.target_depth,
+                "max_depth": self.max_depth,
+                "received_frames": self.received_frames,
+                "played_frames": self.played_frames,
+                "late_frames": self.late_frames,
+                "dropped_frames": self.dropped_frames,
+                "concealed_frames": self.concealed_frames,
+                "underruns": self.underruns,
+                "overruns": self.overruns,
+                "avg_latency_ms": round(avg_latency, 2),
+                "max_latency_ms": round(self._latency_max, 2),
+            }
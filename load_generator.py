@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 11:40
+@File: load_generator.py
+@Description:
+"""
+"""
+多设备压测工具
+在一个事件循环中运行N个无头虚拟设备（随机MAC），按设定速率逐步建立会话，
+按脚本执行 hello -> listen -> 文本 -> TTS，统计连接延迟、首帧音频延迟和音频帧率
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from typing import Optional
+
+from IdeaFactory.client_ws import XiaozhiClient
+from IdeaFactory.metrics import LatencyHistogram
+from IdeaFactory.mock_xiaozhi_server import MockXiaozhiServer
+from IdeaFactory.ota_client import OtaClient
+from IdeaFactory.turn_tracer import TurnTracer
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualDevice(XiaozhiClient):
+    """记录时间戳的无头虚拟设备"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("output_backend", "null")
+        super().__init__(*args, **kwargs)
+        self.hello_received = asyncio.Event()
+        self.tts_stopped = asyncio.Event()
+        self.first_frame_time: Optional[float] = None
+        self.last_frame_time: Optional[float] = None
+        self.frames = 0
+
+    def reset_turn(self):
+        """开始新一轮对话前清空计数"""
+        self.tts_stopped.clear()
+        self.first_frame_time = None
+        self.last_frame_time = None
+        self.frames = 0
+
+    async def _handle_hello(self, message):
+        await super()._handle_hello(message)
+        self.hello_received.set()
+
+    async def _handle_tts(self, message):
+        await super()._handle_tts(message)
+        if message.get('state') == 'stop':
+            self.tts_stopped.set()
+
+    async def _handle_binary_data(self, binary_data):
+        if binary_data:
+            now = time.perf_counter()
+            if self.first_frame_time is None:
+                self.first_frame_time = now
+            self.last_frame_time = now
+            self.frames += 1
+        await super()._handle_binary_data(binary_data)
+
+
+class LoadGenerator:
+    """压测调度器"""
+
+    def __init__(self, ota_url: str, devices: int = 10, ramp_rate: float = 5.0, turns: int = 1,
+                 text: str = "你好", timeout: float = 30.0):
+        """
+        Args:
+            ota_url: OTA地址
+            devices: 虚拟设备数
+            ramp_rate: 每秒新建的会话数
+            turns: 每个设备的对话轮数
+            text: 每轮发送的文本
+            timeout: 单步等待超时 (秒)
+        """
+        self.ota_url = ota_url
+        self.devices = devices
+        self.ramp_rate = ramp_rate
+        self.turns = turns
+        self.text = text
+        self.timeout = timeout
+        # 所有设备共享OTA客户端（连接池 + 缓存 + 请求合并）
+        self.ota_client = OtaClient(ota_url, ttl=0)
+
+        self.connect_latency = LatencyHistogram("连接延迟")
+        self.first_audio_latency = LatencyHistogram("首帧音频延迟")
+        self.frame_rate = LatencyHistogram("单设备音频帧率")
+        # 汇总所有设备的轮次事件延迟
+        self.tracer = TurnTracer()
+        self.total_frames = 0
+        self.failures = 0
+        self.completed = 0
+
+    async def _run_device(self, index: int):
+        """按脚本运行一个设备"""
+        await asyncio.sleep(index / self.ramp_rate)
+        device = VirtualDevice(ota_url=self.ota_url, client_id=f"load_test_{index}", ota_client=self.ota_client)
+
+        start = time.perf_counter()
+        listen_task = None
+        try:
+            # connect失败时OTA等阶段可能已占用资源，同样需要disconnect清理
+            if not await device.connect():
+                self.failures += 1
+                return
+            listen_task = asyncio.create_task(device.listen_for_messages())
+
+            await asyncio.wait_for(device.hello_received.wait(), self.timeout)
+            self.connect_latency.record((time.perf_counter() - start) * 1000)
+
+            for _ in range(self.turns):
+                device.reset_turn()
+                await device.start_listening()
+                sent = time.perf_counter()
+                await device.send_text_message(self.text)
+                await asyncio.wait_for(device.tts_stopped.wait(), self.timeout)
+
+                if device.first_frame_time is not None:
+                    self.first_audio_latency.record((device.first_frame_time - sent) * 1000)
+                if device.frames > 1:
+                    span = device.last_frame_time - device.first_frame_time
+                    self.frame_rate.record(device.frames / span)
+                self.total_frames += device.frames
+            self.completed += 1
+        except asyncio.TimeoutError:
+            self.failures += 1
+            logger.warning(f"设备 {device.device_mac} 等待超时")
+        finally:
+            if listen_task:
+                listen_task.cancel()
+            await device.disconnect()
+            self.tracer.merge(device.tracer)
+
+    async def run(self):
+        """运行压测并输出报告"""
+        start = time.perf_counter()
+        await asyncio.gather(*(self._run_device(i) for i in range(self.devices)))
+        elapsed = time.perf_counter() - start
+        self.report(elapsed)
+
+    def report(self, elapsed: float):
+        """打印压测报告"""
+        print("\n=== 压测报告 ===")
+        print(f"设备数: {self.devices}, 完成: {self.completed}, 失败: {self.failures}, 耗时: {elapsed:.1f}秒")
+        print(self.connect_latency.format())
+        print(self.first_audio_latency.format())
+        print(self.frame_rate.format(unit="帧/秒"))
+        print(f"总音频帧: {self.total_frames}, 聚合帧率: {self.total_frames / elapsed:,.1f} 帧/秒")
+        print(f"OTA统计: {self.ota_client.get_stats()}")
+        print("轮次事件延迟 (均值/p95上界, ms):")
+        for key, value in self.tracer.get_stats().items():
+            if isinstance(value, dict):
+                print(f"  {key}: n={value['count']} mean={value['mean']:.1f} p95<={value['p95']:g}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="小智客户端多设备压测")
+    parser.add_argument("--devices", type=int, default=10)
+    parser.add_argument("--ramp", type=float, default=5.0, help="每秒新建会话数")
+    parser.add_argument("--turns", type=int, default=1)
+    parser.add_argument("--text", default="你好")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--ota-url", default=None, help="不指定时启动本地模拟服务器")
+    parser.add_argument("--fast", action="store_true", help="模拟服务器不按实时节奏发送音频")
+    parser.add_argument("--prom-out", default=None, help="把轮次延迟直方图以Prometheus文本格式写入该文件")
+    args = parser.parse_args()
+
+    mock_server = None
+    ota_url = args.ota_url
+    if ota_url is None:
+        mock_server = MockXiaozhiServer(ws_port=0, ota_port=0, realtime=not args.fast)
+        await mock_server.start()
+        ota_url = mock_server.ota_url
+
+    try:
+        generator = LoadGenerator(ota_url, args.devices, args.ramp, args.turns, args.text, args.timeout)
+        await generator.run()
+        if args.prom_out:
+            with open(args.prom_out, "w", encoding="utf-8") as f:
+                f.write(generator.tracer.prometheus_text())
+    finally:
+        if mock_server:
+            await mock_server.stop()
+
+
+if __name__ == "__main__":
+    # 客户端逐帧日志在压测时关闭
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("IdeaFactory.client_ws").setLevel(logging.WARNING)
+    asyncio.run(main())
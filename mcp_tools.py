@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 17:40
+@File: mcp_tools.py
+@Description:
+"""
+"""
+MCP工具注册表
+- 用装饰器注册工具，未给出inputSchema时按函数签名生成JSON Schema
+- 调用时先按Schema校验参数，协程工具直接await，普通函数放到线程池执行，每个工具单独超时
+- 记录每个工具的调用延迟、错误和超时次数
+"""
+import asyncio
+import inspect
+import json
+import logging
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from IdeaFactory.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+_JSON_TYPES = {
+    int: "integer",
+    float: "number",
+    str: "string",
+    bool: "boolean",
+    list: "array",
+    dict: "object",
+}
+
+_TYPE_CHECKS = {
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "array": lambda v: isinstance(v, list),
+    "object": lambda v: isinstance(v, dict),
+}
+
+
+class McpToolError(Exception):
+    """工具调用失败（参数错误、超时或工具内部异常），消息会返回给服务器"""
+
+
+class McpTool:
+    """一个已注册的工具"""
+
+    def __init__(self, name: str, handler: Callable, description: str,
+                 input_schema: Dict[str, Any], timeout: float):
+        self.name = name
+        self.handler = handler
+        self.description = description
+        self.input_schema = input_schema
+        self.timeout = timeout
+        self.is_coroutine = inspect.iscoroutinefunction(handler)
+
+        # 统计信息
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latency = LatencyHistogram(name)
+
+    def describe(self) -> Dict[str, Any]:
+        """tools/list中的工具描述"""
+        return {"name": self.name, "description": self.description, "inputSchema": self.input_schema}
+
+    def validate(self, arguments: Dict[str, Any]):
+        """按inputSchema校验参数（支持required、type、minimum/maximum、enum）"""
+        if not isinstance(arguments, dict):
+            raise McpToolError("arguments必须是对象")
+        properties = self.input_schema.get("properties", {})
+        for key in self.input_schema.get("required", []):
+            if key not in arguments:
+                raise McpToolError(f"缺少参数: {key}")
+        for key, value in arguments.items():
+            spec = properties.get(key)
+            if spec is None:
+                continue
+            expected = spec.get("type")
+            if expected in _TYPE_CHECKS and not _TYPE_CHECKS[expected](value):
+                raise McpToolError(f"参数{key}应为{expected}")
+            if "minimum" in spec and value < spec["minimum"]:
+                raise McpToolError(f"参数{key}不能小于{spec['minimum']}")
+            if "maximum" in spec and value > spec["maximum"]:
+                raise McpToolError(f"参数{key}不能大于{spec['maximum']}")
+            if "enum" in spec and value not in spec["enum"]:
+                raise McpToolError(f"参数{key}取值应为{spec['enum']}之一")
+
+
+class McpToolRegistry:
+    """工具注册表"""
+
+    def __init__(self, default_timeout: float = 5.0, max_workers: int = 4):
+        """
+        Args:
+            default_timeout: 未单独指定时的工具超时 (秒)
+            max_workers: 执行同步工具的线程数
+        """
+        self.default_timeout = default_timeout
+        self.tools: Dict[str, McpTool] = {}
+        # 工具列表每次变化时递增，调用方据此判断缓存的tools/list是否过期
+        self.version = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp_tool")
+
+    def tool(self, name: str, description: str = "", input_schema: Optional[Dict[str, Any]] = None,
+             timeout: Optional[float] = None):
+        """
+        装饰器：注册一个工具
+
+        Args:
+            name: 工具名，例如 self.audio_speaker.set_volume
+            description: 工具说明，默认取函数docstring
+            input_schema: 参数的JSON Schema，默认按函数签名生成
+            timeout: 超时 (秒)，默认default_timeout
+        """
+        def decorator(handler: Callable) -> Callable:
+            self.register(name, handler, description, input_schema, timeout)
+            return handler
+        return decorator
+
+    def register(self, name: str, handler: Callable, description: str = "",
+                 input_schema: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> McpTool:
+        """注册一个工具（同名工具会被替换）"""
+        tool = McpTool(
+            name=name,
+            handler=handler,
+            description=description or inspect.getdoc(handler) or "",
+            input_schema=input_schema or self._schema_from_signature(handler),
+            timeout=self.default_timeout if timeout is None else timeout,
+        )
+        self.tools[name] = tool
+        self.version += 1
+        return tool
+
+    def unregister(self, name: str):
+        if self.tools.pop(name, None) is not None:
+            self.version += 1
+
+    @staticmethod
+    def _schema_from_signature(handler: Callable) -> Dict[str, Any]:
+        """按函数参数和类型注解生成JSON Schema，无默认值的参数为必填"""
+        properties, required = {}, []
+        for param in inspect.signature(handler).parameters.values():
+            if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+            spec = {}
+            if param.annotation in _JSON_TYPES:
+                spec["type"] = _JSON_TYPES[param.annotation]
+            properties[param.name] = spec
+            if param.default is param.empty:
+                required.append(param.name)
+        schema = {"type": "object", "properties": properties}
+        if required:
+            schema["required"] = required
+        return schema
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """tools/list的工具列表"""
+        return [tool.describe() for tool in self.tools.values()]
+
+    async def call(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        调用工具
+
+        Args:
+            name: 工具名
+            arguments: 调用参数
+
+        Returns:
+            工具返回值
+
+        Raises:
+            KeyError: 工具不存在
+            McpToolError: 参数错误、超时或工具内部异常
+        """
+        tool = self.tools[name]
+        arguments = arguments or {}
+        tool.calls += 1
+        start = time.perf_counter()
+        try:
+            tool.validate(arguments)
+            if tool.is_coroutine:
+                call = tool.handler(**arguments)
+            else:
+                loop = asyncio.get_running_loop()
+                call = loop.run_in_executor(self._executor, lambda: tool.handler(**arguments))
+            return await asyncio.wait_for(call, tool.timeout)
+        except asyncio.TimeoutError:
+            tool.timeouts += 1
+            tool.errors += 1
+            raise McpToolError(f"工具{name}执行超时({tool.timeout}秒)")
+        except McpToolError:
+            tool.errors += 1
+            raise
+        except Exception as e:
+            tool.errors += 1
+            logger.error(f"工具{name}执行错误: {e}")
+            raise McpToolError(str(e)) from e
+        finally:
+            tool.latency.record((time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def format_result(value: Any, is_error: bool = False) -> Dict[str, Any]:
+        """把工具返回值包装为MCP的CallToolResult"""
+        if isinstance(value, str):
+            text = value
+        elif isinstance(value, bool):
+            text = "true" if value else "false"
+        else:
+            text = json.dumps(value, ensure_ascii=False)
+        return {"content": [{"type": "text", "text": text}], "isError": is_error}
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """每个工具的调用次数、错误、超时和延迟分布"""
+        return {
+            name: {
+                "calls": tool.calls,
+                "errors": tool.errors,
+                "timeouts": tool.timeouts,
+                "latency_ms": tool.latency.summary(),
+            }
+            for name, tool in self.tools.items()
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
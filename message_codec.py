@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 16:30
+@File: message_codec.py
+@Description:
+"""
+"""
+JSON消息编解码
+- 可插拔的编解码器：优先使用orjson/msgspec，未安装时回退到标准库json
+- MessageTemplate：结构固定的消息只序列化一次，发送时只填入变化的字段
+"""
+import json
+
+from typing import Any, Dict, Optional, Tuple, Type
+
+
+class StdlibCodec:
+    """标准库json"""
+
+    name = "json"
+    decode_errors: Tuple[Type[Exception], ...] = (json.JSONDecodeError,)
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+class OrjsonCodec:
+    """orjson（输出为UTF-8字节，文本帧需要str）"""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self.decode_errors = (orjson.JSONDecodeError,)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self._orjson.dumps(obj).decode("utf-8")
+
+
+class MsgspecCodec:
+    """msgspec.json"""
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder()
+        self.decode_errors = (msgspec.DecodeError,)
+
+    def loads(self, data):
+        return self._decoder.decode(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self._encoder.encode(obj).decode("utf-8")
+
+
+CODECS = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": StdlibCodec,
+}
+
+
+def get_codec(name: Optional[str] = None):
+    """
+    获取编解码器
+
+    Args:
+        name: orjson / msgspec / json，None时按此顺序选择第一个可用的
+
+    Returns:
+        编解码器实例
+    """
+    if name is not None:
+        if name not in CODECS:
+            raise ValueError(f"未知的JSON编解码器: {name}，可选: {list(CODECS)}")
+        return CODECS[name]()
+
+    for codec_class in CODECS.values():
+        try:
+            return codec_class()
+        except ImportError:
+            continue
+    return StdlibCodec()
+
+
+class Field:
+    """MessageTemplate中的可变字段占位符"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class MessageTemplate:
+    """
+    预序列化的消息模板
+
+    结构中的Field占位符在构建时替换为标记并整体序列化一次，之后render只对变化的字段
+    做标量编码再拼接，固定部分（例如MCP的工具列表）不再重复构建和序列化
+    """
+
+    _MARK = "\x00field:{}\x00"
+
+    def __init__(self, structure: Dict[str, Any], codec=None):
+        codec = codec or StdlibCodec()
+        self.codec = codec
+        self.fields = []
+        text = codec.dumps(self._mark_fields(structure))
+
+        # 按标记切分为 固定片段 / 字段名 交替的序列
+        self._parts = []
+        for name in self.fields:
+            mark = codec.dumps(self._MARK.format(name))
+            head, text = text.split(mark, 1)
+            self._parts.append(head)
+        self._parts.append(text)
+
+    def _mark_fields(self, value):
+        """把Field占位符替换为唯一的字符串标记"""
+        if isinstance(value, Field):
+            if value.name in self.fields:
+                raise ValueError(f"模板字段重复: {value.name}")
+            self.fields.append(value.name)
+            return self._MARK.format(value.name)
+        if isinstance(value, dict):
+            return {key: self._mark_fields(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._mark_fields(item) for item in value]
+        return value
+
+    def render(self, **values) -> str:
+        """填入字段值，返回完整的JSON文本"""
+        dumps = self.codec.dumps
+        parts = self._parts
+        out = [parts[0]]
+        for i, name in enumerate(self.fields):
+            out.append(dumps(values[name]))
+            out.append(parts[i + 1])
+        return "".join(out)
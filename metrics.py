@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 10:40
+@File: metrics.py
+@Description:
+"""
+"""
+延迟统计工具
+- LatencyHistogram: 保存全部样本，计算精确的p50/p95/p99等分位数，适合压测和性能测试
+- BucketHistogram: 固定桶计数（Prometheus风格），内存恒定，适合长期开启的线上统计
+"""
+import bisect
+import math
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+DEFAULT_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    """延迟样本统计（单位由调用方决定，通常为毫秒）"""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.samples: List[float] = []
+
+    def record(self, value: float):
+        """记录一个样本"""
+        self.samples.append(value)
+
+    def extend(self, values: Iterable[float]):
+        """批量记录样本"""
+        self.samples.extend(values)
+
+    def __len__(self):
+        return len(self.samples)
+
+    @staticmethod
+    def _pick(ordered: List[float], p: float) -> float:
+        """在已排序样本中取分位数（最近秩法），p取0~100"""
+        return ordered[max(1, math.ceil(p / 100 * len(ordered))) - 1]
+
+    def percentile(self, p: float) -> float:
+        """计算分位数，p取0~100"""
+        if not self.samples:
+            return 0.0
+        return self._pick(sorted(self.samples), p)
+
+    def summary(self) -> Dict[str, float]:
+        """返回计数、均值与常用分位数"""
+        if not self.samples:
+            return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        ordered = sorted(self.samples)
+        return {
+            "count": len(ordered),
+            "mean": round(sum(ordered) / len(ordered), 3),
+            "p50": round(self._pick(ordered, 50), 3),
+            "p95": round(self._pick(ordered, 95), 3),
+            "p99": round(self._pick(ordered, 99), 3),
+            "max": round(ordered[-1], 3),
+        }
+
+    def format(self, unit: str = "ms") -> str:
+        """格式化为一行文本"""
+        s = self.summary()
+        return (f"{self.name}: n={s['count']} mean={s['mean']:.2f}{unit} p50={s['p50']:.2f}{unit} "
+                f"p95={s['p95']:.2f}{unit} p99={s['p99']:.2f}{unit} max={s['max']:.2f}{unit}")
+
+
+class BucketHistogram:
+    """固定桶直方图，只保存每个桶的计数、总和与样本数"""
+
+    def __init__(self, name: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        # 最后一个位置对应 +Inf 桶
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def record(self, value: float):
+        """记录一个样本（落入第一个上界 >= value 的桶）"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "BucketHistogram"):
+        """合并另一个桶定义相同的直方图"""
+        if other.buckets != self.buckets:
+            raise ValueError("桶定义不同的直方图不能合并")
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def percentile(self, p: float) -> float:
+        """估算分位数（返回所在桶的上界，落入+Inf桶时返回inf）"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return self.buckets[i] if i < len(self.buckets) else math.inf
+        return math.inf
+
+    def prometheus_lines(self, metric: str, labels: Optional[Dict[str, str]] = None) -> List[str]:
+        """输出Prometheus文本格式的 _bucket/_sum/_count 行（桶计数为累计值）"""
+        label_text = ",".join(f'{key}="{value}"' for key, value in (labels or {}).items())
+        prefix = f"{label_text}," if label_text else ""
+        suffix = f"{{{label_text}}}" if label_text else ""
+
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        lines.append(f"{metric}_sum{suffix} {self.sum:.3f}")
+        lines.append(f"{metric}_count{suffix} {self.count}")
+        return lines
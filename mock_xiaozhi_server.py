@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 11:00
+@File: mock_xiaozhi_server.py
+@Description:
+"""
+"""
+本地模拟小智服务器（OTA + WebSocket），用于离线压测和调试
+收到文本消息后按协议依次回复 stt -> llm -> tts(start/sentence_start/音频帧/sentence_end/stop)
+"""
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import websockets
+
+from IdeaFactory.opus_encoder_tulis import OpusEncoderUtils
+
+logger = logging.getLogger(__name__)
+
+
+class MockXiaozhiServer:
+    """模拟服务器"""
+
+    def __init__(self, host: str = "127.0.0.1", ws_port: int = 8000, ota_port: int = 8002,
+                 sample_rate: int = 16000, frame_duration: int = 60,
+                 sentences: int = 2, frames_per_sentence: int = 20, realtime: bool = True):
+        """
+        初始化模拟服务器
+
+        Args:
+            host: 监听地址
+            ws_port: WebSocket端口（0表示自动分配）
+            ota_port: OTA HTTP端口（0表示自动分配）
+            sample_rate: 下发音频采样率
+            frame_duration: 下发音频帧时长 (毫秒)
+            sentences: 每轮回复的语音段数
+            frames_per_sentence: 每个语音段的音频帧数
+            realtime: True按帧时长节奏发送音频，False尽快发送
+        """
+        self.host = host
+        self.ws_port = ws_port
+        self.ota_port = ota_port
+        self.sample_rate = sample_rate
+        self.frame_duration = frame_duration
+        self.sentences = sentences
+        self.frames_per_sentence = frames_per_sentence
+        self.realtime = realtime
+
+        self.packets = self._make_packets()
+        self.ws_server = None
+        self.http_server = None
+        self.connections = 0
+        self.messages_received = 0
+        self.resumed_sessions = 0
+        self.uplink_frames = 0
+        self.uplink_bytes = 0
+        self.aborts = 0
+        self.clients = set()
+
+    def _make_packets(self):
+        """预先编码一段音频，所有会话复用"""
+        encoder = OpusEncoderUtils(self.sample_rate, 1, self.frame_duration)
+        samples = encoder.frame_size * self.frames_per_sentence
+        t = np.arange(samples) / self.sample_rate
+        pcm = (np.sin(2 * np.pi * 330 * t) * 6000).astype(np.int16)
+        return encoder.encode_pcm_to_opus(pcm, True)
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.ws_port}/xiaozhi/v1/"
+
+    @property
+    def ota_url(self) -> str:
+        return f"http://{self.host}:{self.ota_port}/xiaozhi/ota/"
+
+    def _start_ota_server(self):
+        """在后台线程中启动OTA HTTP服务"""
+        server = self
+
+        class OtaHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                body = json.dumps({
+                    "server_time": {"timestamp": 0, "timezone_offset": 480},
+                    "firmware": {"version": "1.0.0", "url": ""},
+                    "websocket": {"url": server.ws_url, "token": "mock-token"},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.http_server = ThreadingHTTPServer((self.host, self.ota_port), OtaHandler)
+        self.ota_port = self.http_server.server_address[1]
+        threading.Thread(target=self.http_server.serve_forever, daemon=True).start()
+
+    async def start(self):
+        """启动OTA与WebSocket服务"""
+        self._start_ota_server()
+        self.ws_server = await websockets.serve(self.handle_client, self.host, self.ws_port, max_size=None)
+        self.ws_port = self.ws_server.sockets[0].getsockname()[1]
+        logger.info(f"模拟服务器已启动: OTA {self.ota_url}, WebSocket {self.ws_url}")
+
+    async def stop(self):
+        """停止服务"""
+        if self.ws_server:
+            self.ws_server.close()
+            await self.ws_server.wait_closed()
+        if self.http_server:
+            self.http_server.shutdown()
+            self.http_server.server_close()
+
+    async def drop_clients(self):
+        """断开所有设备连接（用于测试客户端重连）"""
+        for websocket in list(self.clients):
+            await websocket.close(code=1012, reason="service restart")
+
+    async def handle_client(self, websocket):
+        """处理一个设备连接"""
+        self.connections += 1
+        self.clients.add(websocket)
+        session_id = str(uuid.uuid4())
+        # 回复在独立任务中发送，这样回复过程中仍能收到abort
+        reply_task = None
+        try:
+            async for message in websocket:
+                if not isinstance(message, str):
+                    # 上行音频帧只计数
+                    self.uplink_frames += 1
+                    self.uplink_bytes += len(message)
+                    continue
+                self.messages_received += 1
+                data = json.loads(message)
+                msg_type = data.get("type")
+
+                if msg_type == "hello":
+                    if data.get("session_id"):
+                        # 设备重连时恢复原会话
+                        session_id = data["session_id"]
+                        self.resumed_sessions += 1
+                    await websocket.send(json.dumps({
+                        "type": "hello",
+                        "transport": "websocket",
+                        "session_id": session_id,
+                        "audio_params": {
+                            "format": "opus",
+                            "sample_rate": self.sample_rate,
+                            "channels": 1,
+                            "frame_duration": self.frame_duration
+                        }
+                    }))
+                elif msg_type == "listen" and data.get("state") == "detect" and data.get("text"):
+                    if reply_task and not reply_task.done():
+                        await reply_task
+                    reply_task = asyncio.create_task(self._reply(websocket, session_id, data["text"]))
+                elif msg_type == "abort" and reply_task and not reply_task.done():
+                    self.aborts += 1
+                    reply_task.cancel()
+                    await asyncio.gather(reply_task, return_exceptions=True)
+                    await websocket.send(json.dumps({"type": "tts", "state": "stop", "session_id": session_id}))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            if reply_task:
+                reply_task.cancel()
+            self.clients.discard(websocket)
+
+    async def _reply(self, websocket, session_id: str, text: str):
+        """按协议回复一轮对话"""
+        try:
+            await self._send_reply(websocket, session_id, text)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def _send_reply(self, websocket, session_id: str, text: str):
+        await websocket.send(json.dumps({"type": "stt", "text": text, "session_id": session_id}))
+        await websocket.send(json.dumps({"type": "llm", "text": "😊", "emotion": "happy", "session_id": session_id}))
+        await websocket.send(json.dumps({"type": "tts", "state": "start", "session_id": session_id}))
+
+        frame_seconds = self.frame_duration / 1000
+        for i in range(self.sentences):
+            sentence = f"模拟回复第{i + 1}句"
+            await websocket.send(json.dumps({"type": "tts", "state": "sentence_start", "text": sentence,
+                                             "session_id": session_id}))
+            for packet in self.packets:
+                await websocket.send(packet)
+                if self.realtime:
+                    await asyncio.sleep(frame_seconds)
+            await websocket.send(json.dumps({"type": "tts", "state": "sentence_end", "text": sentence,
+                                             "session_id": session_id}))
+
+        await websocket.send(json.dumps({"type": "tts", "state": "stop", "session_id": session_id}))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="本地模拟小智服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--ws-port", type=int, default=8000)
+    parser.add_argument("--ota-port", type=int, default=8002)
+    parser.add_argument("--fast", action="store_true", help="不按实时节奏发送音频")
+    args = parser.parse_args()
+
+    server = MockXiaozhiServer(args.host, args.ws_port, args.ota_port, realtime=not args.fast)
+    await server.start()
+    print(f"OTA地址: {server.ota_url}")
+    print(f"WebSocket地址: {server.ws_url}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("模拟服务器已停止")
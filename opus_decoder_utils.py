@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/17 10:05
+@File: opus_decoder_utils.py
+@Description:
+"""
+"""
+Opus解码工具类
+会话内常驻的libopus解码器，将Opus数据包解码为PCM
+"""
+import logging
+import traceback
+
+import numpy as np
+from typing import List, Optional
+from opuslib_next import Decoder
+from opuslib_next import api as opus_api
+from opuslib_next.exceptions import OpusError
+
+# Opus单包最长120ms
+MAX_FRAME_DURATION_MS = 120
+
+
+class OpusDecoderUtils:
+    """Opus到PCM的解码器"""
+
+    def __init__(self, sample_rate: int, channels: int, frame_size_ms: int = 60):
+        """
+        初始化Opus解码器
+
+        Args:
+            sample_rate: 输出采样率 (Hz)，libopus支持 8000/12000/16000/24000/48000
+            channels: 通道数 (1=单声道, 2=立体声)
+            frame_size_ms: 帧大小 (毫秒)，用于丢包补偿时生成的样本数
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_size_ms = frame_size_ms
+        # 每帧样本数 = 采样率 * 帧大小(毫秒) / 1000
+        self.frame_size = (sample_rate * frame_size_ms) // 1000
+        # 解码缓冲区按最长帧分配，实际样本数由数据包决定
+        self.max_frame_size = (sample_rate * MAX_FRAME_DURATION_MS) // 1000
+
+        # 统计信息
+        self.decoded_frames = 0
+        self.failed_frames = 0
+        self.concealed_frames = 0
+
+        try:
+            # 解码器在整个会话中只创建一次
+            self.decoder = Decoder(sample_rate, channels)
+        except Exception as e:
+            logging.error(f"初始化Opus解码器失败: {e}")
+            raise RuntimeError("初始化失败") from e
+
+    def reset_state(self):
+        """重置解码器状态"""
+        self.decoder.reset_state()
+
+    def decode(self, opus_data: bytes) -> Optional[bytes]:
+        """
+        解码一个Opus数据包
+
+        Args:
+            opus_data: Opus数据包
+
+        Returns:
+            16位小端PCM字节数据，失败时返回None
+        """
+        try:
+            pcm_data = self.decoder.decode(opus_data, self.max_frame_size)
+            self.decoded_frames += 1
+            return pcm_data
+        except Exception as e:
+            self.failed_frames += 1
+            logging.error(f"Opus解码失败: {e}")
+            traceback.print_exc()
+            return None
+
+    def conceal(self) -> Optional[bytes]:
+        """
+        用libopus的丢包补偿(PLC)为缺失的一帧生成补偿音频
+
+        Returns:
+            一帧16位小端PCM字节数据，失败时返回None
+        """
+        try:
+            # 空数据包触发libopus的丢包补偿
+            pcm_data = self.decoder.decode(b"", self.frame_size)
+            self.concealed_frames += 1
+            return pcm_data
+        except Exception as e:
+            self.failed_frames += 1
+            logging.error(f"Opus丢包补偿失败: {e}")
+            return None
+
+    def packet_samples(self, opus_data: Optional[bytes]) -> int:
+        """获取数据包解码后的每通道样本数（None表示丢包补偿的一帧）"""
+        if not opus_data:
+            return self.frame_size
+        return opus_api.decoder.get_nb_samples(self.decoder.decoder_state, opus_data, len(opus_data))
+
+    def decode_into(self, opus_data: Optional[bytes], out: np.ndarray) -> int:
+        """
+        直接解码到调用方提供的int16数组中（不产生中间bytes对象）
+
+        Args:
+            opus_data: Opus数据包，None或空表示使用PLC补偿
+            out: 连续的int16输出数组，长度决定最大可解码样本数
+
+        Returns:
+            每通道解码的样本数，失败时返回0
+        """
+        try:
+            length = len(opus_data) if opus_data else 0
+            result = opus_api.decoder.libopus_decode(
+                self.decoder.decoder_state,
+                opus_data or None,
+                length,
+                out.ctypes.data_as(opus_api.c_int16_pointer),
+                len(out) // self.channels,
+                0
+            )
+            if result < 0:
+                raise OpusError(result)
+            if length:
+                self.decoded_frames += 1
+            else:
+                self.concealed_frames += 1
+            return result
+        except Exception as e:
+            self.failed_frames += 1
+            logging.error(f"Opus解码失败: {e}")
+            return 0
+
+    def decode_packets(self, opus_packets: List[bytes]) -> List[bytes]:
+        """
+        按顺序解码多个Opus数据包
+
+        Args:
+            opus_packets: Opus数据包列表
+
+        Returns:
+            PCM数据列表（跳过解码失败的数据包）
+        """
+        pcm_frames = []
+        for packet in opus_packets:
+            pcm_data = self.decode(packet)
+            if pcm_data:
+                pcm_frames.append(pcm_data)
+        return pcm_frames
+
+    def decode_packets_into_array(self, opus_packets: List[bytes]) -> np.ndarray:
+        """
+        批量解码多个Opus数据包到一块连续的int16数组
+
+        先按包头计算总样本数一次分配输出，再逐包直接解码到对应位置
+
+        Args:
+            opus_packets: Opus数据包列表
+
+        Returns:
+            解码后的int16数组（多通道交错，解码失败的数据包不占位置）
+        """
+        total = sum(max(0, self.packet_samples(packet)) for packet in opus_packets)
+        out = np.empty(total * self.channels, dtype=np.int16)
+        offset = 0
+        for packet in opus_packets:
+            decoded = self.decode_into(packet, out[offset:])
+            offset += decoded * self.channels
+        return out[:offset]
+
+    def close(self):
+        """关闭解码器并释放资源"""
+        # opuslib的Decoder在__del__中销毁状态
+        self.decoder = None
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/17 16:45
+@File: opus_encoder_pool.py
+@Description:
+"""
+"""
+多路Opus编码池
+每个流ID持有独立的OpusEncoderUtils状态，多个流在线程池中并行编码
+（ctypes调用libopus时会释放GIL），同一流内的数据严格按提交顺序编码
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+from IdeaFactory.opus_encoder_tulis import OpusEncoderUtils
+
+logger = logging.getLogger(__name__)
+
+
+class _StreamState:
+    """单个流的编码状态"""
+
+    def __init__(self, encoder: OpusEncoderUtils):
+        self.encoder = encoder
+        # 待编码任务: (PCM数据, 是否结束, Future, 提交时间)
+        self.pending: Deque[Tuple[bytes, bool, Future, float]] = deque()
+        self.running = False
+        self.frames = 0
+        self.jobs = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+
+class OpusEncoderPool:
+    """多路PCM到Opus的并行编码器"""
+
+    def __init__(self, sample_rate: int, channels: int, frame_size_ms: int, max_workers: Optional[int] = None):
+        """
+        初始化编码池
+
+        Args:
+            sample_rate: 采样率 (Hz)
+            channels: 通道数
+            frame_size_ms: 帧大小 (毫秒)
+            max_workers: 线程数，None时使用ThreadPoolExecutor的默认值
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_size_ms = frame_size_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="opus_encoder")
+        self._streams: Dict[Hashable, _StreamState] = {}
+        self._lock = threading.Lock()
+
+        self.total_frames = 0
+        self._first_submit: Optional[float] = None
+        self._last_done: Optional[float] = None
+
+    def _get_stream(self, stream_id: Hashable) -> _StreamState:
+        """获取或创建流状态（需持有锁）"""
+        state = self._streams.get(stream_id)
+        if state is None:
+            encoder = OpusEncoderUtils(self.sample_rate, self.channels, self.frame_size_ms)
+            state = _StreamState(encoder)
+            self._streams[stream_id] = state
+        return state
+
+    def submit(self, stream_id: Hashable, pcm_data: bytes, end_of_stream: bool = False) -> Future:
+        """
+        提交一段PCM数据
+
+        Args:
+            stream_id: 流ID
+            pcm_data: PCM字节数据
+            end_of_stream: 是否为该流的结束
+
+        Returns:
+            Future，结果为该段数据产生的Opus数据包列表
+        """
+        future = Future()
+        now = time.perf_counter()
+        with self._lock:
+            if self._first_submit is None:
+                self._first_submit = now
+            state = self._get_stream(stream_id)
+            state.pending.append((pcm_data, end_of_stream, future, now))
+            if not state.running:
+                # 同一流同时只有一个任务在线程池中运行，保证编码顺序
+                state.running = True
+                self._executor.submit(self._drain, state)
+        return future
+
+    def _drain(self, state: _StreamState):
+        """依次编码某个流的待处理数据"""
+        while True:
+            with self._lock:
+                if not state.pending:
+                    state.running = False
+                    return
+                pcm_data, end_of_stream, future, submitted = state.pending.popleft()
+
+            try:
+                packets = state.encoder.encode_pcm_to_opus(pcm_data, end_of_stream)
+            except Exception as e:
+                logger.error(f"多路编码失败: {e}")
+                future.set_exception(e)
+                continue
+
+            done = time.perf_counter()
+            latency = (done - submitted) * 1000
+            with self._lock:
+                state.frames += len(packets)
+                state.jobs += 1
+                state.latency_sum += latency
+                state.latency_max = max(state.latency_max, latency)
+                self.total_frames += len(packets)
+                self._last_done = done
+            future.set_result(packets)
+
+    def encode_batch(self, batch: Dict[Hashable, bytes], end_of_stream: bool = False) -> Dict[Hashable, List[bytes]]:
+        """
+        并行编码多个流的数据并等待结果
+
+        Args:
+            batch: 流ID -> PCM字节数据
+            end_of_stream: 是否为这些流的结束
+
+        Returns:
+            流ID -> 按顺序排列的Opus数据包列表
+        """
+        futures = {stream_id: self.submit(stream_id, pcm_data, end_of_stream)
+                   for stream_id, pcm_data in batch.items()}
+        return {stream_id: future.result() for stream_id, future in futures.items()}
+
+    def close_stream(self, stream_id: Hashable):
+        """释放某个流的编码器"""
+        with self._lock:
+            state = self._streams.pop(stream_id, None)
+        if state:
+            state.encoder.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取编码统计：总帧率与各流延迟"""
+        with self._lock:
+            elapsed = 0.0
+            if self._first_submit is not None and self._last_done is not None:
+                elapsed = self._last_done - self._first_submit
+            per_stream = {
+                stream_id: {
+                    "frames": state.frames,
+                    "avg_latency_ms": round(state.latency_sum / state.jobs, 3) if state.jobs else 0.0,
+                    "max_latency_ms": round(state.latency_max, 3),
+                }
+                for stream_id, state in self._streams.items()
+            }
+            return {
+                "streams": len(self._streams),
+                "total_frames": self.total_frames,
+                "frames_per_sec": round(self.total_frames / elapsed, 1) if elapsed > 0 else 0.0,
+                "per_stream": per_stream,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """关闭线程池"""
+        self._executor.shutdown(wait=wait)
+        for state in self._streams.values():
+            state.encoder.close()
+        self._streams.clear()
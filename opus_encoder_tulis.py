@@ -9,19 +9,35 @@
 Opus编码工具类
 将PCM音频数据编码为Opus格式
 """
+import ctypes
 import logging
 import traceback
 
 import numpy as np
-from typing import List, Optional
+from typing import List, Optional, Union
 from opuslib_next import Encoder
 from opuslib_next import constants
+from opuslib_next import api as opus_api
+from opuslib_next.exceptions import OpusError
+
+# libopus推荐的单包最大字节数
+MAX_PACKET_BYTES = 4000
+
+# PCM校验模式: off=不校验, count=统计并告警满幅/越界样本
+# float输入转换时总会饱和到int16范围（防止越界值回绕），这是转换本身的安全措施，不属于校验模式
+VALIDATION_MODES = ("off", "count")
+
+# memoryview格式字符到numpy类型（按本机C类型宽度解析，long在Linux/macOS上是8字节）
+_MEMORYVIEW_DTYPES = {fmt: np.dtype(fmt) for fmt in "hilfd"}
+
+PcmInput = Union[bytes, bytearray, memoryview, np.ndarray]
 
 
 class OpusEncoderUtils:
     """PCM到Opus的编码器"""
 
-    def __init__(self, sample_rate: int, channels: int, frame_size_ms: int):
+    def __init__(self, sample_rate: int, channels: int, frame_size_ms: int, validation: str = "off",
+                 bitrate: int = 24000, complexity: int = 10):
         """
         初始化Opus编码器
 
@@ -29,7 +45,16 @@ class OpusEncoderUtils:
             sample_rate: 采样率 (Hz)
             channels: 通道数 (1=单声道, 2=立体声)
             frame_size_ms: 帧大小 (毫秒)
+            validation: PCM校验模式，见VALIDATION_MODES
+            bitrate: 比特率 (bps)
+            complexity: 编码复杂度 0-10，越高质量越好、CPU开销越大
         """
+        if validation not in VALIDATION_MODES:
+            raise ValueError(f"无效的校验模式: {validation}，有效模式: {VALIDATION_MODES}")
+        self.validation = validation
+        # 校验统计：满幅(int16)或越界(float)的样本数
+        self.clipped_samples = 0
+
         self.sample_rate = sample_rate
         self.channels = channels
         self.frame_size_ms = frame_size_ms
@@ -39,11 +64,18 @@ class OpusEncoderUtils:
         self.total_frame_size = self.frame_size * channels
 
         # 比特率和复杂度设置
-        self.bitrate = 24000  # bps
-        self.complexity = 10  # 最高质量
-
-        # 缓冲区初始化为空
-        self.buffer = np.array([], dtype=np.int16)
+        self.bitrate = bitrate  # bps
+        self.complexity = complexity
+
+        # 缓冲区只暂存不足一帧的残留样本，容量固定为一帧，预分配后复用
+        self.buffer = np.zeros(self.total_frame_size, dtype=np.int16)
+        self.buffer_len = 0
+        # 编码输出缓冲区同样预分配
+        self._packet_buffer = (ctypes.c_char * MAX_PACKET_BYTES)()
+        # float/int32输入转换用的临时区，按需增长后复用
+        self._float_scratch = np.empty(0, dtype=np.float32)
+        self._int32_scratch = np.empty(0, dtype=np.int32)
+        self._int16_scratch = np.empty(0, dtype=np.int16)
 
         try:
             # 创建Opus编码器
@@ -60,63 +92,77 @@ class OpusEncoderUtils:
     def reset_state(self):
         """重置编码器状态"""
         self.encoder.reset_state()
-        self.buffer = np.array([], dtype=np.int16)
+        self.buffer_len = 0
 
-    def encode_pcm_to_opus(self, pcm_data: bytes, end_of_stream: bool) -> List[bytes]:
+    def encode_pcm_to_opus(self, pcm_data: PcmInput, end_of_stream: bool, dtype=None) -> List[bytes]:
         """
         将PCM数据编码为Opus格式
 
         Args:
-            pcm_data: PCM字节数据
+            pcm_data: PCM数据，可以是字节数据、memoryview或numpy数组（int16/int32/float32，多通道交错）
             end_of_stream: 是否为流的结束
+            dtype: 字节数据的样本类型，None时bytes按小端int16处理，memoryview按其format推断（h/i/l/f/d以外的格式必须指定dtype）
 
         Returns:
             Opus数据包列表
         """
-        # 将字节数据转换为short数组
-        new_samples = self._convert_bytes_to_shorts(pcm_data)
-
-        # 校验PCM数据
-        self._validate_pcm_data(new_samples)
-
-        # 将新数据追加到缓冲区
-        self.buffer = np.append(self.buffer, new_samples)
+        # 转换为int16数组（输入已是int16时只创建视图，不复制）
+        new_samples = self._convert_to_shorts(pcm_data, dtype)
 
         opus_packets = []
+        total = len(new_samples)
         offset = 0
 
-        # 处理所有完整帧
-        while offset <= len(self.buffer) - self.total_frame_size:
-            frame = self.buffer[offset : offset + self.total_frame_size]
-            output = self._encode(frame)
-            if output:
-                opus_packets.append(output)
+        # 先用新数据补齐上次残留的不完整帧
+        if self.buffer_len > 0:
+            take = min(self.total_frame_size - self.buffer_len, total)
+            self.buffer[self.buffer_len:self.buffer_len + take] = new_samples[:take]
+            self.buffer_len += take
+            offset = take
+            if self.buffer_len == self.total_frame_size:
+                self._append_packet(opus_packets, self.buffer)
+                self.buffer_len = 0
+
+        # 处理所有完整帧：直接对输入切片编码，不复制数据
+        while offset + self.total_frame_size <= total:
+            self._append_packet(opus_packets, new_samples[offset : offset + self.total_frame_size])
             offset += self.total_frame_size
 
-        # 保留未处理的样本
-        self.buffer = self.buffer[offset:]
+        # 保留未处理的样本（不足一帧）
+        if offset < total:
+            rest = total - offset
+            self.buffer[:rest] = new_samples[offset:]
+            self.buffer_len = rest
 
         # 流结束时处理剩余数据
-        if end_of_stream and len(self.buffer) > 0:
-            # 创建最后一帧并用0填充
-            last_frame = np.zeros(self.total_frame_size, dtype=np.int16)
-            last_frame[: len(self.buffer)] = self.buffer
-
-            output = self._encode(last_frame)
-            if output:
-                opus_packets.append(output)
-            self.buffer = np.array([], dtype=np.int16)
+        if end_of_stream and self.buffer_len > 0:
+            # 最后一帧用0填充
+            self.buffer[self.buffer_len:] = 0
+            self._append_packet(opus_packets, self.buffer)
+            self.buffer_len = 0
 
         return opus_packets
 
+    def _append_packet(self, opus_packets: List[bytes], frame: np.ndarray):
+        """编码一帧，成功时追加到数据包列表"""
+        output = self._encode(frame)
+        if output:
+            opus_packets.append(output)
+
     def _encode(self, frame: np.ndarray) -> Optional[bytes]:
         """编码一帧音频数据"""
         try:
-            # 将numpy数组转换为bytes
-            frame_bytes = frame.tobytes()
-            # opuslib要求输入字节数必须是channels*2的倍数
-            encoded = self.encoder.encode(frame_bytes, self.frame_size)
-            return encoded
+            # 直接把numpy数组的内存交给libopus，避免tobytes复制
+            result = opus_api.encoder.libopus_encode(
+                self.encoder.encoder_state,
+                frame.ctypes.data_as(opus_api.c_int16_pointer),
+                self.frame_size,
+                self._packet_buffer,
+                MAX_PACKET_BYTES
+            )
+            if result < 0:
+                raise OpusError(result)
+            return ctypes.string_at(self._packet_buffer, result)
         except Exception as e:
             logging.error(f"Opus编码失败: {e}")
             traceback.print_exc()
@@ -127,14 +173,76 @@ class OpusEncoderUtils:
         # 假设输入是小端字节序的16位PCM
         return np.frombuffer(bytes_data, dtype=np.int16)
 
+    def _convert_to_shorts(self, pcm_data: PcmInput, dtype=None) -> np.ndarray:
+        """将各种PCM输入转换为一维int16数组"""
+        if isinstance(pcm_data, np.ndarray):
+            # 跨步视图（如stereo[:, 0]）要先连续化，编码时把内存指针直接交给libopus
+            samples = np.ascontiguousarray(pcm_data).reshape(-1)
+        else:
+            if dtype is None and isinstance(pcm_data, memoryview):
+                dtype = _MEMORYVIEW_DTYPES.get(pcm_data.format)
+                if dtype is None:
+                    raise ValueError(f"不支持的memoryview格式: {pcm_data.format!r}，请通过dtype指定样本类型")
+            samples = np.frombuffer(pcm_data, dtype=dtype or np.int16)
+
+        if not samples.dtype.isnative:
+            samples = samples.astype(samples.dtype.newbyteorder("="))
+
+        if samples.dtype == np.int16:
+            self._validate_pcm_data(samples)
+            return samples
+        if samples.dtype.kind == "f":
+            return self._convert_float(samples)
+        if samples.dtype == np.int32:
+            return self._convert_int32(samples)
+        raise ValueError(f"不支持的PCM样本类型: {samples.dtype}")
+
+    def _ensure_scratch(self, count: int):
+        """确保转换临时区至少能容纳count个样本"""
+        if len(self._int16_scratch) < count:
+            self._float_scratch = np.empty(count, dtype=np.float32)
+            self._int32_scratch = np.empty(count, dtype=np.int32)
+            self._int16_scratch = np.empty(count, dtype=np.int16)
+
+    def _convert_float(self, samples: np.ndarray) -> np.ndarray:
+        """float PCM ([-1.0, 1.0]) 转换为int16"""
+        count = len(samples)
+        self._ensure_scratch(count)
+        scaled = self._float_scratch[:count]
+        out = self._int16_scratch[:count]
+
+        if self.validation != "off":
+            over = np.count_nonzero(np.abs(samples) > 1.0)
+            if over:
+                self.clipped_samples += over
+                logging.warning(f"发现{over}个越界PCM样本(|x|>1.0)")
+
+        np.multiply(samples, 32767.0, out=scaled, casting="unsafe")
+        # 饱和转换：越界值直接转int16会回绕成满幅噪声，所以与校验模式无关、总是先裁剪
+        np.clip(scaled, -32768.0, 32767.0, out=scaled)
+        np.copyto(out, scaled, casting="unsafe")
+        return out
+
+    def _convert_int32(self, samples: np.ndarray) -> np.ndarray:
+        """满幅int32 PCM 转换为int16（取高16位）"""
+        count = len(samples)
+        self._ensure_scratch(count)
+        shifted = self._int32_scratch[:count]
+        out = self._int16_scratch[:count]
+
+        np.right_shift(samples, 16, out=shifted)
+        np.copyto(out, shifted, casting="unsafe")
+        self._validate_pcm_data(out)
+        return out
+
     def _validate_pcm_data(self, pcm_shorts: np.ndarray) -> None:
-        """验证PCM数据是否有效"""
-        # 16位PCM数据范围是 -32768 到 32767
-        if np.any((pcm_shorts < -32768) | (pcm_shorts > 32767)):
-            invalid_samples = pcm_shorts[(pcm_shorts < -32768) | (pcm_shorts > 32767)]
-            logging.warning(f"发现无效PCM样本: {invalid_samples[:5]}...")
-            # 在实际应用中可以选择裁剪而不是抛出异常
-            # np.clip(pcm_shorts, -32768, 32767, out=pcm_shorts)
+        """统计满幅样本（int16输入不可能越界，满幅样本说明上游已削波）"""
+        if self.validation == "off":
+            return
+        saturated = np.count_nonzero(pcm_shorts >= 32767) + np.count_nonzero(pcm_shorts <= -32768)
+        if saturated:
+            self.clipped_samples += saturated
+            logging.warning(f"发现{saturated}个满幅PCM样本，输入可能已削波")
 
     def close(self):
         """关闭编码器并释放资源"""
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 9:30
+@File: ota_client.py
+@Description:
+"""
+"""
+异步OTA客户端
+- 所有设备共享一个带连接池的keep-alive HTTP会话，请求在专用线程池中执行，不阻塞事件循环
+- OTA结果按设备缓存到磁盘，带TTL，过期后携带ETag重新验证，固件版本变化时缓存失效
+- 同一设备的并发检查合并为一次请求
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 连接池大小，OTA专用线程池与之相同，保证每个请求线程都能拿到连接
+POOL_SIZE = 128
+
+_session: Optional[requests.Session] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_session_lock = threading.Lock()
+
+
+def get_shared_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    """获取进程内共享的HTTP会话（连接池复用TCP连接）"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def get_shared_executor() -> ThreadPoolExecutor:
+    """获取执行阻塞OTA请求的专用线程池（不占用事件循环的默认线程池）"""
+    global _executor
+    with _session_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="ota_http")
+        return _executor
+
+
+class OtaClient:
+    """OTA检查客户端（可在多个设备间共享）"""
+
+    def __init__(self, ota_url: str, cache_dir: Optional[str] = None, ttl: float = 3600, timeout: float = 10):
+        """
+        初始化OTA客户端
+
+        Args:
+            ota_url: OTA接口地址
+            cache_dir: 磁盘缓存目录，None时使用系统临时目录下的xiaozhi_ota
+            ttl: 缓存有效期 (秒)，0表示每次都重新验证
+            timeout: HTTP请求超时 (秒)
+        """
+        self.ota_url = ota_url
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "xiaozhi_ota")
+        self.ttl = ttl
+        self.timeout = timeout
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._memory_cache: Dict[str, Dict[str, Any]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # 统计信息
+        self.requests_sent = 0
+        self.cache_hits = 0
+        self.not_modified = 0
+        self.coalesced = 0
+
+    def _cache_key(self, device_mac: str, client_id: str) -> str:
+        raw = f"{self.ota_url}|{device_mac}|{client_id}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_cache(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory_cache.get(key)
+        if entry is not None:
+            return entry
+        try:
+            with open(self._cache_path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._memory_cache[key] = entry
+        return entry
+
+    def _save_cache(self, key: str, entry: Dict[str, Any]):
+        self._memory_cache[key] = entry
+        path = self._cache_path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入OTA缓存失败: {e}")
+
+    def invalidate(self, device_mac: str, client_id: str):
+        """删除设备的OTA缓存（例如缓存的websocket地址连接失败时）"""
+        key = self._cache_key(device_mac, client_id)
+        self._memory_cache.pop(key, None)
+        try:
+            os.remove(self._cache_path(key))
+        except OSError:
+            pass
+
+    async def check(self, device_mac: str, client_id: str, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        检查OTA，优先使用缓存
+
+        Args:
+            device_mac: 设备MAC（Device-Id请求头）
+            client_id: 客户端ID（Client-Id请求头）
+            body: OTA请求体
+
+        Returns:
+            OTA响应JSON，失败时返回None
+        """
+        key = self._cache_key(device_mac, client_id)
+        version = body.get("application", {}).get("version", "")
+
+        entry = self._load_cache(key)
+        if entry and entry.get("version") != version:
+            # 固件版本变化，旧结果不可用
+            entry = None
+        if entry and time.time() - entry.get("fetched_at", 0) < self.ttl:
+            self.cache_hits += 1
+            return entry["response"]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            # 同一设备已有请求在进行，等待其结果
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._fetch(key, device_mac, client_id, body, version, entry)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            logger.error(f"OTA检查错误: {e}")
+            return None
+        finally:
+            # 出错或发起请求的调用方被取消时，合并等待的调用方按失败返回，不能一直挂起
+            if not future.done():
+                future.set_result(None)
+            self._inflight.pop(key, None)
+
+    async def _fetch(self, key: str, device_mac: str, client_id: str, body: Dict[str, Any],
+                     version: str, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """发送OTA请求，过期缓存携带ETag做条件请求"""
+        headers = {
+            'Content-Type': 'application/json',
+            'Device-Id': device_mac,
+            'Client-Id': client_id
+        }
+        if entry and entry.get("etag"):
+            headers['If-None-Match'] = entry["etag"]
+
+        loop = asyncio.get_running_loop()
+        status, etag, result, text = await loop.run_in_executor(get_shared_executor(), self._post, headers, body)
+        self.requests_sent += 1
+
+        if status == 304 and entry:
+            self.not_modified += 1
+            entry["fetched_at"] = time.time()
+            self._save_cache(key, entry)
+            return entry["response"]
+
+        if result is None:
+            logger.error(f"OTA检查失败: {status} {text}")
+            return None
+
+        self._save_cache(key, {
+            "version": version,
+            "etag": etag,
+            "fetched_at": time.time(),
+            "response": result,
+        })
+        return result
+
+    def _post(self, headers: Dict[str, str], body: Dict[str, Any]) -> Tuple[int, Optional[str], Optional[Dict], str]:
+        """在OTA专用线程池中执行的阻塞请求"""
+        response = get_shared_session().post(self.ota_url, headers=headers, json=body, timeout=self.timeout)
+        if response.status_code == 304:
+            return 304, response.headers.get("ETag"), None, ""
+        if not response.ok:
+            return response.status_code, None, None, response.text
+        return response.status_code, response.headers.get("ETag"), response.json(), ""
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取请求/缓存统计"""
+        return {
+            "requests_sent": self.requests_sent,
+            "cache_hits": self.cache_hits,
+            "not_modified": self.not_modified,
+            "coalesced": self.coalesced,
+        }
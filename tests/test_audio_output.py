@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 14:40
+@File: test_audio_output.py
+@Description:
+"""
+"""
+PCM环形缓冲区测试：跨越末尾的读写、连续视图、溢出丢弃与欠载静音
+在IdeaFactory的上级目录运行: python -m pytest IdeaFactory/tests
+"""
+import numpy as np
+
+from IdeaFactory.audio_output import PcmRingBuffer
+
+
+def read(ring, count):
+    out = np.full(count, -1, dtype=np.int16)
+    read_count = ring.read_into(out)
+    return out, read_count
+
+
+def test_write_and_read_wrap_around_end():
+    ring = PcmRingBuffer(8)
+    ring.write(np.arange(6, dtype=np.int16))
+    out, _ = read(ring, 5)
+    assert out.tolist() == [0, 1, 2, 3, 4]
+
+    # 写指针在6，写入5个样本跨越末尾
+    assert ring.write(np.arange(10, 15, dtype=np.int16)) == 5
+    assert ring.available == 6
+    out, count = read(ring, 6)
+    assert count == 6
+    assert out.tolist() == [5, 10, 11, 12, 13, 14]
+    assert ring.available == 0
+
+
+def test_contiguous_region_only_before_end():
+    ring = PcmRingBuffer(8)
+    region = ring.contiguous_region(6)
+    region[:] = np.arange(6)
+    ring.commit(6)
+    read(ring, 6)
+
+    # 写指针在6，剩余连续空间只有2个样本
+    assert ring.contiguous_region(4) is None
+    assert ring.contiguous_region(2) is not None
+
+    ring.write(np.arange(100, 104, dtype=np.int16))
+    out, _ = read(ring, 4)
+    assert out.tolist() == [100, 101, 102, 103]
+
+
+def test_write_drops_samples_beyond_free_space():
+    ring = PcmRingBuffer(4)
+    assert ring.write(np.arange(6, dtype=np.int16)) == 4
+    assert ring.free == 0
+    assert not ring.wait_writable(1, timeout=0.01)
+
+    out, _ = read(ring, 4)
+    assert out.tolist() == [0, 1, 2, 3]
+    assert ring.wait_writable(4, timeout=0.01)
+
+
+def test_partial_read_pads_silence_and_counts_underflow():
+    ring = PcmRingBuffer(8)
+    out, count = read(ring, 4)
+    # 完全空闲时只输出静音，不计欠载
+    assert count == 0
+    assert out.tolist() == [0, 0, 0, 0]
+    assert ring.underflows == 0
+
+    ring.write(np.array([7, 8], dtype=np.int16))
+    out, count = read(ring, 4)
+    assert count == 2
+    assert out.tolist() == [7, 8, 0, 0]
+    assert ring.underflows == 1
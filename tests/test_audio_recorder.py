@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 16:00
+@File: test_audio_recorder.py
+@Description:
+"""
+"""
+会话录音测试：写入后按索引读回每一帧，重连续写追加到原文件，写盘失败后停止录音
+在IdeaFactory的上级目录运行: python -m pytest IdeaFactory/tests
+"""
+import errno
+import time
+
+from IdeaFactory.audio_recorder import SessionRecorder, iter_frames, load_index, read_frame_at, read_header
+
+
+def make_frames(count, start=0):
+    return [bytes([(start + i) % 256]) * (10 + i) for i in range(count)]
+
+
+def test_round_trip_through_index(tmp_path):
+    frames = make_frames(20)
+    recorder = SessionRecorder(str(tmp_path), "s1", sample_rate=24000, channels=1, frame_duration=60)
+    for i, frame in enumerate(frames):
+        recorder.write_frame(frame, timestamp=1000.0 + i)
+    recorder.close()
+
+    assert read_header(recorder.path) == (24000, 1, 60)
+    assert list(iter_frames(recorder.path)) == frames
+
+    index = load_index(recorder.index_path)
+    assert [timestamp for _, timestamp, _ in index] == [1000.0 + i for i in range(20)]
+    assert [read_frame_at(recorder.path, offset, size) for offset, _, size in index] == frames
+    assert recorder.get_stats()["frames"] == 20
+
+
+def test_reopen_appends_to_same_session(tmp_path):
+    first, second = make_frames(3), make_frames(4, start=100)
+    recorder = SessionRecorder(str(tmp_path), "s1")
+    for frame in first:
+        recorder.write_frame(frame)
+    recorder.close()
+
+    # 重连后同一会话继续录音，不重复写文件头
+    recorder = SessionRecorder(str(tmp_path), "s1")
+    for frame in second:
+        recorder.write_frame(frame)
+    recorder.close()
+
+    assert list(iter_frames(recorder.path)) == first + second
+    index = load_index(recorder.index_path)
+    assert [read_frame_at(recorder.path, offset, size) for offset, _, size in index] == first + second
+
+
+def test_flush_on_size_threshold(tmp_path):
+    recorder = SessionRecorder(str(tmp_path), "s1", flush_interval=60, flush_bytes=64)
+    frames = make_frames(8)
+    for frame in frames:
+        recorder.write_frame(frame)
+    # 超过flush_bytes后后台线程提前写盘，不必等待flush_interval
+    deadline = time.monotonic() + 2
+    while recorder.flushes == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert recorder.flushes >= 1
+    recorder.close()
+    assert list(iter_frames(recorder.path)) == frames
+
+
+class FailingFile:
+    """写入时报磁盘已满的文件"""
+
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, data):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def test_failed_flush_stops_recording_and_keeps_index_consistent(tmp_path):
+    recorder = SessionRecorder(str(tmp_path), "s1", flush_interval=60)
+    kept = make_frames(3)
+    for frame in kept:
+        recorder.write_frame(frame)
+    recorder._flush()
+
+    data_file = recorder._data_file
+    recorder._data_file = FailingFile(data_file)
+    recorder.write_frame(b"lost")
+    recorder._flush()
+    recorder._data_file = data_file
+    # 失败后不再接受新帧
+    recorder.write_frame(b"ignored")
+    recorder.close()
+
+    stats = recorder.get_stats()
+    assert stats["failed"]
+    assert stats["frames_lost"] == 1
+    index = load_index(recorder.index_path)
+    assert [read_frame_at(recorder.path, offset, size) for offset, _, size in index] == kept
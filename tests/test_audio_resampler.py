@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 15:00
+@File: test_audio_resampler.py
+@Description:
+"""
+"""
+流式重采样器测试：任意分块方式的输出与整段处理一致，输出长度符合采样率比例
+在IdeaFactory的上级目录运行: python -m pytest IdeaFactory/tests
+"""
+import numpy as np
+import pytest
+
+from IdeaFactory.audio_resampler import StreamingResampler
+
+RATES = [(16000, 24000), (24000, 16000), (44100, 16000), (16000, 48000)]
+
+
+def tone(rate, seconds=0.25, channels=1):
+    t = np.arange(int(rate * seconds)) / rate
+    mono = np.rint(8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    return np.repeat(mono, channels)
+
+
+def resample_in_chunks(resampler, samples, sizes):
+    outputs = []
+    start = 0
+    index = 0
+    while start < len(samples):
+        size = sizes[index % len(sizes)] * resampler.channels
+        outputs.append(resampler.process(samples[start:start + size]))
+        start += size
+        index += 1
+    outputs.append(resampler.flush())
+    return np.concatenate(outputs)
+
+
+@pytest.mark.parametrize("in_rate,out_rate", RATES)
+@pytest.mark.parametrize("channels", [1, 2])
+def test_chunking_does_not_change_output(in_rate, out_rate, channels):
+    samples = tone(in_rate, channels=channels)
+    whole = resample_in_chunks(StreamingResampler(in_rate, out_rate, channels), samples, [len(samples)])
+
+    for sizes in ([1], [7, 160, 3], [441, 960]):
+        chunked = resample_in_chunks(StreamingResampler(in_rate, out_rate, channels), samples, sizes)
+        np.testing.assert_array_equal(chunked, whole)
+
+
+@pytest.mark.parametrize("in_rate,out_rate", RATES)
+def test_output_length_follows_rate_ratio(in_rate, out_rate):
+    samples = tone(in_rate)
+    output = StreamingResampler(in_rate, out_rate).process(samples)
+    expected = len(samples) * out_rate / in_rate
+    assert abs(len(output) - expected) <= 1
+
+
+def test_passthrough_returns_input():
+    samples = tone(16000)
+    resampler = StreamingResampler(16000, 16000)
+    np.testing.assert_array_equal(resampler.process(samples.tobytes()), samples)
+    assert len(resampler.flush()) == 0
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 14:10
+@File: test_jitter_buffer.py
+@Description:
+"""
+"""
+抖动缓冲测试：按到达顺序出帧、缓冲耗尽时PLC补偿、补偿用尽后计为欠载
+在IdeaFactory的上级目录运行: python -m pytest IdeaFactory/tests
+"""
+from IdeaFactory.jitter_buffer import JitterBuffer
+
+
+def make_buffer(**kwargs):
+    # 帧时长取10ms，缓冲为空时的等待足够短
+    options = dict(frame_duration_ms=10, target_depth=3, max_conceal_frames=2)
+    options.update(kwargs)
+    return JitterBuffer(**options)
+
+
+def test_buffers_until_target_depth_then_plays_in_order():
+    buffer = make_buffer()
+    buffer.push(b"f0")
+    buffer.push(b"f1")
+    # 未达到目标深度前不出帧
+    assert buffer.pop(timeout=0.01) is None
+
+    buffer.push(b"f2")
+    assert [buffer.pop(timeout=0.01) for _ in range(3)] == [(b"f0", False), (b"f1", False), (b"f2", False)]
+    assert buffer.get_stats()["played_frames"] == 3
+
+
+def test_end_of_stream_flushes_short_segment():
+    buffer = make_buffer()
+    buffer.push(b"f0")
+    buffer.mark_end_of_stream()
+
+    assert buffer.pop(timeout=0.01) == (b"f0", False)
+    # 语音段结束后回到缓冲状态，不计为欠载
+    assert buffer.pop(timeout=0.01) is None
+    assert buffer.get_stats()["underruns"] == 0
+
+
+def test_underrun_conceals_then_rebuffers():
+    buffer = make_buffer()
+    for index in range(3):
+        buffer.push(b"f%d" % index)
+    for _ in range(3):
+        buffer.pop(timeout=0.01)
+
+    # 缓冲耗尽：先连续补偿max_conceal_frames帧
+    assert buffer.pop(timeout=0.1) == (None, True)
+    assert buffer.pop(timeout=0.1) == (None, True)
+    # 补偿用尽后欠载，重新缓冲并提高目标深度
+    assert buffer.pop(timeout=0.05) is None
+
+    stats = buffer.get_stats()
+    assert stats["concealed_frames"] == 2
+    assert stats["underruns"] == 1
+    assert stats["target_depth"] == 4
+
+
+def test_frame_arriving_after_concealment_counts_as_late():
+    buffer = make_buffer(target_depth=1)
+    buffer.push(b"f0")
+    assert buffer.pop(timeout=0.01) == (b"f0", False)
+    assert buffer.pop(timeout=0.1) == (None, True)
+
+    buffer.push(b"f1")
+    assert buffer.pop(timeout=0.01) == (b"f1", False)
+    assert buffer.get_stats()["late_frames"] == 1
+
+
+def test_overflow_drops_oldest():
+    buffer = make_buffer(target_depth=1, max_depth=2)
+    for index in range(3):
+        buffer.push(b"f%d" % index)
+
+    assert buffer.pop(timeout=0.01) == (b"f1", False)
+    assert buffer.pop(timeout=0.01) == (b"f2", False)
+    stats = buffer.get_stats()
+    assert stats["overruns"] == 1
+    assert stats["dropped_frames"] == 1
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 15:40
+@File: test_mcp_tools.py
+@Description:
+"""
+"""
+MCP工具注册表测试：按签名生成Schema、参数校验、同步/协程工具调用与超时统计
+在IdeaFactory的上级目录运行: python -m pytest IdeaFactory/tests
+"""
+import asyncio
+import threading
+
+import pytest
+
+from IdeaFactory.mcp_tools import McpToolError, McpToolRegistry
+
+
+@pytest.fixture
+def registry():
+    registry = McpToolRegistry(default_timeout=1.0)
+    yield registry
+    registry.shutdown()
+
+
+def register_volume(registry):
+    @registry.tool("self.audio_speaker.set_volume", input_schema={
+        "type": "object",
+        "properties": {"volume": {"type": "integer", "minimum": 0, "maximum": 100}},
+        "required": ["volume"],
+    })
+    def set_volume(volume):
+        """设置音量"""
+        return True
+
+
+def test_schema_from_signature(registry):
+    @registry.tool("self.light.set")
+    def set_light(color: str, brightness: int = 50):
+        """设置灯光"""
+
+    (description,) = registry.list_tools()
+    assert description["description"] == "设置灯光"
+    assert description["inputSchema"] == {
+        "type": "object",
+        "properties": {"color": {"type": "string"}, "brightness": {"type": "integer"}},
+        "required": ["color"],
+    }
+    assert registry.version == 1
+
+
+@pytest.mark.parametrize("arguments", [
+    {},
+    {"volume": "50"},
+    {"volume": True},
+    {"volume": -1},
+    {"volume": 101},
+])
+def test_invalid_arguments_rejected(registry, arguments):
+    register_volume(registry)
+    with pytest.raises(McpToolError):
+        asyncio.run(registry.call("self.audio_speaker.set_volume", arguments))
+
+    stats = registry.get_stats()["self.audio_speaker.set_volume"]
+    assert stats["calls"] == 1
+    assert stats["errors"] == 1
+    assert stats["timeouts"] == 0
+
+
+def test_enum_validation(registry):
+    registry.register("self.mode", lambda mode: mode, input_schema={
+        "type": "object", "properties": {"mode": {"type": "string", "enum": ["a", "b"]}},
+    })
+    assert asyncio.run(registry.call("self.mode", {"mode": "a"})) == "a"
+    with pytest.raises(McpToolError):
+        asyncio.run(registry.call("self.mode", {"mode": "c"}))
+
+
+def test_sync_tool_runs_in_worker_thread(registry):
+    register_volume(registry)
+    threads = []
+    registry.register("self.thread", lambda: threads.append(threading.current_thread().name))
+
+    assert asyncio.run(registry.call("self.audio_speaker.set_volume", {"volume": 30})) is True
+    asyncio.run(registry.call("self.thread"))
+    assert threads[0].startswith("mcp_tool")
+
+
+def test_coroutine_tool_timeout(registry):
+    @registry.tool("self.slow", timeout=0.05)
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(McpToolError, match="超时"):
+        asyncio.run(registry.call("self.slow"))
+    stats = registry.get_stats()["self.slow"]
+    assert stats["timeouts"] == 1
+    assert stats["errors"] == 1
+
+
+def test_tool_exception_wrapped(registry):
+    def broken():
+        raise RuntimeError("设备不可用")
+
+    registry.register("self.broken", broken)
+    with pytest.raises(McpToolError, match="设备不可用"):
+        asyncio.run(registry.call("self.broken"))
+
+
+def test_unknown_tool(registry):
+    with pytest.raises(KeyError):
+        asyncio.run(registry.call("self.missing"))
+
+
+def test_format_result():
+    assert McpToolRegistry.format_result(True) == {"content": [{"type": "text", "text": "true"}], "isError": False}
+    assert McpToolRegistry.format_result({"音量": 50}, is_error=True)["content"][0]["text"] == '{"音量": 50}'
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 15:20
+@File: test_message_codec.py
+@Description:
+"""
+"""
+消息编解码测试：MessageTemplate渲染结果与直接序列化完整消息一致
+在IdeaFactory的上级目录运行: python -m pytest IdeaFactory/tests
+"""
+import json
+
+import pytest
+
+from IdeaFactory.message_codec import CODECS, Field, MessageTemplate, get_codec
+
+
+def load_codec(name):
+    try:
+        return get_codec(name)
+    except ImportError:
+        pytest.skip(f"未安装{name}")
+
+
+def build(session_id, request_id, result):
+    """用给定的字段值构建与模板结构相同的完整消息"""
+    return {
+        "session_id": session_id,
+        "type": "mcp",
+        "payload": {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": result,
+            "tools": [{"name": "self.audio_speaker.set_volume", "description": "设置音量"}],
+        },
+    }
+
+
+VALUES = [
+    ("s1", 1, {"content": [{"type": "text", "text": "true"}], "isError": False}),
+    ("会话\"2\"", "req-7", None),
+    ("", 3.5, ["中文", "\n\t\\", {"x": [1, 2]}]),
+]
+
+
+@pytest.mark.parametrize("codec_name", list(CODECS))
+@pytest.mark.parametrize("session_id,request_id,result", VALUES)
+def test_render_matches_full_dumps(codec_name, session_id, request_id, result):
+    codec = load_codec(codec_name)
+    template = MessageTemplate(build(Field("session_id"), Field("id"), Field("result")), codec)
+
+    text = template.render(session_id=session_id, id=request_id, result=result)
+
+    expected = build(session_id, request_id, result)
+    assert text == codec.dumps(expected)
+    assert json.loads(text) == expected
+
+
+def test_template_without_fields_is_constant():
+    template = MessageTemplate({"type": "listen", "state": "start"})
+    assert template.fields == []
+    assert template.render() == json.dumps({"type": "listen", "state": "start"}, ensure_ascii=False,
+                                           separators=(",", ":"))
+
+
+def test_duplicate_field_rejected():
+    with pytest.raises(ValueError):
+        MessageTemplate({"a": Field("x"), "b": Field("x")})
+
+
+def test_unknown_codec_rejected():
+    with pytest.raises(ValueError):
+        get_codec("yaml")
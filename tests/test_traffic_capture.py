@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 16:20
+@File: test_traffic_capture.py
+@Description:
+"""
+"""
+流量抓取与回放测试：抓取文件读回的帧与写入一致，回放只按顺序送入下行消息
+在IdeaFactory的上级目录运行: python -m pytest IdeaFactory/tests
+"""
+import asyncio
+import json
+
+import pytest
+
+from IdeaFactory.traffic_capture import DIRECTION_IN, DIRECTION_OUT, TrafficCapture, iter_capture
+from IdeaFactory.traffic_replay import TrafficReplayer
+
+FRAMES = [
+    (DIRECTION_OUT, json.dumps({"type": "hello", "version": 1})),
+    (DIRECTION_IN, json.dumps({"type": "hello", "session_id": "会话1"}, ensure_ascii=False)),
+    (DIRECTION_IN, json.dumps({"type": "tts", "state": "start"})),
+    (DIRECTION_IN, b"\x00\x01opus"),
+    (DIRECTION_OUT, bytearray(b"mic")),
+    (DIRECTION_IN, b""),
+    (DIRECTION_IN, json.dumps({"type": "tts", "state": "stop"})),
+]
+
+
+class RecordingClient:
+    """只记录收到的消息的客户端"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_message(self, message):
+        self.messages.append(message)
+
+
+def write_capture(path):
+    capture = TrafficCapture(str(path))
+    for direction, message in FRAMES:
+        capture.record(direction, message)
+    capture.close()
+    # 关闭后的记录直接忽略
+    capture.record(DIRECTION_IN, "late")
+    return capture
+
+
+def test_capture_round_trip(tmp_path):
+    path = tmp_path / "session.xzcap"
+    capture = write_capture(path)
+    assert capture.records == len(FRAMES)
+
+    records = list(iter_capture(str(path)))
+    assert [(direction, message) for _, direction, message in records] == \
+        [(direction, bytes(m) if isinstance(m, bytearray) else m) for direction, m in FRAMES]
+    timestamps = [timestamp for timestamp, _, _ in records]
+    assert timestamps == sorted(timestamps)
+
+
+def test_truncated_record_ignored(tmp_path):
+    path = tmp_path / "session.xzcap"
+    write_capture(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])
+
+    assert len(list(iter_capture(str(path)))) == len(FRAMES) - 1
+
+
+def test_not_a_capture_file(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"RIFF0000")
+    with pytest.raises(ValueError):
+        list(iter_capture(str(path)))
+
+
+def test_replay_feeds_incoming_messages_in_order(tmp_path):
+    path = tmp_path / "session.xzcap"
+    write_capture(path)
+    client = RecordingClient()
+    replayer = TrafficReplayer(str(path), client, speed=None)
+
+    asyncio.run(replayer.run())
+
+    assert client.messages == [message for direction, message in FRAMES if direction == DIRECTION_IN]
+    assert replayer.messages == len(client.messages)
+    assert set(replayer.latency) == {"hello", "tts.start", "tts.stop", "binary"}
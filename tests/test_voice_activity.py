@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 16:40
+@File: test_voice_activity.py
+@Description:
+"""
+"""
+VAD测试：语音开始时补发预录音频，语音结束后拖尾期内继续发送，拖尾结束才发出stop
+在IdeaFactory的上级目录运行: python -m pytest IdeaFactory/tests
+"""
+import numpy as np
+
+from IdeaFactory.voice_activity import VoiceActivityDetector
+
+RATE = 16000
+CHUNK_MS = 60
+
+
+def silence(channels=1):
+    return np.zeros(RATE * CHUNK_MS // 1000 * channels, dtype=np.int16).tobytes()
+
+
+def speech(channels=1):
+    t = np.arange(RATE * CHUNK_MS // 1000) / RATE
+    mono = np.rint(8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    return np.repeat(mono, channels).tobytes()
+
+
+def white_noise():
+    rng = np.random.default_rng(0)
+    return rng.integers(-8000, 8000, RATE * CHUNK_MS // 1000, dtype=np.int16).tobytes()
+
+
+def feed(vad, chunks):
+    """依次送入采集块，返回每块的 (输出块数, 事件)"""
+    results = []
+    for index, pcm in enumerate(chunks):
+        output, event = vad.process(pcm, float(index))
+        results.append((output, event))
+    return results
+
+
+def test_start_with_preroll_and_stop_after_hangover():
+    vad = VoiceActivityDetector(RATE, hangover_ms=400, preroll_ms=180)
+    chunks = [silence()] * 5 + [speech()] * 3 + [silence()] * 8
+    results = feed(vad, chunks)
+
+    # 语音前的静音块被抑制
+    assert all(output == [] and event is None for output, event in results[:5])
+
+    # 语音开始：补发最近180ms（3块）预录音频，时间戳保持原采集时间
+    output, event = results[5]
+    assert event == "start"
+    assert [captured_at for _, captured_at in output] == [2.0, 3.0, 4.0, 5.0]
+
+    # 拖尾400ms内的6个静音块照常发送，第7个静音块触发stop
+    for output, event in results[8:14]:
+        assert len(output) == 1 and event is None
+    output, event = results[14]
+    assert output == [] and event == "stop"
+    assert results[15] == ([], None)
+
+    stats = vad.get_stats()
+    assert stats["segments"] == 1
+    assert stats["frames_total"] == 16
+    # 5块前置静音中3块作为预录补发，加上stop之后的2块
+    assert stats["frames_suppressed"] == 2 + 2
+
+
+def test_speech_during_hangover_continues_segment():
+    vad = VoiceActivityDetector(RATE, hangover_ms=400, preroll_ms=0)
+    results = feed(vad, [speech()] + [silence()] * 3 + [speech()] + [silence()] * 8)
+
+    events = [event for _, event in results]
+    assert events.count("start") == 1
+    # 第二段语音重置拖尾计时：其后6个静音块照常发送，第7个才stop
+    assert events.index("stop") == 11
+    assert vad.get_stats()["segments"] == 1
+
+
+def test_broadband_noise_is_not_speech():
+    vad = VoiceActivityDetector(RATE)
+    results = feed(vad, [white_noise()] * 5)
+    assert all(output == [] and event is None for output, event in results)
+    assert not vad.active
+
+
+def test_stereo_input_mixed_down():
+    vad = VoiceActivityDetector(RATE, channels=2, preroll_ms=0)
+    output, event = vad.process(speech(channels=2), 0.0)
+    assert event == "start"
+    assert output == [(speech(channels=2), 0.0)]
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/19 10:20
+@File: test_ws_receiver_queue.py
+@Description:
+"""
+"""
+ws_demo接收端发送队列测试：队列满时codec控制消息不能被丢弃
+在IdeaFactory的上级目录运行: python -m pytest IdeaFactory/tests
+"""
+import asyncio
+import json
+
+import pytest
+
+from IdeaFactory.ws_demo.websocket_server import FULL_POLICIES, ReceiverQueue
+
+
+class RecordingWebSocket:
+    """只记录发送内容的连接"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, data):
+        self.messages.append(data)
+
+
+def codec_message(name):
+    return json.dumps({"type": "codec", "codec": {"name": name}})
+
+
+async def _fill_then_switch_codec(policy):
+    websocket = RecordingWebSocket()
+    receiver_queue = ReceiverQueue(websocket, "r1", max_size=4, policy=policy)
+    for index in range(4):
+        assert receiver_queue.put(b"pcm%d" % index)
+
+    # 队列已满时切换编码，随后到达的是Opus数据包
+    assert receiver_queue.put(codec_message("opus"))
+    accepted = receiver_queue.put(b"opus0")
+
+    receiver_queue.start()
+    await asyncio.sleep(0.01)
+    receiver_queue.stop()
+    return websocket.messages, accepted, receiver_queue
+
+
+@pytest.mark.parametrize("policy", FULL_POLICIES)
+def test_codec_message_survives_full_queue(policy):
+    messages, accepted, receiver_queue = asyncio.run(_fill_then_switch_codec(policy))
+
+    assert codec_message("opus") in messages
+    codec_index = messages.index(codec_message("opus"))
+    # codec消息之前只有PCM，之后只有Opus
+    assert all(m.startswith(b"pcm") for m in messages[:codec_index])
+    assert all(m.startswith(b"opus") for m in messages[codec_index + 1:])
+
+    if policy == "drop_oldest":
+        assert accepted and messages[-1] == b"opus0" and receiver_queue.dropped == 1
+    elif policy == "drop_newest":
+        assert accepted and b"opus0" not in messages and receiver_queue.dropped == 1
+    else:
+        assert not accepted
+
+
+def test_drop_oldest_keeps_leading_control_message():
+    async def run():
+        websocket = RecordingWebSocket()
+        receiver_queue = ReceiverQueue(websocket, "r1", max_size=2, policy="drop_oldest")
+        receiver_queue.put(codec_message("opus"))
+        for index in range(4):
+            receiver_queue.put(b"opus%d" % index)
+        assert receiver_queue.audio_depth == 2
+        receiver_queue.start()
+        await asyncio.sleep(0.01)
+        receiver_queue.stop()
+        return websocket.messages
+
+    assert asyncio.run(run()) == [codec_message("opus"), b"opus2", b"opus3"]
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 21:40
+@File: traffic_capture.py
+@Description:
+"""
+"""
+WebSocket流量抓取
+记录一个会话收发的全部文本/二进制帧及时间戳，格式为 文件头 + (记录头 + 负载)*，
+回放见traffic_replay.py
+"""
+import logging
+import struct
+import time
+
+from typing import Iterator, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"XZCAP1\n"
+# 记录头: 相对抓取开始的时间(秒), 方向, 帧类型, 长度
+RECORD_HEADER = struct.Struct("<dBBI")
+DIRECTION_IN = 0
+DIRECTION_OUT = 1
+KIND_TEXT = 0
+KIND_BINARY = 1
+
+
+class TrafficCapture:
+    """抓取写入器（带缓冲的顺序写，接收循环上只有一次内存拷贝）"""
+
+    def __init__(self, path: str, buffer_size: int = 1024 * 1024):
+        self.path = path
+        self._file = open(path, "wb", buffering=buffer_size)
+        self._file.write(MAGIC)
+        self._start = time.perf_counter()
+        self.records = 0
+
+    def record(self, direction: int, message: Union[str, bytes]):
+        """记录一帧"""
+        if self._file is None:
+            return
+        if isinstance(message, str):
+            kind, payload = KIND_TEXT, message.encode("utf-8")
+        else:
+            kind, payload = KIND_BINARY, bytes(message)
+        self._file.write(RECORD_HEADER.pack(time.perf_counter() - self._start, direction, kind, len(payload)))
+        self._file.write(payload)
+        self.records += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            logger.info(f"流量抓取已保存: {self.path} ({self.records}帧)")
+
+
+def iter_capture(path: str) -> Iterator[Tuple[float, int, Union[str, bytes]]]:
+    """读取抓取文件，依次返回 (时间戳, 方向, 消息)"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"不是流量抓取文件: {path}")
+        while True:
+            head = f.read(RECORD_HEADER.size)
+            if len(head) < RECORD_HEADER.size:
+                return
+            timestamp, direction, kind, size = RECORD_HEADER.unpack(head)
+            payload = f.read(size)
+            if len(payload) < size:
+                return
+            yield timestamp, direction, payload.decode("utf-8") if kind == KIND_TEXT else payload
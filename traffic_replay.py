@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 22:10
+@File: traffic_replay.py
+@Description:
+"""
+"""
+WebSocket流量回放
+把抓取的下行消息按原始节奏（或尽快）重新送入XiaozhiClient.handle_message，
+统计吞吐和每类消息的处理延迟，用于离线复现问题和测量客户端处理开销
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from typing import Dict, Optional, Union
+
+from IdeaFactory.client_ws import XiaozhiClient
+from IdeaFactory.metrics import LatencyHistogram
+from IdeaFactory.traffic_capture import DIRECTION_IN, iter_capture
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayClient(XiaozhiClient):
+    """回放用的无头客户端：不连接服务器，上行消息只计数"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("output_backend", "null")
+        kwargs.setdefault("auto_reconnect", False)
+        super().__init__(*args, **kwargs)
+        self.is_connected = True
+        self.replies = 0
+
+    async def send_text(self, message_str: str):
+        self.replies += 1
+
+    async def send_audio(self, opus_packet: bytes) -> bool:
+        return True
+
+
+class TrafficReplayer:
+    """把抓取的下行消息重新送入客户端"""
+
+    def __init__(self, path: str, client: Optional[XiaozhiClient] = None, speed: Optional[float] = 1.0):
+        """
+        Args:
+            path: 抓取文件
+            client: 接收消息的客户端，默认ReplayClient
+            speed: 回放倍速，None表示不等待、尽快回放
+        """
+        self.path = path
+        self.client = client or ReplayClient()
+        self.speed = speed
+        # 消息类型（文本消息的type或binary） -> 处理耗时
+        self.latency: Dict[str, LatencyHistogram] = {}
+        # 实时回放时，实际送入时间相对计划时间的滞后
+        self.lag = LatencyHistogram("回放滞后")
+        self.messages = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+
+    @staticmethod
+    def _message_type(message: Union[str, bytes]) -> str:
+        if not isinstance(message, str):
+            return "binary"
+        try:
+            msg = json.loads(message)
+        except ValueError:
+            return "invalid"
+        msg_type = msg.get("type", "unknown")
+        state = msg.get("state")
+        return f"{msg_type}.{state}" if state else msg_type
+
+    async def run(self):
+        """回放整个抓取文件"""
+        start = time.perf_counter()
+        first_timestamp = None
+        for timestamp, direction, message in iter_capture(self.path):
+            if direction != DIRECTION_IN:
+                continue
+            if first_timestamp is None:
+                first_timestamp = timestamp
+
+            if self.speed:
+                due = start + (timestamp - first_timestamp) / self.speed
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self.lag.record(max(0.0, time.perf_counter() - due) * 1000)
+
+            handle_start = time.perf_counter()
+            await self.client.handle_message(message)
+            handle_ms = (time.perf_counter() - handle_start) * 1000
+
+            msg_type = self._message_type(message)
+            histogram = self.latency.get(msg_type)
+            if histogram is None:
+                histogram = self.latency[msg_type] = LatencyHistogram(msg_type)
+            histogram.record(handle_ms)
+            self.messages += 1
+            self.bytes += len(message)
+        self.elapsed = time.perf_counter() - start
+
+    def report(self):
+        """打印吞吐与每类消息的处理延迟"""
+        mode = f"{self.speed}x" if self.speed else "尽快"
+        print(f"\n=== 回放报告 ({mode}) ===")
+        print(f"消息: {self.messages}, 字节: {self.bytes:,}, 耗时: {self.elapsed:.3f}秒, "
+              f"吞吐: {self.messages / self.elapsed:,.0f} 消息/秒" if self.elapsed else "没有可回放的消息")
+        for msg_type in sorted(self.latency):
+            print(f"  {self.latency[msg_type].format()}")
+        if self.speed:
+            print(f"  {self.lag.format()}")
+        print(f"客户端上行回复: {getattr(self.client, 'replies', 0)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="回放抓取的WebSocket流量")
+    parser.add_argument("path", help="抓取文件（XiaozhiClient的capture_path参数生成）")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速")
+    parser.add_argument("--fast", action="store_true", help="不等待，尽快回放")
+    parser.add_argument("--mode", default="streaming", choices=["streaming", "buffered", "save_only"])
+    args = parser.parse_args()
+
+    client = ReplayClient()
+    client.set_playback_mode(args.mode)
+    replayer = TrafficReplayer(args.path, client, speed=None if args.fast else args.speed)
+    try:
+        await replayer.run()
+    finally:
+        await client.disconnect()
+    replayer.report()
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("IdeaFactory.client_ws").setLevel(logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 18:30
+@File: turn_tracer.py
+@Description:
+"""
+"""
+对话轮次延迟追踪
+以listen stop（或发送文本）为起点，记录 stt结果、首个llm消息、tts start、首个音频帧、
+各语音段起止、tts stop 相对起点的时间，每轮结束时写入固定桶直方图，并可追加一行JSON到文件；
+打点只是一次字典查询加一次perf_counter，可以长期开启
+"""
+import json
+import logging
+import time
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from IdeaFactory.metrics import BucketHistogram, DEFAULT_BUCKETS_MS
+
+logger = logging.getLogger(__name__)
+
+TURN_EVENTS = ("stt", "llm", "tts_start", "first_audio", "sentence_start", "sentence_end", "tts_stop")
+
+
+class TurnTracer:
+    """单个会话的轮次追踪器"""
+
+    def __init__(self, jsonl_path: Optional[str] = None, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        """
+        Args:
+            jsonl_path: 每轮追加一行JSON的文件路径，None时只统计直方图
+            buckets: 直方图桶上界 (毫秒)
+        """
+        self.buckets = tuple(buckets)
+        # (起点类型, 事件) -> 直方图
+        self.histograms: Dict[Tuple[str, str], BucketHistogram] = {}
+        self.sentence_duration = BucketHistogram("sentence_duration", self.buckets)
+        self.turns = 0
+        self.incomplete_turns = 0
+        self.session_id: Optional[str] = None
+
+        self._file = open(jsonl_path, "a", encoding="utf-8", buffering=65536) if jsonl_path else None
+        self._start: Optional[float] = None
+        self._wall_start = 0.0
+        self._origin = ""
+        self._events: Dict[str, float] = {}
+        self._sentences: List[List[Optional[float]]] = []
+
+    @property
+    def active(self) -> bool:
+        return self._start is not None
+
+    def begin_turn(self, origin: str):
+        """
+        开始新的一轮
+
+        Args:
+            origin: 起点类型，listen_stop / text / stt（服务器端VAD时以识别结果为起点）
+        """
+        if self._start is not None:
+            self.end_turn(completed=False)
+        self._start = time.perf_counter()
+        self._wall_start = time.time()
+        self._origin = origin
+        self._events = {}
+        self._sentences = []
+
+    def mark(self, event: str):
+        """记录事件首次出现的时间，重复的事件忽略"""
+        if self._start is None or event in self._events:
+            return
+        self._events[event] = time.perf_counter() - self._start
+
+    def mark_sentence_start(self):
+        if self._start is None:
+            return
+        now = time.perf_counter() - self._start
+        self._events.setdefault("sentence_start", now)
+        self._sentences.append([now, None])
+
+    def mark_sentence_end(self):
+        if self._start is None:
+            return
+        now = time.perf_counter() - self._start
+        self._events.setdefault("sentence_end", now)
+        if self._sentences and self._sentences[-1][1] is None:
+            self._sentences[-1][1] = now
+
+    def end_turn(self, completed: bool = True):
+        """结束当前轮次：更新直方图并写出一行JSON"""
+        if self._start is None:
+            return
+        if completed:
+            self.mark("tts_stop")
+            self.turns += 1
+        else:
+            self.incomplete_turns += 1
+
+        events_ms = {event: offset * 1000 for event, offset in self._events.items()}
+        for event, value in events_ms.items():
+            key = (self._origin, event)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = BucketHistogram(event, self.buckets)
+            histogram.record(value)
+        for start, end in self._sentences:
+            if end is not None:
+                self.sentence_duration.record((end - start) * 1000)
+
+        if self._file:
+            record = {
+                "session_id": self.session_id,
+                "origin": self._origin,
+                "start": round(self._wall_start, 3),
+                "completed": completed,
+                "events_ms": {event: round(value, 2) for event, value in events_ms.items()},
+                "sentences_ms": [[round(s * 1000, 2), None if e is None else round(e * 1000, 2)]
+                                 for s, e in self._sentences],
+            }
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._start = None
+
+    def merge(self, other: "TurnTracer"):
+        """合并另一个追踪器的直方图（多设备汇总）"""
+        for key, histogram in other.histograms.items():
+            if key not in self.histograms:
+                self.histograms[key] = BucketHistogram(histogram.name, self.buckets)
+            self.histograms[key].merge(histogram)
+        self.sentence_duration.merge(other.sentence_duration)
+        self.turns += other.turns
+        self.incomplete_turns += other.incomplete_turns
+
+    def prometheus_text(self, metric: str = "xiaozhi_turn_latency_ms") -> str:
+        """导出Prometheus文本格式"""
+        lines = [f"# HELP {metric} Latency from turn start to each protocol event.",
+                 f"# TYPE {metric} histogram"]
+        for (origin, event), histogram in sorted(self.histograms.items()):
+            lines.extend(histogram.prometheus_lines(metric, {"origin": origin, "event": event}))
+        sentence_metric = "xiaozhi_sentence_duration_ms"
+        lines.append(f"# HELP {sentence_metric} Time between tts sentence_start and sentence_end.")
+        lines.append(f"# TYPE {sentence_metric} histogram")
+        lines.extend(self.sentence_duration.prometheus_lines(sentence_metric))
+        return "\n".join(lines) + "\n"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """各事件的平均值与p95估计 (毫秒)"""
+        stats: Dict[str, Any] = {"turns": self.turns, "incomplete_turns": self.incomplete_turns}
+        for (origin, event), histogram in self.histograms.items():
+            stats[f"{origin}.{event}"] = {
+                "count": histogram.count,
+                "mean": round(histogram.sum / histogram.count, 2),
+                "p95": histogram.percentile(95),
+            }
+        return stats
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
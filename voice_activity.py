@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+@Author: Junfeng Gao
+@Date: 2026/10/18 15:20
+@File: voice_activity.py
+@Description:
+"""
+"""
+轻量语音活动检测（VAD）
+把每个采集块切成10ms分析帧，用numpy一次算出所有分析帧的能量和过零率，
+静音块不送编码器；支持拖尾（hangover）和预录（pre-roll），语音起止时驱动listen start/stop
+"""
+import math
+import time
+
+import numpy as np
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from IdeaFactory.metrics import LatencyHistogram
+
+
+class VoiceActivityDetector:
+    """基于能量+过零率的VAD"""
+
+    def __init__(self, sample_rate: int = 16000, channels: int = 1, analysis_ms: int = 10,
+                 threshold_db: float = -45.0, margin_db: float = 12.0, max_zcr: float = 0.35,
+                 min_speech_ratio: float = 0.3, hangover_ms: int = 400, preroll_ms: int = 180,
+                 noise_adapt: float = 0.01):
+        """
+        初始化VAD
+
+        Args:
+            sample_rate: 采集采样率 (Hz)
+            channels: 采集声道数（多声道先混为单声道再检测）
+            analysis_ms: 分析帧时长 (毫秒)
+            threshold_db: 绝对能量门限 (dBFS)
+            margin_db: 相对噪声底的能量门限 (dB)
+            max_zcr: 过零率上限，能量够但过零率过高的帧视为宽带噪声
+            min_speech_ratio: 一个采集块中语音分析帧占比达到该值时判为语音
+            hangover_ms: 语音结束后继续发送的拖尾时长，避免字间停顿被截断
+            preroll_ms: 语音开始前保留的音频时长，检测到语音时补发，避免吞掉开头
+            noise_adapt: 噪声底上升的平滑系数（下降时立即跟随）
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.analysis_size = sample_rate * analysis_ms // 1000
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.max_zcr = max_zcr
+        self.min_speech_ratio = min_speech_ratio
+        self.hangover_ms = hangover_ms
+        self.preroll_ms = preroll_ms
+        self.noise_adapt = noise_adapt
+
+        # 统计信息
+        self.frames_total = 0
+        self.frames_suppressed = 0
+        self.segments = 0
+        self.processing = LatencyHistogram("VAD耗时")
+        self.reset()
+
+    def reset(self):
+        """清空检测状态（统计信息保留）"""
+        self.active = False
+        self.noise_floor_db = self.threshold_db - self.margin_db
+        self._silence_ms = 0.0
+        self._preroll: deque = deque()
+        self._preroll_ms = 0.0
+
+    def _speech_flags(self, samples: np.ndarray) -> np.ndarray:
+        """逐分析帧判断是否为语音（向量化）"""
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        count = len(samples) // self.analysis_size
+        if count == 0:
+            return np.zeros(0, dtype=bool)
+        frames = samples[:count * self.analysis_size].reshape(count, self.analysis_size).astype(np.float32)
+
+        energy = np.einsum("ij,ij->i", frames, frames) / self.analysis_size
+        energy_db = 10 * np.log10(energy / (32768.0 * 32768.0) + 1e-12)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.analysis_size - 1)
+
+        # 噪声底：遇到更安静的帧立即下降，否则缓慢上升，持续的背景噪声最终会被当作噪声底
+        quietest = float(energy_db.min())
+        if quietest < self.noise_floor_db:
+            self.noise_floor_db = quietest
+        else:
+            self.noise_floor_db += self.noise_adapt * (quietest - self.noise_floor_db)
+
+        threshold = max(self.threshold_db, self.noise_floor_db + self.margin_db)
+        return (energy_db > threshold) & (zcr < self.max_zcr)
+
+    def process(self, pcm: bytes, captured_at: float) -> Tuple[List[Tuple[bytes, float]], Optional[str]]:
+        """
+        处理一个采集块
+
+        Args:
+            pcm: int16 PCM数据
+            captured_at: 采集时间戳（随音频一起返回，用于统计上行延迟）
+
+        Returns:
+            (需要继续编码发送的(PCM, 采集时间戳)列表, 事件)，事件为"start"、"stop"或None
+        """
+        start = time.perf_counter()
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        chunk_ms = len(samples) / self.channels / self.sample_rate * 1000
+        flags = self._speech_flags(samples)
+        speech = flags.size > 0 and np.count_nonzero(flags) >= math.ceil(self.min_speech_ratio * flags.size)
+
+        self.frames_total += 1
+        event = None
+        if speech:
+            self._silence_ms = 0.0
+            if self.active:
+                output = [(pcm, captured_at)]
+            else:
+                # 语音开始：先补发预录的音频
+                self.active = True
+                self.segments += 1
+                event = "start"
+                output = list(self._preroll) + [(pcm, captured_at)]
+                self.frames_suppressed -= len(self._preroll)
+                self._preroll.clear()
+                self._preroll_ms = 0.0
+        elif self.active and self._silence_ms + chunk_ms <= self.hangover_ms:
+            # 拖尾期内照常发送
+            self._silence_ms += chunk_ms
+            output = [(pcm, captured_at)]
+        else:
+            if self.active:
+                self.active = False
+                event = "stop"
+            self.frames_suppressed += 1
+            self._append_preroll(pcm, captured_at, chunk_ms)
+            output = []
+
+        self.processing.record((time.perf_counter() - start) * 1000)
+        return output, event
+
+    def _append_preroll(self, pcm: bytes, captured_at: float, chunk_ms: float):
+        """保留最近preroll_ms的静音块"""
+        if self.preroll_ms <= 0:
+            return
+        self._preroll.append((pcm, captured_at))
+        self._preroll_ms += chunk_ms
+        while self._preroll_ms - chunk_ms >= self.preroll_ms:
+            self._preroll.popleft()
+            self._preroll_ms -= chunk_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取VAD统计：抑制比例和引入的延迟"""
+        return {
+            "frames_total": self.frames_total,
+            "frames_suppressed": self.frames_suppressed,
+            "suppressed_ratio": round(self.frames_suppressed / self.frames_total, 3) if self.frames_total else 0.0,
+            "segments": self.segments,
+            # 检测本身在采集线程中同步执行，引入的延迟即每块的处理耗时
+            "processing_ms": self.processing.summary(),
+            # listen stop 相对语音实际结束的延后
+            "stop_delay_ms": self.hangover_ms,
+        }
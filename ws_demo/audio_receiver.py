@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import websockets
 import json
@@ -13,9 +14,31 @@ import traceback
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+try:
+    # 共用IdeaFactory进程内的PyAudio实例，需从IdeaFactory的上级目录以模块方式运行
+    from IdeaFactory.audio_output import acquire_pyaudio, release_pyaudio
+except ImportError:
+    # 单独运行脚本时退回到本客户端自己的PyAudio实例
+    _pyaudio_instances = []
+
+    def acquire_pyaudio():
+        _pyaudio_instances.append(pyaudio.PyAudio())
+        return _pyaudio_instances[-1]
+
+    def release_pyaudio():
+        if _pyaudio_instances:
+            _pyaudio_instances.pop().terminate()
+
+try:
+    # Opus解码复用IdeaFactory的OpusDecoderUtils，需从IdeaFactory的上级目录以模块方式运行
+    from IdeaFactory.opus_decoder_utils import OpusDecoderUtils
+except Exception:
+    OpusDecoderUtils = None
+
 class AudioReceiver:
-    def __init__(self, server_url='ws://localhost:8765'):
+    def __init__(self, server_url='ws://localhost:8765', channel='default'):
         self.server_url = server_url
+        self.channel = channel
         self.websocket = None
         self.connected = False
         self.audio_queue = Queue()
@@ -26,10 +49,16 @@ class AudioReceiver:
         self.CHANNELS = 1
         self.RATE = 44100
         
-        # PyAudio实例
-        self.p = pyaudio.PyAudio()
+        # 当前频道的编码，由服务器在确认消息或codec消息中告知
+        self.codec = {'name': 'pcm'}
+        self.decoder = None
+        self.decode_time = 0.0
+        
+        # PyAudio实例（共享），播放流在启停之间保留
+        self.p = acquire_pyaudio()
         self.stream = None
         self.playing = False
+        self.playing_thread = None
         
         # 状态跟踪
         self.audio_received = False
@@ -54,7 +83,9 @@ class AudioReceiver:
             # 发送身份信息
             identity = {
                 'type': 'receiver',
-                'id': 'audio_receiver_001'
+                'id': 'audio_receiver_001',
+                'channel': self.channel,
+                'codecs': self.supported_codecs()
             }
             identity_json = json.dumps(identity)
             print(f"发送身份信息: {identity_json}")
@@ -72,6 +103,8 @@ class AudioReceiver:
                 self.connected = True
                 logger.info("已连接到WebSocket服务器")
                 print("✓ 已连接到服务器")
+                if data.get('codec'):
+                    self.apply_codec(data['codec'])
                 
                 # 发送准备就绪消息
                 ready_message = {
@@ -105,6 +138,48 @@ class AudioReceiver:
             print(f"错误详情: {traceback.format_exc()}")
             return False
     
+    @staticmethod
+    def supported_codecs():
+        """身份信息中声明本端能解码的编码"""
+        return ['pcm', 'opus'] if OpusDecoderUtils else ['pcm']
+    
+    def apply_codec(self, codec):
+        """切换到发送端声明的编码，采样率变化时重开播放流"""
+        name = codec.get('name', 'pcm')
+        if name == 'opus' and OpusDecoderUtils is None:
+            logger.error("发送端使用Opus编码，但本端无法加载Opus解码器")
+            print("✗ 无法解码Opus音频，请从IdeaFactory的上级目录以 python -m IdeaFactory.ws_demo.audio_receiver 运行")
+            return
+        if name not in ('pcm', 'opus'):
+            logger.error(f"不支持的编码: {name}")
+            return
+        
+        if self.decoder:
+            self.decoder.close()
+            self.decoder = None
+        rate = codec.get('sample_rate', 44100)
+        channels = codec.get('channels', 1)
+        if name == 'opus':
+            self.decoder = OpusDecoderUtils(rate, channels, codec.get('frame_ms', 20))
+        self.codec = codec
+        print(f"✓ 音频编码: {name} ({rate}Hz)")
+        
+        if (rate, channels) != (self.RATE, self.CHANNELS):
+            self.RATE, self.CHANNELS = rate, channels
+            # 播放流参数变了，不能再复用
+            was_playing = self.playing
+            if was_playing:
+                self.stop_playing()
+            self._close_stream()
+            if was_playing:
+                self.start_playing()
+    
+    def _close_stream(self):
+        """关闭保留的播放流"""
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+    
     def start_playing(self):
         """开始播放音频"""
         if self.playing:
@@ -112,22 +187,25 @@ class AudioReceiver:
             return
         
         try:
-            self.stream = self.p.open(
-                format=self.FORMAT,
-                channels=self.CHANNELS,
-                rate=self.RATE,
-                output=True,
-                frames_per_buffer=self.CHUNK
-            )
+            if self.stream is None:
+                self.stream = self.p.open(
+                    format=self.FORMAT,
+                    channels=self.CHANNELS,
+                    rate=self.RATE,
+                    output=True,
+                    frames_per_buffer=self.CHUNK
+                )
+            else:
+                self.stream.start_stream()
             
             self.playing = True
             logger.info("开始播放音频...")
             print("✓ 音频播放已启动")
             
             # 在单独的线程中播放
-            playing_thread = threading.Thread(target=self._play_audio)
-            playing_thread.daemon = True
-            playing_thread.start()
+            self.playing_thread = threading.Thread(target=self._play_audio)
+            self.playing_thread.daemon = True
+            self.playing_thread.start()
             
         except Exception as e:
             logger.error(f"启动播放时出错: {e}")
@@ -140,14 +218,25 @@ class AudioReceiver:
             return
         
         self.playing = False
+        # 等播放线程写完当前数据块并退出，之后才能停止或关闭播放流
+        if self.playing_thread:
+            self.playing_thread.join(timeout=1.0)
+            self.playing_thread = None
         if self.stream:
             self.stream.stop_stream()
-            self.stream.close()
-            self.stream = None
         
         logger.info("播放已停止")
         print("音频播放已停止")
     
+    def close(self):
+        """停止播放，关闭播放流并释放共享的PyAudio实例"""
+        if self.playing:
+            self.stop_playing()
+        self._close_stream()
+        if self.p:
+            self.p = None
+            release_pyaudio()
+    
     def _play_audio(self):
         """播放音频线程函数"""
         try:
@@ -186,6 +275,24 @@ class AudioReceiver:
                 # 接收服务器消息
                 message = await asyncio.wait_for(self.websocket.recv(), timeout=30.0)
                 
+                # 二进制帧即音频数据，Opus数据包在本进程解码为PCM
+                if isinstance(message, bytes):
+                    if self.decoder:
+                        start = time.perf_counter()
+                        message = self.decoder.decode(message)
+                        self.decode_time += time.perf_counter() - start
+                        if message is None:
+                            continue
+                    self.audio_queue.put(message)
+                    
+                    # 标记已收到音频数据
+                    if not self.audio_received:
+                        self.audio_received = True
+                        waiting_task.cancel()  # 取消等待状态显示
+                    
+                    self.last_audio_time = time.time()
+                    continue
+                
                 try:
                     # 尝试解析为JSON消息
                     data = json.loads(message)
@@ -206,6 +313,8 @@ class AudioReceiver:
                         
                         self.last_audio_time = time.time()
                         logger.debug("收到音频数据")
+                    elif message_type == 'codec':
+                        self.apply_codec(data.get('codec', {}))
                     else:
                         logger.info(f"收到消息: {message_type}")
                         
@@ -268,17 +377,22 @@ class AudioReceiver:
             print(f"错误详情: {traceback.format_exc()}")
         finally:
             # 清理资源
-            self.stop_playing()
+            self.close()
             if self.websocket:
                 await self.websocket.close()
-            if self.p:
-                self.p.terminate()
+            if self.decoder:
+                print(f"\nOpus解码耗时: {self.decode_time * 1000:.1f} ms")
+                self.decoder.close()
             logger.info("接收客户端已关闭")
             print("\n接收客户端已关闭")
 
 async def main():
     """主函数"""
-    receiver = AudioReceiver()
+    parser = argparse.ArgumentParser(description="音频接收客户端")
+    parser.add_argument('--server', default='ws://localhost:8765', help="WebSocket服务器地址")
+    parser.add_argument('--channel', default='default', help="频道名，只和同一频道的客户端互通")
+    args = parser.parse_args()
+    receiver = AudioReceiver(args.server, args.channel)
     
     try:
         await receiver.run()
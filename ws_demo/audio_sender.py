@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import websockets
 import json
@@ -7,16 +8,46 @@ import threading
 import time
 import logging
 from queue import Queue
-import base64
 import traceback
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+CODECS = ('pcm', 'opus')
+# Opus只支持8/12/16/24/48kHz，启用Opus时改用48kHz录音
+OPUS_SAMPLE_RATE = 48000
+
+try:
+    # 共用IdeaFactory进程内的PyAudio实例，需从IdeaFactory的上级目录以模块方式运行
+    from IdeaFactory.audio_output import acquire_pyaudio, release_pyaudio
+except ImportError:
+    # 单独运行脚本时退回到本客户端自己的PyAudio实例
+    _pyaudio_instances = []
+
+    def acquire_pyaudio():
+        _pyaudio_instances.append(pyaudio.PyAudio())
+        return _pyaudio_instances[-1]
+
+    def release_pyaudio():
+        if _pyaudio_instances:
+            _pyaudio_instances.pop().terminate()
+
 class AudioSender:
-    def __init__(self, server_url='ws://localhost:8765'):
+    def __init__(self, server_url='ws://localhost:8765', channel='default', codec='pcm',
+                 bitrate=24000, frame_ms=20, complexity=5):
+        """
+        Args:
+            codec: pcm=原始16位PCM，opus=Opus压缩
+            bitrate: Opus比特率 (bps)
+            frame_ms: Opus帧时长 (毫秒)，10/20/40/60
+            complexity: Opus编码复杂度 0-10
+        """
+        if codec not in CODECS:
+            raise ValueError(f"未知的编码: {codec}，可选 {CODECS}")
         self.server_url = server_url
+        self.channel = channel
+        self.codec = codec
         self.websocket = None
         self.connected = False
         self.audio_queue = Queue()
@@ -28,15 +59,35 @@ class AudioSender:
         self.RATE = 44100
         self.RECORD_SECONDS = 5
         
-        # PyAudio实例
-        self.p = pyaudio.PyAudio()
+        # Opus编码器（复用IdeaFactory的OpusEncoderUtils，需从IdeaFactory的上级目录以模块方式运行）
+        self.encoder = None
+        if codec == 'opus':
+            from IdeaFactory.opus_encoder_tulis import OpusEncoderUtils
+            self.RATE = OPUS_SAMPLE_RATE
+            # 每次录一帧，编码器里不残留样本
+            self.CHUNK = self.RATE * frame_ms // 1000
+            self.encoder = OpusEncoderUtils(self.RATE, self.CHANNELS, frame_ms,
+                                            bitrate=bitrate, complexity=complexity)
+        
+        # PyAudio实例（共享），录音流在启停之间保留
+        self.p = acquire_pyaudio()
         self.stream = None
         self.recording = False
         
         # 状态跟踪
         self.audio_sent_count = 0
+        self.bytes_sent = 0
+        self.encode_time = 0.0
         self.last_send_time = 0
     
+    def codec_info(self):
+        """身份信息中声明的编码参数，服务器转告同频道的接收端"""
+        info = {'name': self.codec, 'sample_rate': self.RATE, 'channels': self.CHANNELS}
+        if self.encoder:
+            info.update(frame_ms=self.encoder.frame_size_ms, bitrate=self.encoder.bitrate,
+                        complexity=self.encoder.complexity)
+        return info
+    
     async def connect_to_server(self):
         """连接到WebSocket服务器"""
         try:
@@ -54,7 +105,9 @@ class AudioSender:
             # 发送身份信息
             identity = {
                 'type': 'sender',
-                'id': 'audio_sender_001'
+                'id': 'audio_sender_001',
+                'channel': self.channel,
+                'codec': self.codec_info()
             }
             identity_json = json.dumps(identity)
             print(f"发送身份信息: {identity_json}")
@@ -103,13 +156,16 @@ class AudioSender:
             return
         
         try:
-            self.stream = self.p.open(
-                format=self.FORMAT,
-                channels=self.CHANNELS,
-                rate=self.RATE,
-                input=True,
-                frames_per_buffer=self.CHUNK
-            )
+            if self.stream is None:
+                self.stream = self.p.open(
+                    format=self.FORMAT,
+                    channels=self.CHANNELS,
+                    rate=self.RATE,
+                    input=True,
+                    frames_per_buffer=self.CHUNK
+                )
+            else:
+                self.stream.start_stream()
             
             self.recording = True
             logger.info("开始录音...")
@@ -133,8 +189,6 @@ class AudioSender:
         self.recording = False
         if self.stream:
             self.stream.stop_stream()
-            self.stream.close()
-            self.stream = None
         
         logger.info("录音已停止")
         print("录音已停止")
@@ -152,12 +206,24 @@ class AudioSender:
         except Exception as e:
             logger.error(f"录音过程中出错: {e}")
     
+    def close(self):
+        """停止录音，关闭录音流并释放共享的PyAudio实例"""
+        if self.recording:
+            self.stop_recording()
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if self.p:
+            self.p = None
+            release_pyaudio()
+    
     async def show_sending_status(self):
         """显示发送状态"""
         dots = 0
         while self.connected:
             status = "正在发送音频数据" + "." * (dots % 4)
-            print(f"\r{status} (已发送 {self.audio_sent_count} 个数据包)", end="", flush=True)
+            print(f"\r{status} (已发送 {self.audio_sent_count} 个数据包, {self.bytes_sent / 1024:.1f} KB)",
+                  end="", flush=True)
             dots += 1
             await asyncio.sleep(2)
     
@@ -174,11 +240,17 @@ class AudioSender:
                 if not self.audio_queue.empty():
                     audio_data = self.audio_queue.get()
                     
-                    # 将音频数据编码为base64
-                    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                    
-                    # 发送到服务器
-                    await self.websocket.send(audio_base64)
+                    if self.encoder:
+                        # 每个Opus数据包一个二进制帧
+                        start = time.perf_counter()
+                        packets = self.encoder.encode_pcm_to_opus(audio_data, False)
+                        self.encode_time += time.perf_counter() - start
+                    else:
+                        # 以二进制帧直接发送PCM数据
+                        packets = [audio_data]
+                    for packet in packets:
+                        await self.websocket.send(packet)
+                        self.bytes_sent += len(packet)
                     
                     # 更新统计信息
                     self.audio_sent_count += 1
@@ -231,17 +303,26 @@ class AudioSender:
             print(f"错误详情: {traceback.format_exc()}")
         finally:
             # 清理资源
-            self.stop_recording()
+            self.close()
             if self.websocket:
                 await self.websocket.close()
-            if self.p:
-                self.p.terminate()
             logger.info("发送客户端已关闭")
-            print(f"\n发送客户端已关闭 (总共发送了 {self.audio_sent_count} 个数据包)")
+            print(f"\n发送客户端已关闭 (总共发送了 {self.audio_sent_count} 个数据包, {self.bytes_sent / 1024:.1f} KB)")
+            if self.encoder:
+                print(f"Opus编码耗时: {self.encode_time * 1000:.1f} ms")
 
 async def main():
     """主函数"""
-    sender = AudioSender()
+    parser = argparse.ArgumentParser(description="音频发送客户端")
+    parser.add_argument('--server', default='ws://localhost:8765', help="WebSocket服务器地址")
+    parser.add_argument('--channel', default='default', help="频道名，只和同一频道的客户端互通")
+    parser.add_argument('--codec', choices=CODECS, default='pcm', help="音频编码")
+    parser.add_argument('--bitrate', type=int, default=24000, help="Opus比特率 (bps)")
+    parser.add_argument('--frame-ms', type=int, choices=[10, 20, 40, 60], default=20, help="Opus帧时长 (毫秒)")
+    parser.add_argument('--complexity', type=int, choices=range(11), default=5, metavar='0-10',
+                        help="Opus编码复杂度")
+    args = parser.parse_args()
+    sender = AudioSender(args.server, args.channel, args.codec, args.bitrate, args.frame_ms, args.complexity)
     
     try:
         await sender.run()
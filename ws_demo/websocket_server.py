@@ -1,5 +1,15 @@
+import argparse
 import asyncio
+import base64
+import multiprocessing
+import os
+import socket
+import struct
+import sys
+import tempfile
 import websockets
+import websockets.exceptions
+from collections import deque
 import json
 import logging
 from typing import Set, Dict
@@ -10,14 +20,327 @@ import traceback
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 接收端发送队列已满时的处理策略
+FULL_POLICIES = ('drop_oldest', 'drop_newest', 'disconnect')
+# 身份信息中未指定频道时使用的频道
+DEFAULT_CHANNEL = 'default'
+# 状态中最多列出的频道数
+STATUS_CHANNEL_LIMIT = 20
+# 发送端未声明编码时的默认编码（44.1kHz单声道16位PCM）
+DEFAULT_CODEC = {'name': 'pcm', 'sample_rate': 44100, 'channels': 1}
+
+# 多进程模式下worker之间的总线帧: 帧头(类型, 频道名长度, 负载长度) + 频道名 + 负载
+BUS_FRAME_HEADER = struct.Struct('<BHI')
+BUS_SUBSCRIBE = 1
+BUS_UNSUBSCRIBE = 2
+BUS_PUBLISH = 3
+# 总线中心 -> worker: 某频道在其他worker上是否有接收端（负载1字节，1有0无）
+BUS_REMOTE_INTEREST = 4
+# 频道的编码参数（负载为codec消息的JSON），总线中心保存最新一份，worker订阅时补发
+BUS_CODEC = 5
+# 总线连接写缓冲超过该大小时丢弃发往它的音频块，避免一个繁忙的worker拖住整条总线
+BUS_MAX_PENDING_BYTES = 4 * 1024 * 1024
+
+def pack_bus_frame(kind, channel, payload=b''):
+    """打包一个总线帧"""
+    name = channel.encode('utf-8')
+    return BUS_FRAME_HEADER.pack(kind, len(name), len(payload)) + name + payload
+
+async def read_bus_frame(reader):
+    """读取一个总线帧，返回 (类型, 频道, 负载)"""
+    header = await reader.readexactly(BUS_FRAME_HEADER.size)
+    kind, name_length, size = BUS_FRAME_HEADER.unpack(header)
+    body = await reader.readexactly(name_length + size)
+    return kind, body[:name_length].decode('utf-8'), body[name_length:]
+
+class RelayBusHub:
+    """
+    总线中心：记录每个worker订阅的频道，把音频块转发给订阅了该频道的其他worker；
+    频道成员变化时通知各worker该频道在别处是否有接收端，worker只发布有人要的频道
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        # 频道 -> 订阅了该频道的worker连接
+        self.subscribers: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self.connections: Set[asyncio.StreamWriter] = set()
+        # 频道 -> 最新的codec消息
+        self.codecs: Dict[str, bytes] = {}
+        self.server = None
+        
+        # 统计信息
+        self.workers = 0
+        self.frames_forwarded = 0
+        self.bytes_forwarded = 0
+        self.frames_dropped = 0
+    
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._handle_worker, path=self.path)
+    
+    async def _handle_worker(self, reader, writer):
+        """处理一个worker的总线连接"""
+        self.workers += 1
+        self.connections.add(writer)
+        channels = set()
+        # 告诉新worker哪些频道已经有接收端
+        for channel in self.subscribers:
+            writer.write(pack_bus_frame(BUS_REMOTE_INTEREST, channel, b'\x01'))
+        try:
+            while True:
+                kind, channel, payload = await read_bus_frame(reader)
+                if kind == BUS_PUBLISH:
+                    self._forward(writer, channel, payload)
+                elif kind == BUS_SUBSCRIBE:
+                    self.subscribers.setdefault(channel, set()).add(writer)
+                    channels.add(channel)
+                    self._notify_interest(channel)
+                    if channel in self.codecs:
+                        writer.write(pack_bus_frame(BUS_CODEC, channel, self.codecs[channel]))
+                elif kind == BUS_CODEC:
+                    self.codecs[channel] = payload
+                    self._forward(writer, channel, payload, BUS_CODEC)
+                elif kind == BUS_UNSUBSCRIBE:
+                    self._unsubscribe(writer, channel)
+                    channels.discard(channel)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            for channel in channels:
+                self._unsubscribe(writer, channel)
+            self.workers -= 1
+            writer.close()
+    
+    def _unsubscribe(self, writer, channel):
+        subscribers = self.subscribers.get(channel)
+        if subscribers is not None:
+            subscribers.discard(writer)
+            if not subscribers:
+                del self.subscribers[channel]
+            self._notify_interest(channel)
+    
+    def _notify_interest(self, channel):
+        """频道订阅变化后，通知每个worker该频道在其他worker上是否还有接收端"""
+        subscribers = self.subscribers.get(channel, ())
+        for writer in self.connections:
+            if writer.is_closing():
+                continue
+            remote = len(subscribers) - (writer in subscribers) > 0
+            writer.write(pack_bus_frame(BUS_REMOTE_INTEREST, channel, b'\x01' if remote else b'\x00'))
+    
+    def _forward(self, origin, channel, payload, kind=BUS_PUBLISH):
+        """转发给订阅该频道的其他worker（帧只打包一次，不等待写完）"""
+        subscribers = self.subscribers.get(channel)
+        if not subscribers:
+            return
+        frame = None
+        for writer in subscribers:
+            if writer is origin or writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > BUS_MAX_PENDING_BYTES:
+                self.frames_dropped += 1
+                continue
+            if frame is None:
+                frame = pack_bus_frame(kind, channel, payload)
+            writer.write(frame)
+            self.frames_forwarded += 1
+            self.bytes_forwarded += len(payload)
+    
+    async def stop(self):
+        for writer in list(self.connections):
+            writer.close()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+class RelayBusClient:
+    """worker端的总线连接：订阅本worker有接收端的频道，发布本worker发送端的音频块"""
+    
+    def __init__(self, path, on_message, on_codec=None):
+        """
+        Args:
+            path: 总线的Unix socket路径
+            on_message: 收到其他worker转发的音频块时的回调 (频道, 数据)
+            on_codec: 收到频道编码参数时的回调 (频道, codec消息JSON)
+        """
+        self.path = path
+        self.on_message = on_message
+        self.on_codec = on_codec
+        self.reader = None
+        self.writer = None
+        self.task = None
+        # 在其他worker上有接收端的频道，只有这些频道的音频块需要发布到总线
+        self.remote_channels: Set[str] = set()
+        self.frames_dropped = 0
+    
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+        self.task = asyncio.create_task(self._read_loop())
+    
+    async def _read_loop(self):
+        try:
+            while True:
+                kind, channel, payload = await read_bus_frame(self.reader)
+                if kind == BUS_PUBLISH:
+                    self.on_message(channel, payload)
+                elif kind == BUS_CODEC:
+                    if self.on_codec:
+                        self.on_codec(channel, payload)
+                elif kind == BUS_REMOTE_INTEREST:
+                    if payload == b'\x01':
+                        self.remote_channels.add(channel)
+                    else:
+                        self.remote_channels.discard(channel)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            logger.error("总线连接已断开")
+    
+    def subscribe(self, channel):
+        self.writer.write(pack_bus_frame(BUS_SUBSCRIBE, channel))
+    
+    def unsubscribe(self, channel):
+        self.writer.write(pack_bus_frame(BUS_UNSUBSCRIBE, channel))
+    
+    def announce_codec(self, channel, payload):
+        """发布频道的编码参数（不管当前有没有其他worker订阅，总线中心都会保存）"""
+        self.writer.write(pack_bus_frame(BUS_CODEC, channel, payload))
+    
+    def publish(self, channel, payload):
+        if channel not in self.remote_channels or self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > BUS_MAX_PENDING_BYTES:
+            self.frames_dropped += 1
+            return
+        self.writer.write(pack_bus_frame(BUS_PUBLISH, channel, payload))
+    
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+        if self.writer:
+            self.writer.close()
+
+class ReceiverQueue:
+    """
+    单个接收端的有界发送队列，由独立的写任务发送，慢接收端不会阻塞发送端和其他接收端
+    
+    队列上限只约束音频块（bytes）；codec等文本控制消息总是入队且不会被丢弃，
+    否则接收端会按错误的编码解读之后的音频
+    """
+    
+    def __init__(self, websocket, client_id, max_size=50, policy='drop_oldest'):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.max_size = max_size
+        self.policy = policy
+        self.items = deque()
+        self.audio_depth = 0
+        self._ready = asyncio.Event()
+        self.task = None
+        
+        # 统计信息
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+    
+    def start(self):
+        """启动写任务"""
+        self.task = asyncio.create_task(self._writer())
+    
+    def put(self, data):
+        """
+        放入一块音频数据或一条文本控制消息（不等待）
+        
+        Returns:
+            False表示队列已满且策略为disconnect，调用方应断开该接收端
+        """
+        if isinstance(data, bytes):
+            if self.audio_depth >= self.max_size:
+                if self.policy == 'disconnect':
+                    return False
+                self.dropped += 1
+                if self.policy == 'drop_newest':
+                    return True
+                # drop_oldest: 丢掉最早的一块音频给新数据腾位置，排在它前面的控制消息保留
+                self._drop_oldest_audio()
+            self.audio_depth += 1
+        self.items.append(data)
+        self._ready.set()
+        self.max_depth = max(self.max_depth, self.audio_depth)
+        return True
+    
+    def _drop_oldest_audio(self):
+        for index, item in enumerate(self.items):
+            if isinstance(item, bytes):
+                del self.items[index]
+                self.audio_depth -= 1
+                return
+    
+    async def _writer(self):
+        """写任务：按顺序发送队列中的数据"""
+        try:
+            while True:
+                if not self.items:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                data = self.items.popleft()
+                if isinstance(data, bytes):
+                    self.audio_depth -= 1
+                await self.websocket.send(data)
+                self.sent += 1
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except Exception as e:
+            logger.error(f"向接收端 {self.client_id} 发送数据时出错: {e}")
+    
+    def stop(self):
+        """停止写任务"""
+        if self.task and not self.task.done():
+            self.task.cancel()
+    
+    async def close(self, code, reason):
+        """停止写任务并关闭连接"""
+        self.stop()
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
 class AudioWebSocketServer:
-    def __init__(self, host='localhost', port=8765):
+    def __init__(self, host='localhost', port=8765, queue_size=50, full_policy='drop_oldest', bus=None):
+        """
+        Args:
+            queue_size: 每个接收端发送队列的最大块数
+            full_policy: 队列已满时的策略，drop_oldest / drop_newest / disconnect
+            bus: 多进程模式下的总线连接(RelayBusClient)，单进程时为None
+        """
+        if full_policy not in FULL_POLICIES:
+            raise ValueError(f"未知的队列策略: {full_policy}，可选 {FULL_POLICIES}")
         self.host = host
         self.port = port
+        self.queue_size = queue_size
+        self.full_policy = full_policy
+        self.bus = bus
         self.sender_clients: Set[websockets.WebSocketServerProtocol] = set()
-        self.receiver_clients: Set[websockets.WebSocketServerProtocol] = set()
+        # 频道 -> {接收端 -> 发送队列}，发送端按频道名一次查找即可拿到要转发的接收端
+        self.channels: Dict[str, Dict[websockets.WebSocketServerProtocol, ReceiverQueue]] = {}
+        # 客户端 -> 所在频道
+        self.client_channels: Dict[websockets.WebSocketServerProtocol, str] = {}
+        # 频道 -> 发送端在身份信息中声明的编码参数，例如 {'name': 'opus', 'sample_rate': 48000, ...}
+        self.channel_codecs: Dict[str, dict] = {}
+        self.receiver_count = 0
         self.clients_info: Dict[websockets.WebSocketServerProtocol, str] = {}
         self.start_time = time.time()
+        
+        # 转发统计
+        self.chunks_relayed = 0
+        self.bytes_relayed = 0
+        self.slow_disconnects = 0
+        self.last_progress_time = 0
     
     async def register_client(self, websocket, path):
         """注册客户端连接"""
@@ -31,29 +354,57 @@ class AudioWebSocketServer:
             data = json.loads(message)
             client_type = data.get('type')
             client_id = data.get('id', str(id(websocket)))
-            
-            self.clients_info[websocket] = client_type
+            channel = str(data.get('channel') or DEFAULT_CHANNEL)
             
             if client_type == 'sender':
                 self.sender_clients.add(websocket)
-                logger.info(f"发送客户端 {client_id} 已连接")
-                print(f"✓ 发送客户端 {client_id} 已连接")
+                logger.info(f"发送客户端 {client_id} 已连接 (频道 {channel})")
+                print(f"✓ 发送客户端 {client_id} 已连接 (频道 {channel})")
+                # 未声明编码的旧版发送端按44.1kHz PCM处理，编码变化时才通知接收端
+                codec = data.get('codec')
+                if not (isinstance(codec, dict) and codec.get('name')):
+                    codec = DEFAULT_CODEC
+                if codec != self.channel_codecs.get(channel, DEFAULT_CODEC):
+                    self.set_channel_codec(channel, codec)
             elif client_type == 'receiver':
-                self.receiver_clients.add(websocket)
-                logger.info(f"接收客户端 {client_id} 已连接")
-                print(f"✓ 接收客户端 {client_id} 已连接")
+                receiver_queue = ReceiverQueue(websocket, client_id, self.queue_size, self.full_policy)
+                receivers = self.channels.get(channel)
+                if receivers is None:
+                    receivers = self.channels[channel] = {}
+                    # 本worker第一次有该频道的接收端，订阅其他worker上的发送端
+                    if self.bus:
+                        self.bus.subscribe(channel)
+                receivers[websocket] = receiver_queue
+                self.receiver_count += 1
+                logger.info(f"接收客户端 {client_id} 已连接 (频道 {channel})")
+                print(f"✓ 接收客户端 {client_id} 已连接 (频道 {channel})")
             else:
                 logger.warning(f"未知客户端类型: {client_type}")
                 print(f"⚠ 未知客户端类型: {client_type}")
                 return
             
+            self.clients_info[websocket] = client_type
+            self.client_channels[websocket] = channel
+            
             # 发送确认消息
             ack_message = {
                 'type': 'connection_ack',
                 'status': 'connected',
-                'client_type': client_type
+                'client_type': client_type,
+                'channel': channel
             }
+            if client_type == 'receiver' and channel in self.channel_codecs:
+                # 频道已有发送端，直接告诉接收端如何解码
+                codec = self.channel_codecs[channel]
+                ack_message['codec'] = codec
+                supported = data.get('codecs')
+                if supported is not None and codec['name'] not in supported:
+                    logger.warning(f"接收客户端 {client_id} 不支持频道 {channel} 的编码 {codec['name']}")
+                    print(f"⚠ 接收客户端 {client_id} 不支持编码 {codec['name']}")
             await websocket.send(json.dumps(ack_message))
+            # 确认消息发出后再开始向接收端发送音频
+            if client_type == 'receiver':
+                receiver_queue.start()
             print(f"已发送确认消息给 {client_type} 客户端")
             
             self.print_status()
@@ -74,48 +425,87 @@ class AudioWebSocketServer:
         print(f"\n=== 服务器状态 ===")
         print(f"运行时间: {uptime} 秒")
         print(f"发送端连接数: {len(self.sender_clients)}")
-        print(f"接收端连接数: {len(self.receiver_clients)}")
-        print(f"总连接数: {len(self.sender_clients) + len(self.receiver_clients)}")
+        print(f"已转发: {self.chunks_relayed} 块, {self.bytes_relayed / 1024:.1f} KB")
+        print(f"接收端: {self.receiver_count} (队列上限 {self.queue_size}, 策略 {self.full_policy}, "
+              f"因过慢断开 {self.slow_disconnects})")
+        print(f"频道数: {len(self.channels)}")
+        for index, (channel, receivers) in enumerate(self.channels.items()):
+            if index == STATUS_CHANNEL_LIMIT:
+                print(f"  ... 其余 {len(self.channels) - STATUS_CHANNEL_LIMIT} 个频道")
+                break
+            print(f"  [{channel}] 接收端 {len(receivers)}")
+            for receiver_queue in receivers.values():
+                print(f"    {receiver_queue.client_id}: 队列 {receiver_queue.audio_depth}/{receiver_queue.max_size} "
+                      f"(峰值 {receiver_queue.max_depth}), 已发送 {receiver_queue.sent}, 丢弃 {receiver_queue.dropped}")
         print("=" * 20)
     
     async def handle_sender_message(self, websocket, message):
         """处理发送客户端的音频数据"""
         try:
-            # 转发音频数据给所有接收客户端
-            if self.receiver_clients:
-                # 创建转发消息
-                forward_message = {
-                    'type': 'audio_data',
-                    'data': message
-                }
-                
-                # 发送给所有接收客户端
-                disconnected_clients = set()
-                for receiver in self.receiver_clients:
-                    try:
-                        await receiver.send(json.dumps(forward_message))
-                    except websockets.exceptions.ConnectionClosed:
-                        disconnected_clients.add(receiver)
-                    except Exception as e:
-                        logger.error(f"发送音频数据时出错: {e}")
-                        disconnected_clients.add(receiver)
-                
-                # 清理断开的连接
-                for client in disconnected_clients:
-                    self.receiver_clients.discard(client)
-                    self.clients_info.pop(client, None)
-                    logger.info("接收客户端连接已断开")
-                    print("⚠ 接收客户端连接已断开")
-                
-                # 只在有接收端时显示转发信息
-                if len(self.receiver_clients) > 0:
-                    print(f"\r音频数据已转发给 {len(self.receiver_clients)} 个接收客户端", end="", flush=True)
-            else:
-                print("\r等待接收客户端连接...", end="", flush=True)
+            # 音频以二进制帧传输；兼容旧版发送端的base64文本
+            if isinstance(message, str):
+                message = base64.b64decode(message)
+            
+            # 转发音频数据给同一频道的接收客户端（多进程模式下同时发布到总线）
+            channel = self.client_channels.get(websocket)
+            self.deliver(channel, message)
+            if self.bus:
+                self.bus.publish(channel, message)
+            
+            # 转发信息每秒最多显示一次
+            now = time.time()
+            if now - self.last_progress_time >= 1:
+                self.last_progress_time = now
+                print(f"\r已转发 {self.chunks_relayed} 块 ({len(self.channels)} 个频道, {self.receiver_count} 个接收端)",
+                      end="", flush=True)
                 
         except Exception as e:
             logger.error(f"处理发送客户端消息时出错: {e}")
     
+    def set_channel_codec(self, channel, codec, from_bus=False):
+        """记录频道的编码参数并通知该频道已连接的接收端，多进程模式下同步给其他worker"""
+        self.channel_codecs[channel] = codec
+        message = json.dumps({'type': 'codec', 'codec': codec})
+        self.deliver(channel, message)
+        if self.bus and not from_bus:
+            self.bus.announce_codec(channel, message.encode('utf-8'))
+        logger.info(f"频道 {channel} 编码: {codec}")
+    
+    def on_bus_codec(self, channel, payload):
+        """收到其他worker上发送端的编码参数"""
+        self.set_channel_codec(channel, json.loads(payload)['codec'], from_bus=True)
+    
+    def deliver(self, channel, message):
+        """把音频块放入本进程内该频道所有接收端的发送队列，不等待发送完成"""
+        receivers = self.channels.get(channel)
+        if not receivers:
+            return
+        for receiver, receiver_queue in list(receivers.items()):
+            if not receiver_queue.put(message):
+                logger.warning(f"接收端 {receiver_queue.client_id} 发送队列已满，断开连接")
+                print(f"\n⚠ 接收端 {receiver_queue.client_id} 处理过慢，已断开")
+                self._remove_receiver(receiver)
+                self.slow_disconnects += 1
+                asyncio.create_task(receiver_queue.close(1013, 'receiver too slow'))
+        # codec等文本消息与音频走同一队列以保证先后顺序（队列满时也不会被丢弃），但不计入转发统计
+        if isinstance(message, bytes):
+            self.chunks_relayed += 1
+            self.bytes_relayed += len(message) * len(receivers)
+    
+    def _remove_receiver(self, websocket):
+        """把接收端从所在频道移除（频道空了一并删除），返回它的发送队列"""
+        channel = self.client_channels.get(websocket)
+        receivers = self.channels.get(channel)
+        if not receivers or websocket not in receivers:
+            return None
+        receiver_queue = receivers.pop(websocket)
+        if not receivers:
+            del self.channels[channel]
+            if self.bus:
+                self.bus.unsubscribe(channel)
+        self.receiver_count -= 1
+        return receiver_queue
+    
     async def handle_receiver_message(self, websocket, message):
         """处理接收客户端的消息"""
         try:
@@ -182,14 +572,30 @@ class AudioWebSocketServer:
                 self.sender_clients.discard(websocket)
                 logger.info("发送客户端已断开")
                 print("⚠ 发送客户端已断开")
-            if websocket in self.receiver_clients:
-                self.receiver_clients.discard(websocket)
+            receiver_queue = self._remove_receiver(websocket)
+            if receiver_queue:
+                receiver_queue.stop()
                 logger.info("接收客户端已断开")
                 print("⚠ 接收客户端已断开")
             
             self.clients_info.pop(websocket, None)
+            self.client_channels.pop(websocket, None)
             self.print_status()
     
+    async def serve(self, reuse_port=False):
+        """开始监听并返回websockets服务器对象（port为0时回填实际端口）"""
+        server = await websockets.serve(
+            self.handle_client, 
+            self.host, 
+            self.port,
+            ping_interval=None,  # 禁用ping
+            ping_timeout=None,   # 禁用ping超时
+            compression=None,    # PCM几乎压缩不了，permessage-deflate只会白白消耗CPU
+            reuse_port=reuse_port  # 多进程模式下多个worker共用监听端口
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        return server
+    
     async def start(self):
         """启动WebSocket服务器"""
         logger.info(f"启动WebSocket服务器 {self.host}:{self.port}")
@@ -198,14 +604,7 @@ class AudioWebSocketServer:
         print("正在启动服务器...")
         
         try:
-            # 使用更简单的服务器启动方式
-            server = await websockets.serve(
-                self.handle_client, 
-                self.host, 
-                self.port,
-                ping_interval=None,  # 禁用ping
-                ping_timeout=None    # 禁用ping超时
-            )
+            server = await self.serve()
             
             print("✓ 服务器已启动，等待客户端连接...")
             print("按 Ctrl+C 停止服务器\n")
@@ -218,9 +617,103 @@ class AudioWebSocketServer:
             print(f"✗ 服务器启动失败: {e}")
             logger.error(f"服务器启动失败: {e}")
 
+def run_worker(host, port, bus_path, queue_size, full_policy, ready):
+    """worker进程入口：连接总线后以SO_REUSEPORT监听同一端口"""
+    # 多个worker的状态输出交织在一起没法看，worker只保留日志
+    sys.stdout = open(os.devnull, 'w')
+    
+    async def worker_main():
+        server = AudioWebSocketServer(host, port, queue_size, full_policy)
+        server.bus = RelayBusClient(bus_path, server.deliver, server.on_bus_codec)
+        await server.bus.connect()
+        ws_server = await server.serve(reuse_port=True)
+        ready.put(os.getpid())
+        await ws_server.wait_closed()
+    
+    try:
+        asyncio.run(worker_main())
+    except KeyboardInterrupt:
+        pass
+
+class RelayCluster:
+    """多进程转发：N个worker进程共用监听端口(SO_REUSEPORT)，通过Unix socket总线同步频道成员和音频块"""
+    
+    def __init__(self, host='localhost', port=8765, workers=None, queue_size=50, full_policy='drop_oldest',
+                 bus_path=None):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.full_policy = full_policy
+        self.bus_path = bus_path or os.path.join(tempfile.gettempdir(), f"ws_relay_bus_{os.getpid()}.sock")
+        self.hub = RelayBusHub(self.bus_path)
+        self.processes = []
+    
+    async def start(self):
+        """启动总线和全部worker，等所有worker开始监听后返回"""
+        if self.port == 0:
+            # 先找一个空闲端口，所有worker绑定同一个端口
+            with socket.socket() as probe:
+                probe.bind((self.host, 0))
+                self.port = probe.getsockname()[1]
+        await self.hub.start()
+        
+        # worker用spawn启动，不继承父进程正在运行的事件循环
+        context = multiprocessing.get_context('spawn')
+        ready = context.Queue()
+        for _ in range(self.workers):
+            process = context.Process(
+                target=run_worker,
+                args=(self.host, self.port, self.bus_path, self.queue_size, self.full_policy, ready),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+        loop = asyncio.get_running_loop()
+        for _ in range(self.workers):
+            await loop.run_in_executor(None, ready.get, True, 30)
+        logger.info(f"{self.workers} 个worker已启动，监听 {self.host}:{self.port}")
+    
+    async def stop(self):
+        # 先关总线，避免向正在退出的worker转发
+        await self.hub.stop()
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join(timeout=5)
+        self.processes = []
+
+async def run_cluster(args):
+    """多进程模式"""
+    cluster = RelayCluster(args.host, args.port, args.workers, args.queue_size, args.full_policy)
+    print(f"=== WebSocket 音频服务器 (多进程) ===")
+    print(f"地址: {args.host}:{args.port}, worker数: {cluster.workers}")
+    await cluster.start()
+    print("✓ 服务器已启动，等待客户端连接...")
+    print("按 Ctrl+C 停止服务器\n")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(f"\r总线: {cluster.hub.workers} 个worker, {len(cluster.hub.subscribers)} 个频道有接收端, "
+                  f"已转发 {cluster.hub.frames_forwarded} 块, 丢弃 {cluster.hub.frames_dropped} 块", end="", flush=True)
+    finally:
+        await cluster.stop()
+
 async def main():
     """主函数"""
-    server = AudioWebSocketServer()
+    parser = argparse.ArgumentParser(description="WebSocket 音频服务器")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--queue-size', type=int, default=50, help="每个接收端发送队列的最大块数")
+    parser.add_argument('--full-policy', choices=FULL_POLICIES, default='drop_oldest',
+                        help="接收端队列已满时的处理策略")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker进程数，大于1时多个进程共用端口(SO_REUSEPORT，仅Linux)，0表示CPU核数")
+    args = parser.parse_args()
+    if args.workers != 1:
+        await run_cluster(args)
+        return
+    server = AudioWebSocketServer(args.host, args.port, args.queue_size, args.full_policy)
     await server.start()
 
 if __name__ == "__main__":